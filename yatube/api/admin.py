@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from .models import Token
+
+
+class TokenAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'user',
+        'name',
+        'created',
+    )
+    search_fields = ('user__username', 'name')
+    readonly_fields = ('key_hash',)
+
+
+admin.site.register(Token, TokenAdmin)
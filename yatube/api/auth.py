@@ -0,0 +1,77 @@
+import json
+from functools import wraps
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from .models import Token, hash_key
+
+BODY_METHODS = ('POST', 'PATCH', 'PUT', 'DELETE')
+
+
+class ApiError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def authenticate(request):
+    """Пользователь по заголовку «Authorization: Token <ключ>».
+
+    Сессия для API не используется: без токена запрос анонимный,
+    поэтому и CSRF-проверка ему не нужна.
+    """
+    scheme, _, key = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    if scheme.lower() != 'token':
+        return AnonymousUser()
+    token = Token.objects.select_related('user').filter(
+        key_hash=hash_key(key.strip())
+    ).first()
+    if token is None or not token.user.is_active:
+        raise ApiError(401, 'Неверный токен.')
+    return token.user
+
+
+def require_user(request):
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Нужен токен.')
+
+
+def _parse_body(request):
+    if request.method not in BODY_METHODS or not request.body:
+        return {}
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        raise ApiError(400, 'Тело запроса -- не JSON.')
+    if not isinstance(data, dict):
+        raise ApiError(400, 'Ожидается JSON-объект.')
+    return data
+
+
+def api_view(*methods):
+    """Представление API: методы, токен, JSON в request.data, ошибки."""
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                response = JsonResponse(
+                    {'detail': 'Метод не поддерживается.'}, status=405
+                )
+                response['Allow'] = ', '.join(methods)
+                return response
+            try:
+                request.user = authenticate(request)
+                request.data = _parse_body(request)
+                return view(request, *args, **kwargs)
+            except ApiError as error:
+                return JsonResponse(
+                    {'detail': error.detail}, status=error.status
+                )
+            except Http404:
+                return JsonResponse({'detail': 'Не найдено.'}, status=404)
+        return wrapper
+    return decorator
@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Token
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Выпускает API-токен пользователю и печатает ключ.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--name', default='', help='Название токена.')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f'Нет пользователя {options["username"]}.')
+        _, key = Token.objects.issue(user, name=options['name'])
+        self.stdout.write(key)
@@ -0,0 +1,48 @@
+import hashlib
+import secrets
+
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+def hash_key(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class TokenManager(models.Manager):
+    def issue(self, user, name=''):
+        """Выпускает токен; сам ключ возвращается только здесь."""
+        key = secrets.token_urlsafe(32)
+        token = self.create(user=user, key_hash=hash_key(key), name=name)
+        return token, key
+
+
+class Token(models.Model):
+    key_hash = models.CharField(
+        max_length=64,
+        unique=True,
+        editable=False,
+        verbose_name='Хеш ключа'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='api_tokens',
+        verbose_name='Пользователь'
+    )
+    name = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Название'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата выпуска'
+    )
+
+    objects = TokenManager()
+
+    def __str__(self):
+        return f'{self.user} {self.name}'.strip()
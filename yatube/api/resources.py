@@ -0,0 +1,146 @@
+"""Сериализация через values(): списки не создают объектов моделей.
+
+Ресурс -- словарь «поле ответа -> поле или выражение запроса».
+Параметр ?fields=a,b сужает выборку до нужных полей, а связанные
+данные (имя автора, slug группы) приходят тем же запросом через JOIN.
+"""
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import F
+
+from posts.utils import FORWARD, decode_cursor, encode_cursor, keyset_filter
+
+from .auth import ApiError
+
+
+def _image_url(name):
+    return default_storage.url(name) if name else None
+
+
+class Resource:
+    def __init__(self, fields, formatters=None):
+        self.fields = fields
+        self.formatters = formatters or {}
+
+    def names(self, request):
+        requested = request.GET.get('fields')
+        if not requested:
+            return list(self.fields)
+        names = [name for name in requested.split(',') if name]
+        unknown = set(names) - set(self.fields)
+        if unknown:
+            raise ApiError(
+                400, f'Неизвестные поля: {", ".join(sorted(unknown))}.'
+            )
+        return names
+
+    def _alias(self, name):
+        # Имена вроде author заняты полями модели, поэтому выражения
+        # выбираются под своими псевдонимами.
+        if self.fields.get(name, name) == name:
+            return name
+        return f'api_{name}'
+
+    def values(self, queryset, names):
+        plain = [name for name in names if self._alias(name) == name]
+        expressions = {
+            self._alias(name): self.fields[name] for name in names
+            if self._alias(name) != name
+        }
+        return queryset.values(*plain, **expressions)
+
+    def format(self, row, names):
+        return {
+            name: self.formatters.get(name, _same)(row[self._alias(name)])
+            for name in names
+        }
+
+    def one(self, request, queryset):
+        names = self.names(request)
+        row = self.values(queryset, names).first()
+        if row is None:
+            raise ApiError(404, 'Не найдено.')
+        return self.format(row, names)
+
+    def page(self, request, queryset, keys):
+        """Страница по курсору из ключей keys (дата, id), новые первыми.
+
+        keys -- обычные поля модели; они выбираются всегда, но в ответ
+        попадают, только если их просили.
+        """
+        names = self.names(request)
+        selected = names + [key for key in keys if key not in names]
+        queryset = self.values(queryset, selected)
+        cursor = decode_cursor(request.GET.get('cursor'))
+        if cursor is not None and cursor[0] == FORWARD:
+            queryset = keyset_filter(queryset, FORWARD, cursor[1], keys)
+        else:
+            queryset = queryset.order_by(f'-{keys[0]}', f'-{keys[1]}')
+        limit = page_size(request)
+        rows = list(queryset[:limit + 1])
+        next_url = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            query = request.GET.copy()
+            query['cursor'] = encode_cursor(
+                FORWARD, (last[keys[0]], last[keys[1]])
+            )
+            next_url = request.build_absolute_uri(
+                f'{request.path}?{query.urlencode()}'
+            )
+        return {
+            'results': [self.format(row, names) for row in rows],
+            'next': next_url,
+        }
+
+
+def _same(value):
+    return value
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError(400, 'limit должен быть числом.')
+    return min(max(size, 1), settings.API_MAX_PAGE_SIZE)
+
+
+POST = Resource(
+    {
+        'id': 'id',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'author': F('author__username'),
+        'group': F('group__slug'),
+        'image': 'image',
+        'comments_count': 'comments_count',
+    },
+    formatters={'image': _image_url},
+)
+
+GROUP = Resource({
+    'slug': 'slug',
+    'title': 'title',
+    'description': 'description',
+    'posts_count': 'posts_count',
+})
+
+COMMENT = Resource({
+    'id': 'id',
+    'post': F('post_id'),
+    'author': F('author__username'),
+    'text': 'text',
+    'created': 'created',
+})
+
+FOLLOWER = Resource({
+    'username': F('user__username'),
+    'created': 'created',
+})
+
+FOLLOWING = Resource({
+    'username': F('author__username'),
+    'created': 'created',
+})
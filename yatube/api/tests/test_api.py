@@ -0,0 +1,186 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import AuthorStats, Comment, Follow, Group, Post
+
+from ..models import Token
+
+User = get_user_model()
+
+
+@override_settings(API_PAGE_SIZE=3)
+class ApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', password='secret-pass'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {i}'
+            )
+            for i in range(5)
+        ]
+        _, cls.author_key = Token.objects.issue(cls.author)
+        _, cls.reader_key = Token.objects.issue(cls.reader)
+
+    def call(self, method, url, key=None, data=None):
+        headers = {}
+        if key is not None:
+            headers['HTTP_AUTHORIZATION'] = f'Token {key}'
+        return getattr(self.client, method)(
+            url,
+            data=json.dumps(data) if data is not None else '',
+            content_type='application/json',
+            **headers,
+        )
+
+    def test_post_list_pages_by_cursor(self):
+        """Список постов листается по курсору в одном запросе к базе."""
+        url = reverse('api:post_list')
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        page = response.json()
+        self.assertEqual(
+            [post['id'] for post in page['results']],
+            [post.pk for post in self.posts[:-4:-1]],
+        )
+        self.assertEqual(page['results'][0]['author'], 'author')
+        self.assertEqual(page['results'][0]['group'], 'group')
+        with self.assertNumQueries(1):
+            page = self.client.get(page['next']).json()
+        self.assertEqual(
+            [post['id'] for post in page['results']],
+            [self.posts[1].pk, self.posts[0].pk],
+        )
+        self.assertIsNone(page['next'])
+
+    def test_query_count_is_constant(self):
+        """Число запросов списка не растёт с числом строк."""
+        url = reverse('api:post_list')
+        with self.assertNumQueries(1):
+            self.client.get(url, {'limit': 1})
+        with self.assertNumQueries(1):
+            self.client.get(url, {'limit': 100})
+
+    def test_sparse_fields(self):
+        """?fields= оставляет в ответе только запрошенные поля."""
+        url = reverse('api:post_list')
+        page = self.client.get(url, {'fields': 'text,author'}).json()
+        self.assertEqual(set(page['results'][0]), {'text', 'author'})
+        self.assertIsNotNone(page['next'])
+        response = self.client.get(url, {'fields': 'password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_token_auth(self):
+        """Запись требует токен, неверный токен -- 401."""
+        url = reverse('api:post_list')
+        self.assertEqual(
+            self.call('post', url, data={'text': 'x'}).status_code, 401
+        )
+        self.assertEqual(
+            self.call('post', url, 'wrong', {'text': 'x'}).status_code, 401
+        )
+        response = self.call('post', reverse('api:token_create'), data={
+            'username': 'author', 'password': 'secret-pass',
+        })
+        self.assertEqual(response.status_code, 201)
+        key = response.json()['token']
+        response = self.call(
+            'post', url, key, {'text': 'Из API', 'group': 'group'}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['group'], 'group')
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).posts_count, 1
+        )
+
+    def test_post_edit_and_delete(self):
+        """Менять и удалять пост может только автор."""
+        post = self.posts[0]
+        url = reverse('api:post_detail', kwargs={'post_id': post.pk})
+        response = self.call('patch', url, self.reader_key, {'text': 'x'})
+        self.assertEqual(response.status_code, 403)
+        response = self.call(
+            'patch', url, self.author_key, {'text': 'Новый', 'group': None}
+        )
+        self.assertEqual(response.json()['text'], 'Новый')
+        self.assertIsNone(response.json()['group'])
+        response = self.call('delete', url, self.author_key)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Post.objects.filter(pk=post.pk).exists())
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_comments(self):
+        """Комментарии создаются и листаются по посту."""
+        post = self.posts[1]
+        url = reverse('api:comment_list', kwargs={'post_id': post.pk})
+        response = self.call('post', url, self.reader_key, {'text': 'Ок'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['author'], 'reader')
+        self.assertEqual(Comment.objects.filter(post=post).count(), 1)
+        page = self.client.get(url).json()
+        self.assertEqual([row['text'] for row in page['results']], ['Ок'])
+        response = self.call('post', url, self.reader_key, {'text': ''})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', response.json()['errors'])
+
+    def test_groups(self):
+        """Группы отдаются списком и по slug."""
+        page = self.client.get(reverse('api:group_list')).json()
+        self.assertEqual(page['results'][0]['slug'], 'group')
+        response = self.client.get(
+            reverse('api:group_detail', kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_bulk_follow_and_status(self):
+        """Подписка на список авторов и проверка состояния разом."""
+        other = User.objects.create_user(username='other')
+        url = reverse('api:follow_change')
+        response = self.call(
+            'post', url, self.reader_key,
+            {'authors': ['author', 'other', 'missing']},
+        )
+        self.assertEqual(response.json(), {'followed': ['author', 'other']})
+        self.assertEqual(Follow.objects.filter(user=self.reader).count(), 2)
+        with self.assertNumQueries(2):
+            status = self.client.get(
+                reverse('api:follow_status'),
+                {'authors': 'author,reader'},
+                HTTP_AUTHORIZATION=f'Token {self.reader_key}',
+            ).json()
+        self.assertEqual(status, {'author': True, 'reader': False})
+        followers = self.client.get(reverse(
+            'api:follower_list', kwargs={'username': 'other'}
+        )).json()
+        self.assertEqual(followers['results'][0]['username'], 'reader')
+        response = self.call(
+            'delete', url, self.reader_key, {'authors': [other.username]}
+        )
+        self.assertEqual(response.json(), {'unfollowed': ['other']})
+
+    def test_method_not_allowed(self):
+        """Неподдерживаемый метод -- 405 с заголовком Allow."""
+        response = self.call('put', reverse('api:post_list'))
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET, POST')
+
+    def test_issue_token_command(self):
+        """Команда выпускает токен, по которому API узнаёт пользователя."""
+        out = StringIO()
+        call_command('issue_api_token', 'reader', stdout=out)
+        key = out.getvalue().strip()
+        response = self.call(
+            'get', reverse('api:follow_status'), key
+        )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,30 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('v1/tokens/', views.token_create, name='token_create'),
+    path('v1/posts/', views.post_list, name='post_list'),
+    path('v1/posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'v1/posts/<int:post_id>/comments/',
+        views.comment_list,
+        name='comment_list'
+    ),
+    path('v1/groups/', views.group_list, name='group_list'),
+    path('v1/groups/<slug:slug>/', views.group_detail, name='group_detail'),
+    path(
+        'v1/users/<str:username>/followers/',
+        views.follower_list,
+        name='follower_list'
+    ),
+    path(
+        'v1/users/<str:username>/following/',
+        views.following_list,
+        name='following_list'
+    ),
+    path('v1/follows/', views.follow_change, name='follow_change'),
+    path('v1/follows/status/', views.follow_status, name='follow_status'),
+]
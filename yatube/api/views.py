@@ -0,0 +1,194 @@
+from django.contrib.auth import authenticate as check_password
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+
+from core import sqlite
+from posts import actions, follows
+from posts.forms import CommentForm, PostForm
+from posts.models import Comment, Follow, Group, Post
+
+from .auth import ApiError, api_view, require_user
+from .models import Token
+from .resources import COMMENT, FOLLOWER, FOLLOWING, GROUP, POST
+
+User = get_user_model()
+
+POST_KEYS = ('pub_date', 'id')
+CREATED_KEYS = ('created', 'id')
+
+
+def _form_error(form):
+    return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+
+
+def _group_id(data):
+    slug = data.get('group')
+    if not slug:
+        return None
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        raise ApiError(400, f'Нет группы {slug}.')
+    return group_id
+
+
+def _usernames(data):
+    authors = data.get('authors')
+    if not isinstance(authors, list) or not all(
+        isinstance(name, str) for name in authors
+    ):
+        raise ApiError(400, 'authors -- список имён пользователей.')
+    return authors
+
+
+def _user_ids(usernames):
+    return dict(
+        User.objects.filter(username__in=set(usernames))
+        .values_list('pk', 'username')
+    )
+
+
+@api_view('POST')
+def token_create(request):
+    user = check_password(
+        request,
+        username=request.data.get('username'),
+        password=request.data.get('password'),
+    )
+    if user is None:
+        raise ApiError(401, 'Неверное имя пользователя или пароль.')
+    _, key = Token.objects.issue(user, name=request.data.get('name', ''))
+    return JsonResponse({'token': key}, status=201)
+
+
+@api_view('GET', 'POST')
+def post_list(request):
+    if request.method == 'POST':
+        require_user(request)
+        form = PostForm({
+            'text': request.data.get('text'),
+            'group': _group_id(request.data),
+        })
+        if not form.is_valid():
+            return _form_error(form)
+        post = form.save(commit=False)
+        post.author = request.user
+        actions.create_post(post)
+        return JsonResponse(
+            POST.one(request, Post.objects.filter(pk=post.pk)), status=201
+        )
+    posts = Post.objects.all()
+    if request.GET.get('group'):
+        posts = posts.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        posts = posts.filter(author__username=request.GET['author'])
+    return JsonResponse(POST.page(request, posts, POST_KEYS))
+
+
+@api_view('GET', 'PATCH', 'DELETE')
+def post_detail(request, post_id):
+    if request.method == 'GET':
+        return JsonResponse(POST.one(request, Post.objects.filter(pk=post_id)))
+    require_user(request)
+    post = get_object_or_404(Post, pk=post_id)
+    if post.author_id != request.user.pk:
+        raise ApiError(403, 'Менять пост может только автор.')
+    if request.method == 'DELETE':
+        actions.delete_post(post)
+        return HttpResponse(status=204)
+    old_group_id = post.group_id
+    form = PostForm({
+        'text': request.data.get('text', post.text),
+        'group': (
+            _group_id(request.data) if 'group' in request.data
+            else post.group_id
+        ),
+    }, instance=post)
+    if not form.is_valid():
+        return _form_error(form)
+    actions.update_post(form.save(commit=False), old_group_id, post.author_id)
+    return JsonResponse(POST.one(request, Post.objects.filter(pk=post_id)))
+
+
+@api_view('GET', 'POST')
+def comment_list(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        raise ApiError(404, 'Не найдено.')
+    if request.method == 'POST':
+        require_user(request)
+        form = CommentForm({'text': request.data.get('text')})
+        if not form.is_valid():
+            return _form_error(form)
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post_id = post_id
+        sqlite.write(actions.create_comment, comment)
+        return JsonResponse(
+            COMMENT.one(request, Comment.objects.filter(pk=comment.pk)),
+            status=201,
+        )
+    comments = Comment.objects.filter(post_id=post_id)
+    return JsonResponse(COMMENT.page(request, comments, CREATED_KEYS))
+
+
+@api_view('GET')
+def group_list(request):
+    names = GROUP.names(request)
+    groups = GROUP.values(Group.objects.order_by('title'), names)
+    return JsonResponse({
+        'results': [GROUP.format(row, names) for row in groups],
+    })
+
+
+@api_view('GET')
+def group_detail(request, slug):
+    return JsonResponse(GROUP.one(request, Group.objects.filter(slug=slug)))
+
+
+def _user_id(username):
+    user_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if user_id is None:
+        raise ApiError(404, 'Не найдено.')
+    return user_id
+
+
+@api_view('GET')
+def follower_list(request, username):
+    rows = Follow.objects.filter(author_id=_user_id(username))
+    return JsonResponse(FOLLOWER.page(request, rows, CREATED_KEYS))
+
+
+@api_view('GET')
+def following_list(request, username):
+    rows = Follow.objects.filter(user_id=_user_id(username))
+    return JsonResponse(FOLLOWING.page(request, rows, CREATED_KEYS))
+
+
+@api_view('POST', 'DELETE')
+def follow_change(request):
+    """Подписка (POST) и отписка (DELETE) на список authors разом."""
+    require_user(request)
+    users = _user_ids(_usernames(request.data))
+    service = follows.follow if request.method == 'POST' else follows.unfollow
+    changed = sqlite.write(service, request.user.pk, users)
+    key = 'followed' if request.method == 'POST' else 'unfollowed'
+    return JsonResponse({key: sorted(users[pk] for pk in changed)})
+
+
+@api_view('GET')
+def follow_status(request):
+    """Подписан ли пользователь на каждого из ?authors=a,b,c."""
+    require_user(request)
+    usernames = [
+        name for name in request.GET.get('authors', '').split(',') if name
+    ]
+    followed = set(
+        Follow.objects.filter(
+            user=request.user, author__username__in=usernames
+        ).values_list('author__username', flat=True)
+    )
+    return JsonResponse({name: name in followed for name in usernames})
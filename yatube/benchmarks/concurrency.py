@@ -0,0 +1,113 @@
+"""Конкурентные чтения и записи в одной базе.
+
+Потоки читателей выбирают первую страницу ленты, потоки писателей
+добавляют комментарии тем же путём, что и add_comment. Прогон в
+обычном режиме SQLite сравнивается с SQLITE_PRODUCTION_MODE.
+"""
+import random
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection, connections
+from django.test.utils import override_settings
+
+from core import sqlite
+from posts import actions
+from posts.models import Comment, Post
+
+from .runner import percentile
+
+User = get_user_model()
+
+
+def read_feed():
+    list(Post.objects.select_related('author', 'group').order_by(
+        '-pub_date', '-pk'
+    )[:10])
+
+
+def _save_comment(post_id, author_id):
+    actions.create_comment(
+        Comment(post_id=post_id, author_id=author_id, text='Комментарий')
+    )
+
+
+class Worker(threading.Thread):
+    def __init__(self, action, deadline):
+        super().__init__(daemon=True)
+        self.action = action
+        self.deadline = deadline
+        self.timings = []
+        self.errors = 0
+
+    def run(self):
+        try:
+            while time.perf_counter() < self.deadline:
+                started = time.perf_counter()
+                try:
+                    self.action()
+                except OperationalError:
+                    self.errors += 1
+                    continue
+                self.timings.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+
+
+def _summary(workers, elapsed):
+    timings = [timing for worker in workers for timing in worker.timings]
+    result = {
+        'ops': len(timings),
+        'ops_per_s': round(len(timings) / elapsed, 1),
+        'errors': sum(worker.errors for worker in workers),
+        'p50_ms': None,
+        'p99_ms': None,
+    }
+    if timings:
+        result['p50_ms'] = round(percentile(timings, 50) * 1000, 3)
+        result['p99_ms'] = round(percentile(timings, 99) * 1000, 3)
+    return result
+
+
+def run_mode(production, readers, writers, duration, seed=1):
+    """Один прогон: readers и writers потоков в течение duration секунд."""
+    connections.close_all()
+    with override_settings(SQLITE_PRODUCTION_MODE=production):
+        if not production and connection.vendor == 'sqlite':
+            # WAL запоминается в файле базы, обычный режим -- откатить.
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode = DELETE')
+        post_ids = list(Post.objects.values_list('pk', flat=True))
+        user_ids = list(User.objects.values_list('pk', flat=True))
+        connections.close_all()
+        generator = random.Random(seed)
+        jobs = [
+            (generator.choice(post_ids), generator.choice(user_ids))
+            for _ in range(1000)
+        ]
+
+        def write():
+            sqlite.write(_save_comment, *generator.choice(jobs))
+
+        deadline = time.perf_counter() + duration
+        reading = [Worker(read_feed, deadline) for _ in range(readers)]
+        writing = [Worker(write, deadline) for _ in range(writers)]
+        started = time.perf_counter()
+        for worker in reading + writing:
+            worker.start()
+        for worker in reading + writing:
+            worker.join()
+        elapsed = time.perf_counter() - started
+    connections.close_all()
+    return {
+        'reads': _summary(reading, elapsed),
+        'writes': _summary(writing, elapsed),
+    }
+
+
+def run(readers, writers, duration, seed=1):
+    return {
+        mode: run_mode(mode == 'production', readers, writers, duration, seed)
+        for mode in ('default', 'production')
+    }
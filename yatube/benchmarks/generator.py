@@ -0,0 +1,142 @@
+"""Детерминированный генератор данных для бенчмарков.
+
+Одинаковые масштаб и seed дают одинаковые тексты, даты и связи,
+поэтому замеры разных коммитов сравнимы. Пользователи и группы
+собираются mixer, посты, комментарии и подписки -- напрямую, иначе
+миллион объектов строился бы слишком долго.
+"""
+import random
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from posts import counters, search, timeline
+from posts.models import Comment, Follow, Group, Post
+from posts.transfer import manual_dates
+
+User = get_user_model()
+
+BATCH_SIZE = 5000
+PASSWORD = 'benchmark'
+READER = 'reader'
+START = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+def _batched(model, objects):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            batch = []
+    model.objects.bulk_create(batch)
+
+
+def author_name(index):
+    return f'author-{index}'
+
+
+def group_slug(index):
+    return f'group-{index}'
+
+
+def generate(scale, seed=1, log=None):
+    """Наполняет пустую базу данными масштаба scale."""
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    mixer = Mixer(commit=False, locale='ru')
+    mixer.faker.seed_instance(seed)
+    faker = mixer.faker
+    password = make_password(PASSWORD)
+
+    with transaction.atomic():
+        log(f'users: {scale.users}')
+        User.objects.bulk_create(
+            [
+                mixer.blend(
+                    User,
+                    username=author_name(index),
+                    password=password,
+                    first_name=faker.first_name(),
+                    last_name=faker.last_name(),
+                )
+                for index in range(scale.users)
+            ]
+            + [mixer.blend(User, username=READER, password=password)],
+            batch_size=BATCH_SIZE,
+        )
+        Group.objects.bulk_create([
+            mixer.blend(
+                Group,
+                title=faker.sentence(nb_words=3)[:200],
+                slug=group_slug(index),
+                description=faker.paragraph(),
+            )
+            for index in range(scale.groups)
+        ])
+        user_ids = list(
+            User.objects.exclude(username=READER).order_by('pk').values_list(
+                'pk', flat=True
+            )
+        )
+        group_ids = list(
+            Group.objects.order_by('pk').values_list('pk', flat=True)
+        )
+
+        log(f'posts: {scale.posts}')
+        with manual_dates(Post._meta.get_field('pub_date')):
+            _batched(Post, (
+                Post(
+                    text=faker.paragraph(nb_sentences=rng.randint(1, 6)),
+                    author_id=user_ids[
+                        (int(rng.paretovariate(1.2)) - 1) % len(user_ids)
+                    ],
+                    group_id=(
+                        rng.choice(group_ids) if rng.random() < 0.7 else None
+                    ),
+                    pub_date=START + timedelta(minutes=index),
+                )
+                for index in range(scale.posts)
+            ))
+
+        log(f'comments: {scale.comments_per_post} per post')
+        post_ids = Post.objects.order_by('pk').values_list('pk', 'pub_date')
+        with manual_dates(Comment._meta.get_field('created')):
+            _batched(Comment, (
+                Comment(
+                    post_id=post_id,
+                    author_id=rng.choice(user_ids),
+                    text=faker.sentence(),
+                    created=pub_date + timedelta(seconds=number + 1),
+                )
+                for post_id, pub_date in post_ids.iterator()
+                for number in range(scale.comments_per_post)
+            ))
+
+        log(f'follows: {scale.follows_per_user} per user')
+        reader_id = User.objects.get(username=READER).pk
+        _batched(Follow, (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id in user_ids
+            for author_id in rng.sample(
+                user_ids, min(scale.follows_per_user, len(user_ids))
+            )
+            if author_id != user_id
+        ))
+        _batched(Follow, (
+            Follow(user_id=reader_id, author_id=author_id)
+            for author_id in user_ids[:scale.reader_follows]
+        ))
+
+    log('counters, search index, timelines')
+    counters.reconcile()
+    index = search.get_index()
+    index.create()
+    index.rebuild()
+    if timeline.is_enabled():
+        for user in User.objects.iterator():
+            timeline.rebuild(user)
@@ -0,0 +1,99 @@
+import json
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from benchmarks import generator, runner
+from benchmarks.scenarios import SCALES, SCENARIOS
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку и пропускную способность публичных страниц '
+        'на сгенерированных данных в отдельной базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            choices=sorted(SCALES),
+            default='tiny',
+            help='Объём данных.',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--driver',
+            choices=sorted(runner.DRIVERS),
+            default='wsgi',
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=[scenario.name for scenario in SCENARIOS],
+            help='Запустить только эти сценарии.',
+        )
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Заменить кеш на DummyCache и мерить холодные страницы.',
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Не удалять базу с данными, чтобы не генерировать заново.',
+        )
+        parser.add_argument('--output', help='Куда записать JSON.')
+
+    def handle(self, *args, **options):
+        scale = SCALES[options['scale']]
+        name = f'benchmark_{options["scale"]}_{options["seed"]}'
+        with runner.benchmark_database(name, options['keepdb']):
+            if not Post.objects.exists():
+                generator.generate(
+                    scale, options['seed'], log=self.stdout.write
+                )
+            result = self.run(options)
+        for name, stats in result['scenarios'].items():
+            self.stdout.write(
+                f'{name:<14} {stats["rps"]:>8} rps  '
+                f'p50 {stats["p50_ms"]:>8} ms  p95 {stats["p95_ms"]:>8} ms  '
+                f'p99 {stats["p99_ms"]:>8} ms  queries {stats["queries"]}'
+            )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(result, output, indent=2)
+
+    def run(self, options):
+        # Свой префикс, чтобы фрагменты тестовой базы не смешались
+        # с закешированными страницами рабочей.
+        cache_settings = dict(
+            settings.CACHES['default'], KEY_PREFIX=f'benchmark-{uuid4().hex}'
+        )
+        if options['no_cache']:
+            cache_settings = {
+                'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+            }
+        overrides = {
+            'CACHES': {'default': cache_settings},
+            'INSTRUMENTATION_SAMPLE_RATE': 0,
+            'TASKS_EAGER': True,
+        }
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if not options['scenario'] or scenario.name in options['scenario']
+        ]
+        with override_settings(**overrides):
+            return runner.run(
+                scenarios,
+                options['driver'],
+                options['requests'],
+                options['warmup'],
+                scale=options['scale'],
+                seed=options['seed'],
+                cache=not options['no_cache'],
+            )
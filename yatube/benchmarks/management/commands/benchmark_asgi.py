@@ -0,0 +1,96 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from benchmarks import generator, runner, slow_clients
+from benchmarks.scenarios import SCALES
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает задержку быстрых запросов рядом с медленными '
+        'загрузками: поток на запрос (WSGI) против yatube.asgi при '
+        'разных размерах пула потоков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            choices=sorted(SCALES),
+            default='tiny',
+            help='Объём данных.',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--limits',
+            default='2,4,8',
+            help='Размеры пула потоков через запятую.',
+        )
+        parser.add_argument('--fast', type=int, default=8)
+        parser.add_argument('--slow', type=int, default=8)
+        parser.add_argument(
+            '--chunks',
+            type=int,
+            default=10,
+            help='Частей в теле медленного запроса.',
+        )
+        parser.add_argument(
+            '--chunk-delay',
+            type=float,
+            default=0.05,
+            help='Пауза перед каждой частью, секунд.',
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=5,
+            help='Длительность прогона каждого режима, секунд.',
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Не удалять базу с данными, чтобы не генерировать заново.',
+        )
+        parser.add_argument('--output', help='Куда записать JSON.')
+
+    def handle(self, *args, **options):
+        limits = [int(limit) for limit in options['limits'].split(',')]
+        name = f'benchmark_asgi_{options["scale"]}_{options["seed"]}'
+        with runner.benchmark_database(name, options['keepdb']):
+            if not Post.objects.exists():
+                generator.generate(
+                    SCALES[options['scale']],
+                    options['seed'],
+                    log=self.stdout.write,
+                )
+            # Без кеша страниц: каждый быстрый запрос доходит до Django.
+            with override_settings(
+                CACHES={'default': {
+                    'BACKEND':
+                        'django.core.cache.backends.locmem.LocMemCache',
+                }},
+                PAGE_CACHE_ENABLED=False,
+                INSTRUMENTATION_SAMPLE_RATE=0,
+            ):
+                result = slow_clients.run(
+                    limits,
+                    options['fast'],
+                    options['slow'],
+                    options['duration'],
+                    options['chunks'],
+                    options['chunk_delay'],
+                    options['seed'],
+                )
+        for mode, stats in result.items():
+            for kind in ('fast', 'slow'):
+                row = stats[kind]
+                self.stdout.write(
+                    f'{mode:<8} {kind:<5} {row["ops_per_s"]:>9} ops/s  '
+                    f'p50 {row["p50_ms"]} ms  p99 {row["p99_ms"]} ms  '
+                    f'errors {row["errors"]}'
+                )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(result, output, indent=2)
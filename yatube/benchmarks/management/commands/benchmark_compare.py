@@ -0,0 +1,36 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import runner
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает два JSON-результата benchmark и ищет регрессии.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('baseline')
+        parser.add_argument('current')
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.1,
+            help='Допустимое ухудшение времени и rps, доля (0.1 = 10%%).',
+        )
+
+    def handle(self, *args, **options):
+        with open(options['baseline']) as baseline_file:
+            baseline = json.load(baseline_file)
+        with open(options['current']) as current_file:
+            current = json.load(current_file)
+        rows = runner.compare(baseline, current, options['threshold'])
+        regressions = 0
+        for name, metric, before, after, change, regression in rows:
+            regressions += regression
+            mark = 'РЕГРЕССИЯ' if regression else ''
+            self.stdout.write(
+                f'{name:<14} {metric:<8} {before:>10} -> {after:>10} '
+                f'{change:+.1%} {mark}'
+            )
+        if regressions:
+            raise CommandError(f'Найдено регрессий: {regressions}')
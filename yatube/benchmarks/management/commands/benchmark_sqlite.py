@@ -0,0 +1,76 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from benchmarks import concurrency, generator, runner
+from benchmarks.scenarios import SCALES
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность конкурентных чтений и записей '
+        'в обычном режиме SQLite и в SQLITE_PRODUCTION_MODE.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            choices=sorted(SCALES),
+            default='tiny',
+            help='Объём данных.',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10,
+            help='Длительность прогона каждого режима, секунд.',
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Не удалять базу с данными, чтобы не генерировать заново.',
+        )
+        parser.add_argument('--output', help='Куда записать JSON.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Замер имеет смысл только для SQLite.')
+        name = f'benchmark_sqlite_{options["scale"]}_{options["seed"]}'
+        with runner.benchmark_database(name, options['keepdb']):
+            if not Post.objects.exists():
+                generator.generate(
+                    SCALES[options['scale']],
+                    options['seed'],
+                    log=self.stdout.write,
+                )
+            # Локальный кеш, чтобы замер не упирался в файловый.
+            with override_settings(
+                CACHES={'default': {
+                    'BACKEND':
+                        'django.core.cache.backends.locmem.LocMemCache',
+                }},
+                INSTRUMENTATION_SAMPLE_RATE=0,
+            ):
+                result = concurrency.run(
+                    options['readers'],
+                    options['writers'],
+                    options['duration'],
+                    options['seed'],
+                )
+        for mode, stats in result.items():
+            for kind in ('reads', 'writes'):
+                row = stats[kind]
+                self.stdout.write(
+                    f'{mode:<11} {kind:<7} {row["ops_per_s"]:>9} ops/s  '
+                    f'p50 {row["p50_ms"]} ms  p99 {row["p99_ms"]} ms  '
+                    f'errors {row["errors"]}'
+                )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(result, output, indent=2)
@@ -0,0 +1,201 @@
+import os
+import platform
+import subprocess
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from io import BytesIO
+from urllib.parse import urlsplit
+from wsgiref.util import setup_testing_defaults
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import Client
+
+from core.instrumentation import Recorder
+
+User = get_user_model()
+
+
+class ClientDriver:
+    """Запросы через django.test.Client: просто, но с его накладными."""
+
+    name = 'client'
+
+    def __init__(self, login=None):
+        self.client = Client()
+        if login is not None:
+            self.client.force_login(User.objects.get(username=login))
+
+    def get(self, url):
+        return self.client.get(url).status_code
+
+
+class WSGIDriver:
+    """Запросы прямо в WSGI-приложение, как их передаёт сервер."""
+
+    name = 'wsgi'
+
+    def __init__(self, login=None):
+        self.application = get_wsgi_application()
+        self.cookies = ''
+        if login is not None:
+            client = Client()
+            client.force_login(User.objects.get(username=login))
+            self.cookies = '; '.join(
+                f'{name}={morsel.value}'
+                for name, morsel in client.cookies.items()
+            )
+
+    def get(self, url):
+        parts = urlsplit(url)
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': parts.path,
+            'QUERY_STRING': parts.query,
+            'HTTP_COOKIE': self.cookies,
+            'wsgi.input': BytesIO(),
+        }
+        setup_testing_defaults(environ)
+        statuses = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(status)
+
+        body = self.application(environ, start_response)
+        try:
+            for _ in body:
+                pass
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        return int(statuses[0].split()[0])
+
+
+DRIVERS = {driver.name: driver for driver in (ClientDriver, WSGIDriver)}
+
+
+@contextmanager
+def benchmark_database(name, keepdb=False):
+    """Отдельная база для замеров; рабочая остаётся нетронутой."""
+    if connection.vendor == 'sqlite':
+        name = os.path.join(settings.BASE_DIR, f'{name}.sqlite3')
+    connection.settings_dict.setdefault('TEST', {})['NAME'] = name
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False, keepdb=keepdb
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(
+            old_name, verbosity=0, keepdb=keepdb
+        )
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(round(len(ordered) * percent / 100) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def run_scenario(scenario, driver_class, requests, warmup=0):
+    url = scenario.url()
+    driver = driver_class(scenario.login)
+    for _ in range(warmup):
+        driver.get(url)
+    timings = []
+    queries = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        with Recorder().activate() as recorder:
+            request_started = time.perf_counter()
+            status = driver.get(url)
+            timings.append(time.perf_counter() - request_started)
+        queries.append(recorder.queries)
+        errors += status != 200
+    elapsed = time.perf_counter() - started
+    return {
+        'url': url,
+        'requests': requests,
+        'errors': errors,
+        'rps': round(requests / elapsed, 1),
+        'mean_ms': round(sum(timings) / requests * 1000, 3),
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'p99_ms': round(percentile(timings, 99) * 1000, 3),
+        'max_ms': round(max(timings) * 1000, 3),
+        'queries': max(queries),
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scenarios, driver_name, requests, warmup=0, **meta):
+    """Прогоняет сценарии и возвращает результат для сохранения в JSON."""
+    driver_class = DRIVERS[driver_name]
+    return {
+        'meta': dict(
+            meta,
+            commit=current_commit(),
+            driver=driver_name,
+            database=connection.vendor,
+            django=django.get_version(),
+            python=platform.python_version(),
+            created=datetime.now().isoformat(timespec='seconds'),
+        ),
+        'scenarios': {
+            scenario.name: run_scenario(
+                scenario, driver_class, requests, warmup
+            )
+            for scenario in scenarios
+        },
+    }
+
+
+# Метрика -> True, если рост значения -- это ухудшение.
+COMPARED = {
+    'p50_ms': True,
+    'p95_ms': True,
+    'rps': False,
+    'queries': True,
+}
+
+
+def compare(baseline, current, threshold=0.1):
+    """Сравнивает два прогона по сценариям.
+
+    Возвращает строки (сценарий, метрика, было, стало, изменение,
+    регрессия). Любой лишний SQL-запрос -- регрессия, для времени и
+    пропускной способности допускается отклонение threshold.
+    """
+    rows = []
+    for name, result in current['scenarios'].items():
+        base = baseline['scenarios'].get(name)
+        if base is None:
+            continue
+        for metric, higher_is_worse in COMPARED.items():
+            before, after = base[metric], result[metric]
+            change = (after - before) / before if before else 0
+            worse = change if higher_is_worse else -change
+            if metric == 'queries':
+                regression = after > before
+            else:
+                regression = worse > threshold
+            rows.append((name, metric, before, after, change, regression))
+    return rows
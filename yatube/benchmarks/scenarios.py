@@ -0,0 +1,73 @@
+from collections import namedtuple
+
+from django.urls import reverse
+
+from posts.models import Post
+
+from .generator import READER, author_name, group_slug
+
+Scale = namedtuple('Scale', (
+    'users',
+    'groups',
+    'posts',
+    'comments_per_post',
+    'follows_per_user',
+    'reader_follows',
+))
+
+SCALES = {
+    'tiny': Scale(
+        users=50, groups=5, posts=1000,
+        comments_per_post=2, follows_per_user=10, reader_follows=20,
+    ),
+    '10k': Scale(
+        users=1000, groups=20, posts=10_000,
+        comments_per_post=3, follows_per_user=50, reader_follows=200,
+    ),
+    '1m': Scale(
+        users=20_000, groups=200, posts=1_000_000,
+        comments_per_post=1, follows_per_user=100, reader_follows=500,
+    ),
+    'wide-follow': Scale(
+        users=6000, groups=20, posts=100_000,
+        comments_per_post=1, follows_per_user=20, reader_follows=5000,
+    ),
+}
+
+# login -- имя пользователя, от которого идёт запрос, или None.
+Scenario = namedtuple('Scenario', ('name', 'url', 'login'))
+
+
+def busiest_post():
+    return Post.objects.order_by('-comments_count', 'pk').values_list(
+        'pk', flat=True
+    ).first()
+
+
+SCENARIOS = (
+    Scenario(
+        'index',
+        lambda: reverse('posts:home_page'),
+        None,
+    ),
+    Scenario(
+        'group_posts',
+        lambda: reverse('posts:group_posts', args=[group_slug(0)]),
+        None,
+    ),
+    Scenario(
+        'profile',
+        lambda: reverse('posts:profile', args=[author_name(0)]),
+        None,
+    ),
+    Scenario(
+        'follow_index',
+        lambda: reverse('posts:follow_index'),
+        READER,
+    ),
+    Scenario(
+        'post_detail',
+        lambda: reverse('posts:post_detail', args=[busiest_post()]),
+        None,
+    ),
+)
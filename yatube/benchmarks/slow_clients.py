@@ -0,0 +1,198 @@
+"""Медленные клиенты: поток на запрос (WSGI) против ASGI.
+
+Медленный клиент загружает тело запроса (в API, без CSRF) частями
+с паузами, как картинку по плохой сети; быстрые открывают профили
+авторов. Под WSGI поток сервера занят, пока тело не дочитано, и при
+пуле из N потоков N медленных клиентов задерживают всех остальных.
+Под ASGI тело дочитывается в цикле событий, а поток занят только
+работой Django.
+"""
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.test.utils import override_settings
+
+from core import asgi
+
+from .runner import percentile
+
+User = get_user_model()
+
+SLOW_PATH = '/api/v1/tokens/'
+
+
+def _scope(path, method):
+    return {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': b'',
+        'headers': [],
+        'server': ('testserver', 80),
+    }
+
+
+def _summary(timings, errors, elapsed):
+    result = {
+        'ops': len(timings),
+        'ops_per_s': round(len(timings) / elapsed, 1),
+        'errors': errors,
+        'p50_ms': None,
+        'p99_ms': None,
+    }
+    if timings:
+        result['p50_ms'] = round(percentile(timings, 50) * 1000, 3)
+        result['p99_ms'] = round(percentile(timings, 99) * 1000, 3)
+    return result
+
+
+class Load:
+    def __init__(self, paths, fast, slow, duration, chunks, chunk_delay):
+        self.paths = paths
+        self.fast = fast
+        self.slow = slow
+        self.duration = duration
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+        self.body = b'x' * 1024
+
+    def result(self, timings, errors, elapsed):
+        return {
+            kind: _summary(timings[kind], errors[kind], elapsed)
+            for kind in ('fast', 'slow')
+        }
+
+
+def run_wsgi(load, threads, seed):
+    """Пул из threads потоков; поток сам дочитывает тело запроса."""
+    handler = WSGIHandler()
+    timings = {'fast': [], 'slow': []}
+    errors = {'fast': 0, 'slow': 0}
+    lock = threading.Lock()
+
+    def serve(path, method, chunks):
+        for _ in range(chunks):
+            time.sleep(load.chunk_delay)
+        body = load.body * chunks
+        environ = asgi.build_environ(_scope(path, method), BytesIO(body))
+        environ['CONTENT_LENGTH'] = str(len(body))
+        statuses = []
+        try:
+            response = handler(
+                environ, lambda status, headers: statuses.append(status)
+            )
+            b''.join(response)
+            response.close()
+        finally:
+            connections.close_all()
+        return int(statuses[0].split()[0])
+
+    def client(kind, generator, deadline, executor):
+        while time.perf_counter() < deadline:
+            if kind == 'fast':
+                job = (generator.choice(load.paths), 'GET', 0)
+            else:
+                job = (SLOW_PATH, 'POST', load.chunks)
+            started = time.perf_counter()
+            status = executor.submit(serve, *job).result()
+            with lock:
+                if status >= 500:
+                    errors[kind] += 1
+                else:
+                    timings[kind].append(time.perf_counter() - started)
+
+    generator = random.Random(seed)
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        deadline = time.perf_counter() + load.duration
+        clients = [
+            threading.Thread(target=client, args=(
+                kind, random.Random(generator.random()), deadline, executor
+            ))
+            for kind, count in (('fast', load.fast), ('slow', load.slow))
+            for _ in range(count)
+        ]
+        started = time.perf_counter()
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    return load.result(timings, errors, elapsed)
+
+
+def run_asgi(load, threads, seed):
+    """core.asgi.DjangoApp с ASGI_THREADS = threads."""
+    timings = {'fast': [], 'slow': []}
+    errors = {'fast': 0, 'slow': 0}
+
+    async def request(app, path, method, chunks):
+        parts = [load.body] * chunks or [b'']
+        statuses = []
+
+        async def receive():
+            if chunks:
+                await asyncio.sleep(load.chunk_delay)
+            body = parts.pop(0)
+            return {
+                'type': 'http.request', 'body': body, 'more_body': bool(parts),
+            }
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+
+        await app(_scope(path, method), receive, send)
+        return statuses[0]
+
+    async def client(app, kind, generator, deadline):
+        while time.perf_counter() < deadline:
+            if kind == 'fast':
+                job = (generator.choice(load.paths), 'GET', 0)
+            else:
+                job = (SLOW_PATH, 'POST', load.chunks)
+            started = time.perf_counter()
+            status = await request(app, *job)
+            if status >= 500:
+                errors[kind] += 1
+            else:
+                timings[kind].append(time.perf_counter() - started)
+
+    async def main():
+        app = asgi.DjangoApp()
+        generator = random.Random(seed)
+        deadline = time.perf_counter() + load.duration
+        await asyncio.gather(*[
+            client(app, kind, random.Random(generator.random()), deadline)
+            for kind, count in (('fast', load.fast), ('slow', load.slow))
+            for _ in range(count)
+        ])
+
+    with override_settings(ASGI_THREADS=threads, ASGI_DB_THREADS=threads):
+        asgi.shutdown()
+        started = time.perf_counter()
+        asyncio.run(main())
+        elapsed = time.perf_counter() - started
+        asgi.shutdown()
+    return load.result(timings, errors, elapsed)
+
+
+def run(limits, fast, slow, duration, chunks=10, chunk_delay=0.05, seed=1):
+    """Оба сервера при каждом размере пула из limits."""
+    usernames = list(User.objects.values_list('username', flat=True)[:50])
+    load = Load(
+        [f'/profile/{username}/' for username in usernames],
+        fast, slow, duration, chunks, chunk_delay,
+    )
+    connections.close_all()
+    result = {}
+    for threads in limits:
+        result[f'wsgi-{threads}'] = run_wsgi(load, threads, seed)
+        result[f'asgi-{threads}'] = run_asgi(load, threads, seed)
+    return result
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Group, Post
+
+from .. import generator, runner
+from ..scenarios import SCENARIOS, Scale
+
+User = get_user_model()
+
+SCALE = Scale(
+    users=6, groups=2, posts=40,
+    comments_per_post=1, follows_per_user=2, reader_follows=3,
+)
+
+
+def snapshot():
+    return list(Post.objects.order_by('pk').values_list(
+        'text', 'author__username', 'group__slug', 'pub_date'
+    ))
+
+
+class GeneratorTest(TestCase):
+    def test_generate_is_deterministic(self):
+        """Один и тот же seed даёт одинаковые данные."""
+        generator.generate(SCALE, seed=7)
+        self.assertEqual(Post.objects.count(), SCALE.posts)
+        self.assertEqual(Comment.objects.count(), SCALE.posts)
+        self.assertEqual(Group.objects.count(), SCALE.groups)
+        self.assertEqual(
+            Follow.objects.filter(user__username=generator.READER).count(),
+            SCALE.reader_follows,
+        )
+        first = snapshot()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        generator.generate(SCALE, seed=7)
+        self.assertEqual(snapshot(), first)
+
+
+class RunnerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        generator.generate(SCALE)
+
+    def test_scenarios_on_both_drivers(self):
+        """Все сценарии отвечают 200 через оба драйвера."""
+        for driver in runner.DRIVERS:
+            with self.subTest(driver=driver):
+                result = runner.run(SCENARIOS, driver, requests=3)
+                self.assertEqual(result['meta']['driver'], driver)
+                for name, stats in result['scenarios'].items():
+                    self.assertEqual(stats['errors'], 0, name)
+                    self.assertGreater(stats['rps'], 0)
+                    self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+
+    def test_compare_flags_regressions(self):
+        """Сравнение отмечает рост запросов и времени сверх порога."""
+        stats = {'p50_ms': 10, 'p95_ms': 20, 'rps': 100, 'queries': 2}
+        baseline = {'scenarios': {'index': stats}}
+        current = {'scenarios': {'index': dict(
+            stats, p50_ms=10.5, p95_ms=30, queries=3
+        )}}
+        regressions = {
+            row[1] for row in runner.compare(baseline, current, 0.1)
+            if row[5]
+        }
+        self.assertEqual(regressions, {'p95_ms', 'queries'})
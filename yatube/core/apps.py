@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .db_pool import check_connections
+        from .sqlite import configure
+        connection_created.connect(configure)
+        request_started.connect(check_connections)
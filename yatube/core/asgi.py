@@ -0,0 +1,247 @@
+"""ASGI для Django 2.2: цикл событий снаружи, Django в пуле потоков.
+
+Django 2.2 синхронный, поэтому обработчик запроса (middleware и
+представление) выполняется в пуле из ASGI_THREADS потоков. Всё, что
+зависит от скорости клиента, остаётся в цикле событий: тело запроса
+дочитывается до занятия потока, ответ отправляется после его
+освобождения. Медленная загрузка картинки больше не держит поток.
+
+Представления с асинхронным вариантом (async_variant) под ASGI
+выполняют корутину в цикле: независимые запросы к базе идут
+параллельно в отдельном пуле из ASGI_DB_THREADS потоков. Поток пула
+получает контекст запроса -- выбор реплики и замеры instrumentation.
+"""
+import asyncio
+import contextvars
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+
+from . import instrumentation
+
+_local = threading.local()
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _executor(setting):
+    with _executors_lock:
+        if setting not in _executors:
+            _executors[setting] = ThreadPoolExecutor(
+                max_workers=getattr(settings, setting),
+                thread_name_prefix=setting.lower(),
+            )
+        return _executors[setting]
+
+
+def shutdown():
+    """Останавливает пулы: следующий вызов создаст их с новым размером."""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=True)
+
+
+def _call(func, *args):
+    recorder = instrumentation.current_recorder()
+    try:
+        if recorder is None:
+            return func(*args)
+        # Соединения этого потока Recorder.activate не видел.
+        with recorder.watch():
+            return func(*args)
+    finally:
+        connections.close_all()
+
+
+async def sync_to_thread(func, *args):
+    """Выполняет синхронный код с ORM в пуле ASGI_DB_THREADS.
+
+    Как asyncio.to_thread, переносит в поток контекстные переменные.
+    """
+    loop = asyncio.get_event_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _executor('ASGI_DB_THREADS'), context.run, _call, func, *args
+    )
+
+
+def async_variant(coroutine_function):
+    """Под ASGI выполняет вместо представления его корутину-вариант.
+
+    Под WSGI и в тестах вызывается обычное представление.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            loop = getattr(_local, 'loop', None)
+            if loop is None:
+                return view(request, *args, **kwargs)
+            # Пользователь и сессия загружаются здесь, а не в цикле.
+            request.user.pk
+            return asyncio.run_coroutine_threadsafe(
+                coroutine_function(request, *args, **kwargs), loop
+            ).result()
+        return wrapper
+    return decorator
+
+
+def build_environ(scope, body):
+    script_name = scope.get('root_path', '')
+    path = scope['path']
+    if script_name and path.startswith(script_name):
+        path = path[len(script_name):]
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': script_name,
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_LENGTH', 'CONTENT_TYPE'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
+
+
+class DjangoApp:
+    """Сайт целиком: WSGI-обработчик Django в пуле ASGI_THREADS."""
+
+    def __init__(self):
+        self.handler = WSGIHandler()
+
+    async def __call__(self, scope, receive, send):
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_event_loop()
+        executor = _executor('ASGI_THREADS')
+        environ = build_environ(scope, body)
+        # Тело уже прочитано целиком, в том числе без Content-Length.
+        environ['CONTENT_LENGTH'] = str(body.seek(0, 2))
+        body.seek(0)
+        try:
+            status, headers, response = await loop.run_in_executor(
+                executor, self.respond, environ, loop
+            )
+        finally:
+            body.close()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers,
+        })
+        if isinstance(response, list):
+            for chunk in response:
+                await self.send_chunk(send, chunk)
+        else:
+            async for chunk in self.stream(response, loop, executor):
+                await self.send_chunk(send, chunk)
+        await send({'type': 'http.response.body', 'body': b''})
+
+    @staticmethod
+    async def send_chunk(send, chunk):
+        await send({
+            'type': 'http.response.body',
+            'body': chunk,
+            'more_body': True,
+        })
+
+    @staticmethod
+    async def stream(response, loop, executor):
+        """Потоковый ответ (файлы): каждая часть читается в пуле."""
+        iterator = iter(response)
+        try:
+            while True:
+                chunk = await loop.run_in_executor(
+                    executor, next, iterator, None
+                )
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            await loop.run_in_executor(executor, response.close)
+
+    @staticmethod
+    async def read_body(receive):
+        """Тело запроса -- в памяти или во временном файле; None, если
+        клиент ушёл, не дослав его."""
+        body = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+        body.seek(0)
+        return body
+
+    def respond(self, environ, loop):
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        _local.loop = loop
+        try:
+            response = self.handler(environ, start_response)
+            if getattr(response, 'streaming', False):
+                return started['status'], started['headers'], response
+            try:
+                chunks = [chunk for chunk in response if chunk]
+            finally:
+                response.close()
+        finally:
+            _local.loop = None
+        return started['status'], started['headers'], chunks
+
+
+class Router:
+    """Потоки живых обновлений -- по префиксу, остальное -- Django."""
+
+    def __init__(self, live, django):
+        self.live = live
+        self.django = django
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.live(scope, receive, send)
+        if scope['type'] == 'http' and scope['path'].startswith(
+            settings.LIVE_URL_PREFIX
+        ):
+            return await self.live(scope, receive, send)
+        if scope['type'] != 'http':
+            return None
+        return await self.django(scope, receive, send)
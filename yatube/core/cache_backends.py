@@ -0,0 +1,165 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from uuid import uuid4
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+
+class TwoTierCache(BaseCache):
+    """Небольшой LRU-кеш процесса перед общим бэкендом.
+
+    Каждое значение в общем кеше хранится вместе со штампом версии,
+    а штамп дополнительно лежит под отдельным коротким ключом.
+    Локальная копия считается свежей STAMP_CHECK_INTERVAL секунд,
+    после чего сверяется только штамп -- так запись в одном
+    воркере становится видна остальным без перечитывания значения.
+    Общий бэкенд задаётся в OPTIONS['SHARED'] так же, как в CACHES.
+    """
+
+    def __init__(self, location, params):
+        options = dict(params.get('OPTIONS', {}))
+        shared = dict(options.pop('SHARED'))
+        self.local_max_entries = int(options.pop('LOCAL_MAX_ENTRIES', 1000))
+        self.check_interval = float(options.pop('STAMP_CHECK_INTERVAL', 1))
+        params = dict(params, OPTIONS=options)
+        super().__init__(params)
+        backend = import_string(shared.pop('BACKEND'))
+        self.shared = backend(shared.pop('LOCATION', ''), shared)
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stamp_key(key):
+        return f'{key}:stamp'
+
+    def _shared_key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _remember(self, key, stamp, value, timeout):
+        expires = None
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is not None:
+            expires = time.monotonic() + timeout
+        entry = [pickle.dumps(value), stamp, expires, time.monotonic()]
+        with self._lock:
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_max_entries:
+                self._local.popitem(last=False)
+
+    def _forget(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+
+    def _local_entry(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            if entry[2] is not None and entry[2] <= time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return entry
+
+    def _is_fresh(self, entry):
+        return time.monotonic() - entry[3] < self.check_interval
+
+    def _pack(self, value):
+        stamp = uuid4().hex[:8]
+        return stamp, (stamp, value)
+
+    def get_many(self, keys, version=None):
+        found = {}
+        to_fetch = {}
+        stale = {}
+        for key in keys:
+            shared_key = self._shared_key(key, version)
+            entry = self._local_entry(shared_key)
+            if entry is not None and self._is_fresh(entry):
+                found[key] = pickle.loads(entry[0])
+            elif entry is not None:
+                stale[self._stamp_key(shared_key)] = (key, shared_key, entry)
+            else:
+                to_fetch[shared_key] = key
+        if stale:
+            stamps = self.shared.get_many(stale)
+            for stamp_key, (key, shared_key, entry) in stale.items():
+                if stamps.get(stamp_key) == entry[1]:
+                    entry[3] = time.monotonic()
+                    found[key] = pickle.loads(entry[0])
+                else:
+                    to_fetch[shared_key] = key
+        if to_fetch:
+            packed = self.shared.get_many(to_fetch)
+            for shared_key, key in to_fetch.items():
+                if shared_key not in packed:
+                    self._forget(shared_key)
+                    continue
+                stamp, value = packed[shared_key]
+                found[key] = value
+                self._remember(shared_key, stamp, value, None)
+        return found
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        shared_data = {}
+        original_keys = {}
+        for key, value in data.items():
+            shared_key = self._shared_key(key, version)
+            original_keys[shared_key] = key
+            stamp, packed = self._pack(value)
+            shared_data[shared_key] = packed
+            shared_data[self._stamp_key(shared_key)] = stamp
+            self._remember(shared_key, stamp, value, timeout)
+        failed = self.shared.set_many(shared_data, timeout) or ()
+        return [
+            original_keys[key] for key in failed if key in original_keys
+        ]
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        shared_key = self._shared_key(key, version)
+        stamp, packed = self._pack(value)
+        if not self.shared.add(shared_key, packed, timeout):
+            return False
+        self.shared.set(self._stamp_key(shared_key), stamp, timeout)
+        self._remember(shared_key, stamp, value, timeout)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        shared_key = self._shared_key(key, version)
+        self._forget(shared_key)
+        self.shared.touch(self._stamp_key(shared_key), timeout)
+        return self.shared.touch(shared_key, timeout)
+
+    def delete_many(self, keys, version=None):
+        shared_keys = [self._shared_key(key, version) for key in keys]
+        self._forget(*shared_keys)
+        self.shared.delete_many(
+            shared_keys + [self._stamp_key(key) for key in shared_keys]
+        )
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def has_key(self, key, version=None):
+        return key in self.get_many([key], version=version)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
@@ -0,0 +1,228 @@
+"""Пул соединений с базой на процесс.
+
+Django держит соединение в потоке: при CONN_MAX_AGE = 0 оно
+закрывается после каждого запроса, а у серверов с потоком на запрос
+умирает вместе с потоком. Бэкенды из core.db_backends вместо
+закрытия возвращают соединение в пул, а при открытии берут готовое,
+проверив его запросом SELECT 1. Соединение старше
+DATABASE_POOL_MAX_LIFETIME секунд закрывается по-настоящему.
+
+Счётчики открытий, повторных использований и отказов каждый процесс
+раз в INSTRUMENTATION_FLUSH_INTERVAL секунд сбрасывает в общий кеш.
+"""
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .instrumentation import store
+
+WORKERS_KEY = 'dbpool:workers'
+EVENTS = ('opened', 'reused', 'returned', 'closed', 'unhealthy')
+
+
+class ConnectionPool:
+    """Свободные соединения одного псевдонима базы, последнее -- сверху."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            return self._idle.pop() if self._idle else None
+
+    def release(self, entry):
+        with self._lock:
+            if len(self._idle) >= settings.DATABASE_POOL_SIZE:
+                return False
+            self._idle.append(entry)
+            return True
+
+    def drain(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        return idle
+
+    def __len__(self):
+        return len(self._idle)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, name):
+    """Пул псевдонима для базы name.
+
+    Тестовые и бенчмарковые базы подменяют NAME у того же псевдонима,
+    и соединение с прежней базой не должно им достаться.
+    """
+    key = (alias, name)
+    with _pools_lock:
+        pool = _pools.get(key)
+        # Соединения родителя после fork не годятся дочернему процессу.
+        if pool is None or pool.pid != os.getpid():
+            pool = _pools[key] = ConnectionPool()
+        return pool
+
+
+class ChurnStats:
+    def __init__(self):
+        self.worker_key = store.worker_key.replace(
+            'instrumentation:', 'dbpool:', 1
+        )
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def add(self, event, connect_ms=0):
+        with self._lock:
+            self._counts[event] += 1
+            self._counts['connect_ms'] += connect_ms
+        interval = settings.INSTRUMENTATION_FLUSH_INTERVAL
+        if time.monotonic() - self._flushed_at >= interval:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def flush(self):
+        self._flushed_at = time.monotonic()
+        cache.set(self.worker_key, self.snapshot(), None)
+        workers = cache.get(WORKERS_KEY) or []
+        if self.worker_key not in workers:
+            cache.set(WORKERS_KEY, workers + [self.worker_key], None)
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+stats = ChurnStats()
+
+
+def collect():
+    """Суммы счётчиков по всем процессам и доля повторных соединений."""
+    workers = cache.get(WORKERS_KEY) or []
+    totals = Counter()
+    for snapshot in cache.get_many(workers).values():
+        totals.update(snapshot)
+    result = {event: totals[event] for event in EVENTS}
+    checkouts = totals['opened'] + totals['reused']
+    result['workers'] = len(workers)
+    result['reuse_ratio'] = (
+        round(totals['reused'] / checkouts, 3) if checkouts else None
+    )
+    result['connect_ms_mean'] = (
+        round(totals['connect_ms'] / totals['opened'], 3)
+        if totals['opened'] else None
+    )
+    return result
+
+
+class PooledDatabaseWrapperMixin:
+    """Подмешивается к DatabaseWrapper бэкенда перед ним в MRO."""
+
+    pool_reused = False
+    _home_pool = None
+    _born = None
+    _checked_at = None
+
+    def _pool(self):
+        in_memory = getattr(self, 'is_in_memory_db', lambda: False)()
+        if settings.DATABASE_POOL_SIZE <= 0 or in_memory:
+            return None
+        return get_pool(self.alias, self.settings_dict['NAME'])
+
+    def _ping(self, raw):
+        try:
+            cursor = raw.cursor()
+            try:
+                cursor.execute('SELECT 1')
+            finally:
+                cursor.close()
+        except self.Database.Error:
+            return False
+        return True
+
+    def _discard(self, raw, event):
+        stats.add(event)
+        try:
+            raw.close()
+        except self.Database.Error:
+            pass
+
+    def get_new_connection(self, conn_params):
+        pool = self._home_pool = self._pool()
+        self.pool_reused = False
+        self._checked_at = time.monotonic()
+        while pool is not None:
+            entry = pool.acquire()
+            if entry is None:
+                break
+            raw, born = entry
+            if self._ping(raw):
+                stats.add('reused')
+                self.pool_reused = True
+                self._born = born
+                return raw
+            self._discard(raw, 'unhealthy')
+        started = time.perf_counter()
+        raw = super().get_new_connection(conn_params)
+        stats.add('opened', (time.perf_counter() - started) * 1000)
+        self._born = time.monotonic()
+        return raw
+
+    def _close(self):
+        # Соединение возвращается в пул той базы, с которой открывалось.
+        pool = self._home_pool
+        raw = self.connection
+        if (
+            pool is None
+            or self.in_atomic_block
+            or time.monotonic() - self._born
+            > settings.DATABASE_POOL_MAX_LIFETIME
+        ):
+            stats.add('closed')
+            return super()._close()
+        try:
+            raw.rollback()
+        except self.Database.Error:
+            self._discard(raw, 'unhealthy')
+            return
+        if pool.release((raw, self._born)):
+            stats.add('returned')
+        else:
+            self._discard(raw, 'closed')
+
+    def is_usable(self):
+        return self._ping(self.connection)
+
+    def health_check(self):
+        """Закрывает постоянное соединение, если оно перестало отвечать.
+
+        Проверяет не чаще раза в DATABASE_HEALTH_CHECK_INTERVAL секунд,
+        чтобы не платить лишним запросом за каждый HTTP-запрос.
+        """
+        if self.connection is None or self.in_atomic_block:
+            return
+        now = time.monotonic()
+        if now - self._checked_at < settings.DATABASE_HEALTH_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        if not self.is_usable():
+            self.close()
+
+
+def check_connections(**kwargs):
+    """Обработчик request_started: проверка постоянных соединений."""
+    for connection in connections.all():
+        if isinstance(connection, PooledDatabaseWrapperMixin):
+            connection.health_check()
@@ -0,0 +1,108 @@
+"""Чтение с реплик с возвратом на основную базу.
+
+Реплики используются только внутри запроса, обёрнутого
+ReplicaPinningMiddleware: фоновые задачи и команды читают то, что
+только что записали, и отставание реплики для них опаснее нагрузки.
+Пользователь, сделавший запись, DATABASE_REPLICA_PIN_SECONDS секунд
+читает с основной базы -- так он сразу видит свой пост или подписку.
+Запрос может и сам перейти на основную базу через read_primary().
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.utils import ConnectionDoesNotExist
+
+PIN_COOKIE = 'primary_db'
+
+_state = ContextVar('replica_state', default=None)
+# Псевдоним реплики -> время (monotonic), до которого она считается
+# недоступной.
+_down = {}
+
+
+class RequestState:
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+@contextmanager
+def replica_reads(pinned=False):
+    """Разрешает чтение с реплик в пределах блока."""
+    state = RequestState(pinned)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+def read_primary():
+    """Дальше в этом запросе чтение идёт с основной базы."""
+    state = _state.get()
+    if state is not None:
+        state.pinned = True
+
+
+def is_available(alias):
+    """Проверяет соединение с репликой, помня отказ RETRY секунд."""
+    down_until = _down.get(alias)
+    if down_until is not None:
+        if time.monotonic() < down_until:
+            return False
+        del _down[alias]
+    try:
+        connections[alias].ensure_connection()
+    except (ConnectionDoesNotExist, DatabaseError):
+        _down[alias] = (
+            time.monotonic() + settings.DATABASE_REPLICA_RETRY_SECONDS
+        )
+        return False
+    return True
+
+
+def available_replicas():
+    return [
+        alias for alias in settings.DATABASE_REPLICAS if is_available(alias)
+    ]
+
+
+class PrimaryReplicaRouter:
+    """Направляет чтение моделей из DATABASE_REPLICATED_APPS на реплики."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is None
+            or state.pinned
+            or state.wrote
+            or model._meta.app_label not in settings.DATABASE_REPLICATED_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return None
+        replicas = available_replicas()
+        if not replicas:
+            return None
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема приходит на реплики вместе с данными.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,214 @@
+"""Счётчики запросов и задержек по представлениям.
+
+Каждый процесс копит гистограммы у себя и раз в
+INSTRUMENTATION_FLUSH_INTERVAL секунд сбрасывает их в общий кеш под
+своим ключом. Отчёт сливает гистограммы всех живых процессов за
+последние INSTRUMENTATION_WINDOW секунд. Замеряется только доля
+запросов INSTRUMENTATION_SAMPLE_RATE.
+"""
+import math
+import os
+import random
+import socket
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+METRICS = ('queries', 'sql_ms', 'template_ms', 'total_ms')
+PERCENTILES = (50, 95, 99)
+SLICE_SECONDS = 60
+WORKERS_KEY = 'instrumentation:workers'
+
+LINEAR_LIMIT = 100
+GROWTH = 1.05
+
+_current = ContextVar('instrumentation_recorder', default=None)
+
+
+def bucket(value):
+    """Корзина гистограммы, она же представитель значения.
+
+    До LINEAR_LIMIT корзины целые, дальше растут на 5%, так что
+    и число запросов, и время в миллисекундах хранятся компактно.
+    """
+    if value < LINEAR_LIMIT:
+        return round(value)
+    steps = math.ceil(math.log(value / LINEAR_LIMIT, GROWTH))
+    return round(LINEAR_LIMIT * GROWTH ** steps)
+
+
+class Histogram:
+    def __init__(self, buckets=None):
+        self.buckets = dict(buckets or {})
+
+    def add(self, value):
+        key = bucket(value)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def merge(self, other):
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+    @property
+    def count(self):
+        return sum(self.buckets.values())
+
+    def percentile(self, percent):
+        total = self.count
+        if not total:
+            return None
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen * 100 >= total * percent:
+                return key
+        return key
+
+
+class Recorder:
+    """Замеры одного запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0
+        self.template_time = 0
+        # Асинхронные страницы пишут замеры из нескольких потоков.
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.queries += 1
+                self.sql_time += elapsed
+
+    @contextmanager
+    def watch(self):
+        """Считает запросы соединений текущего потока."""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    @contextmanager
+    def activate(self):
+        token = _current.set(self)
+        try:
+            with self.watch():
+                yield self
+        finally:
+            _current.reset(token)
+
+
+def current_recorder():
+    return _current.get()
+
+
+def should_sample():
+    rate = settings.INSTRUMENTATION_SAMPLE_RATE
+    return rate >= 1 or random.random() < rate
+
+
+class MetricsStore:
+    """Гистограммы процесса по минутам и представлениям."""
+
+    def __init__(self):
+        self.worker_key = (
+            f'instrumentation:worker:{socket.gethostname()}:{os.getpid()}'
+        )
+        self._slices = {}
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def record(self, view_name, recorder, total_time):
+        now = time.time()
+        start = int(now // SLICE_SECONDS * SLICE_SECONDS)
+        values = {
+            'queries': recorder.queries,
+            'sql_ms': recorder.sql_time * 1000,
+            'template_ms': recorder.template_time * 1000,
+            'total_ms': total_time * 1000,
+        }
+        with self._lock:
+            views = self._slices.setdefault(start, {})
+            histograms = views.setdefault(
+                view_name, {metric: Histogram() for metric in METRICS}
+            )
+            for metric, value in values.items():
+                histograms[metric].add(value)
+            oldest = now - settings.INSTRUMENTATION_WINDOW - SLICE_SECONDS
+            for stale in [key for key in self._slices if key < oldest]:
+                del self._slices[stale]
+        interval = settings.INSTRUMENTATION_FLUSH_INTERVAL
+        if time.monotonic() - self._flushed_at >= interval:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                start: {
+                    view: {
+                        metric: histogram.buckets
+                        for metric, histogram in histograms.items()
+                    }
+                    for view, histograms in views.items()
+                }
+                for start, views in self._slices.items()
+            }
+
+    def flush(self):
+        self._flushed_at = time.monotonic()
+        timeout = settings.INSTRUMENTATION_WINDOW + SLICE_SECONDS
+        cache.set(self.worker_key, self.snapshot(), timeout)
+        workers = cache.get(WORKERS_KEY) or []
+        if self.worker_key not in workers:
+            cache.set(WORKERS_KEY, workers + [self.worker_key], None)
+
+    def clear(self):
+        with self._lock:
+            self._slices.clear()
+
+
+store = MetricsStore()
+
+
+def collect():
+    """Сводка по всем процессам: view -> metric -> count и перцентили."""
+    workers = cache.get(WORKERS_KEY) or []
+    snapshots = cache.get_many(workers)
+    alive = [key for key in workers if key in snapshots]
+    if alive != workers:
+        cache.set(WORKERS_KEY, alive, None)
+    since = time.time() - settings.INSTRUMENTATION_WINDOW
+    merged = {}
+    for snapshot in snapshots.values():
+        for start, views in snapshot.items():
+            if start + SLICE_SECONDS < since:
+                continue
+            for view, histograms in views.items():
+                target = merged.setdefault(
+                    view, {metric: Histogram() for metric in METRICS}
+                )
+                for metric, buckets in histograms.items():
+                    target[metric].merge(Histogram(buckets))
+    return {
+        view: {
+            metric: dict(
+                count=histogram.count,
+                **{
+                    f'p{percent}': histogram.percentile(percent)
+                    for percent in PERCENTILES
+                },
+            )
+            for metric, histogram in histograms.items()
+        }
+        for view, histograms in sorted(merged.items())
+    }
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core import db_pool
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает, как часто процессы открывают и переиспользуют '
+        'соединения с базой.'
+    )
+
+    def handle(self, *args, **options):
+        report = db_pool.collect()
+        for event in db_pool.EVENTS:
+            self.stdout.write(f'{event:<16} {report[event]:>10}')
+        ratio = report['reuse_ratio']
+        self.stdout.write(
+            f'{"reuse_ratio":<16} '
+            f'{"-" if ratio is None else f"{ratio:.1%}":>10}'
+        )
+        connect_ms = report['connect_ms_mean']
+        self.stdout.write(
+            f'{"connect_ms_mean":<16} '
+            f'{"-" if connect_ms is None else connect_ms:>10}'
+        )
+        self.stdout.write(f'{"workers":<16} {report["workers"]:>10}')
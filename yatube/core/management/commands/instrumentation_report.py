@@ -0,0 +1,30 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core import instrumentation
+
+
+class Command(BaseCommand):
+    help = 'Выводит перцентили запросов и задержек по представлениям.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Вывести сводку в JSON.',
+        )
+
+    def handle(self, *args, **options):
+        report = instrumentation.collect()
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for view, metrics in report.items():
+            self.stdout.write(view)
+            for metric, values in metrics.items():
+                self.stdout.write(
+                    f'  {metric:<12} count={values["count"]} '
+                    f'p50={values["p50"]} p95={values["p95"]} '
+                    f'p99={values["p99"]}'
+                )
@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+
+from . import db_routers, instrumentation
+
+
+class InstrumentationMiddleware:
+    """Пишет число SQL-запросов и время ответа в гистограммы по view."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not instrumentation.should_sample():
+            return self.get_response(request)
+        start = time.perf_counter()
+        with instrumentation.Recorder().activate() as recorder:
+            response = self.get_response(request)
+        match = request.resolver_match
+        if match is not None:
+            instrumentation.store.record(
+                match.view_name, recorder, time.perf_counter() - start
+            )
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """Включает чтение с реплик и закрепляет писавших за основной базой.
+
+    Кука ставится после любого запроса с записью и живёт
+    DATABASE_REPLICA_PIN_SECONDS секунд -- дольше обычного отставания
+    реплики. Стоит до кеша страниц, чтобы и его проверки версий
+    читали с реплик.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = db_routers.PIN_COOKIE in request.COOKIES
+        with db_routers.replica_reads(pinned) as state:
+            response = self.get_response(request)
+        if state.wrote:
+            response.set_cookie(
+                db_routers.PIN_COOKIE,
+                '1',
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
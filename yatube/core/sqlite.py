@@ -0,0 +1,160 @@
+"""Режим SQLite под конкурентной нагрузкой.
+
+Включается SQLITE_PRODUCTION_MODE. Новые соединения получают прагмы
+из SQLITE_PRAGMAS (WAL, synchronous=NORMAL, кеш страниц и mmap), а
+короткие записи из представлений идут через write(): один поток
+процесса выполняет их по очереди, пачками в одной транзакции. Так
+записи процесса не борются друг с другом за блокировку базы, а
+конфликт с другими процессами разрешается повтором с отступом.
+"""
+import contextvars
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+# Прагмы, которые нельзя выполнить на соединении только для чтения.
+WRITE_PRAGMAS = ('journal_mode',)
+
+
+def is_enabled():
+    return settings.SQLITE_PRODUCTION_MODE and connection.vendor == 'sqlite'
+
+
+def configure(sender, connection, **kwargs):
+    """Обработчик connection_created: выставляет прагмы соединению."""
+    if not settings.SQLITE_PRODUCTION_MODE or connection.vendor != 'sqlite':
+        return
+    # Соединение из пула уже настроено.
+    if getattr(connection, 'pool_reused', False):
+        return
+    read_only = connection.alias in settings.DATABASE_REPLICAS
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            if read_only and name in WRITE_PRAGMAS:
+                continue
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked(error):
+    return 'locked' in str(error)
+
+
+def retry_when_locked(func):
+    """Повторяет func при «database is locked» с растущим отступом.
+
+    Внутри транзакции не повторяет: откатить придётся всю внешнюю
+    транзакцию, и решать это должен её владелец.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        retries = settings.SQLITE_BUSY_RETRIES if is_enabled() else 0
+        for attempt in range(retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as error:
+                if (
+                    attempt == retries
+                    or not is_locked(error)
+                    or connection.in_atomic_block
+                ):
+                    raise
+            time.sleep(
+                settings.SQLITE_BUSY_RETRY_DELAY * 2 ** attempt
+                * random.uniform(0.5, 1.5)
+            )
+    return wrapper
+
+
+class WriteQueue:
+    """Поток-писатель: выполняет записи пачками по одной транзакции.
+
+    Каждая запись -- в своей точке сохранения, так что ошибка одной
+    не откатывает соседние; только блокировка базы откатывает и
+    повторяет всю пачку. Результат или исключение возвращаются
+    вызывающему после фиксации пачки. Запись выполняется в контексте
+    вызывающего, поэтому роутер баз и другие ContextVar видят её как
+    запись текущего запроса.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        self._queue.put(
+            (contextvars.copy_context(), func, args, kwargs, future)
+        )
+        self._ensure_thread()
+        return future.result()
+
+    def _ensure_thread(self):
+        with self._lock:
+            # После fork поток родителя в дочернем процессе не живёт.
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='sqlite-writer', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            jobs = [self._queue.get()]
+            while len(jobs) < settings.SQLITE_WRITE_BATCH_SIZE:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                results = self._execute(jobs)
+            except Exception as error:
+                for *_, future in jobs:
+                    future.set_exception(error)
+                continue
+            for future, error, value in results:
+                if error is None:
+                    future.set_result(value)
+                else:
+                    future.set_exception(error)
+
+    @retry_when_locked
+    def _execute(self, jobs):
+        results = []
+        with transaction.atomic():
+            for context, func, args, kwargs, future in jobs:
+                try:
+                    with transaction.atomic():
+                        value = context.run(func, *args, **kwargs)
+                except OperationalError as error:
+                    # Блокировка -- не ошибка записи: повторяется вся
+                    # пачка, busy_timeout при BUSY_SNAPSHOT не поможет.
+                    if is_locked(error):
+                        raise
+                    results.append((future, error, None))
+                except Exception as error:
+                    results.append((future, error, None))
+                else:
+                    results.append((future, None, value))
+        return results
+
+
+write_queue = WriteQueue()
+
+
+def write(func, *args, **kwargs):
+    """Выполняет короткую запись func(*args, **kwargs).
+
+    В обычном режиме -- сразу в текущем потоке, в режиме production --
+    через очередь писателя. Внутри уже открытой транзакции тоже сразу:
+    иначе запись не увидела бы её изменений.
+    """
+    if not is_enabled() or connection.in_atomic_block:
+        return func(*args, **kwargs)
+    return write_queue.submit(func, *args, **kwargs)
@@ -0,0 +1,73 @@
+import hashlib
+import os
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASHED_NAME = re.compile(r'(?:^|/)([0-9a-f]{2})/\1[0-9a-f]{62}(?:\.\w+)?$')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файлы под именами из SHA-256 содержимого.
+
+    От запрошенного имени остаются каталог и расширение:
+    posts/photo.JPG превращается в posts/3f/3fa8…c1.jpg. Одинаковое
+    содержимое получает одно имя и записывается на диск один раз, а
+    файл под таким именем никогда не меняется -- его URL можно
+    кешировать навсегда. Общий файл может принадлежать нескольким
+    записям, поэтому удалять его -- забота того, кто считает ссылки.
+    """
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        # Имя уже из хеша этого содержимого -- сохраняется под ним же.
+        if posixpath.basename(name) == digest + extension:
+            return name
+        return posixpath.join(
+            posixpath.dirname(name), digest[:2], digest + extension
+        )
+
+    def get_available_name(self, name, max_length=None):
+        if not self.is_immutable(name):
+            return super().get_available_name(name, max_length)
+        # Под этим именем может лежать только это же содержимое:
+        # суффикс вместо него сломал бы и дедупликацию, и кеш URL.
+        if self.exists(name):
+            raise FileExistsError(name)
+        return name
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        try:
+            # Свежее время изменения: файл снова нужен, и уборка
+            # файлов без ссылок не должна его трогать.
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            pass
+        else:
+            return name
+        try:
+            return super().save(name, content, max_length=max_length)
+        except FileExistsError:
+            # Тот же файл только что записал другой процесс.
+            return name
+
+    @staticmethod
+    def is_immutable(name):
+        return HASHED_NAME.search(name) is not None
@@ -0,0 +1,35 @@
+import copy
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+FILE_BACKEND = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+class TestRunner(DiscoverRunner):
+    """Файловый кеш на время тестов переезжает во временный каталог.
+
+    Тесты чистят кеш, и без этого стирали бы кеш разработчика в
+    BASE_DIR/cache, а он -- подсовывал бы им свои записи.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.mkdtemp(prefix='yatube-cache-')
+        caches = copy.deepcopy(settings.CACHES)
+        for alias, params in caches.items():
+            shared = params.get('OPTIONS', {}).get('SHARED')
+            for backend in (params, shared):
+                if backend and backend['BACKEND'] == FILE_BACKEND:
+                    backend['LOCATION'] = os.path.join(self.cache_dir, alias)
+        self.cache_settings = override_settings(CACHES=caches)
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
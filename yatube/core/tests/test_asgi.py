@@ -0,0 +1,163 @@
+import asyncio
+import json
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+
+from posts import cache_versions
+from posts.models import Group, Post
+
+from .. import asgi, db_routers, instrumentation
+
+User = get_user_model()
+
+
+def call(app, path, method='GET', body_chunks=(b'',), disconnect=False,
+         headers=()):
+    """Запрос к ASGI-приложению; тело приходит частями с паузами."""
+    sent = []
+    chunks = list(body_chunks)
+
+    async def receive():
+        await asyncio.sleep(0.01)
+        if disconnect:
+            return {'type': 'http.disconnect'}
+        chunk = chunks.pop(0)
+        return {
+            'type': 'http.request', 'body': chunk, 'more_body': bool(chunks),
+        }
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app({
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': b'',
+        'headers': list(headers),
+        'server': ('testserver', 80),
+    }, receive, send))
+    if not sent:
+        return None, b''
+    body = b''.join(message.get('body', b'') for message in sent[1:])
+    return sent[0]['status'], body
+
+
+@override_settings(PAGE_CACHE_ENABLED=False, ASGI_THREADS=2)
+class AsgiTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='author', password='secret-pass'
+        )
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text='Текст поста'
+        )
+        self.app = asgi.DjangoApp()
+
+    def tearDown(self):
+        asgi.shutdown()
+
+    def test_page(self):
+        """Страница отдаётся через пул потоков."""
+        status, body = call(self.app, '/')
+        self.assertEqual(status, 200)
+        self.assertIn('Текст поста', body.decode())
+
+    def test_body_in_chunks(self):
+        """Тело собирается из частей до того, как займётся поток."""
+        data = json.dumps(
+            {'username': 'author', 'password': 'secret-pass'}
+        ).encode()
+        status, body = call(
+            self.app, '/api/v1/tokens/', method='POST',
+            body_chunks=[data[:10], data[10:20], data[20:]],
+            headers=[(b'content-type', b'application/json')],
+        )
+        self.assertEqual(status, 201)
+        self.assertIn('token', json.loads(body))
+
+    def test_client_gone(self):
+        """Ушедший до конца загрузки клиент не занимает поток."""
+        with mock.patch.object(self.app, 'respond') as respond:
+            status, _ = call(self.app, '/', disconnect=True)
+        self.assertIsNone(status)
+        respond.assert_not_called()
+
+    def test_async_variants(self):
+        """Асинхронные варианты отдают те же страницы, что и обычные."""
+        threads = set()
+        original = asgi._call
+
+        def remember_thread(func, *args):
+            threads.add(threading.current_thread().name)
+            return original(func, *args)
+
+        with mock.patch.object(asgi, '_call', remember_thread):
+            for path in (
+                '/profile/author/', '/group/group/', f'/posts/{self.post.pk}/'
+            ):
+                with self.subTest(path=path):
+                    status, body = call(self.app, path)
+                    self.assertEqual(status, 200)
+                    self.assertIn('Текст поста', body.decode())
+            status, _ = call(self.app, '/profile/missing/')
+        self.assertEqual(status, 404)
+        self.assertTrue(all(
+            name.startswith('asgi_db_threads') for name in threads
+        ))
+
+    @override_settings(
+        INSTRUMENTATION_SAMPLE_RATE=1,
+        INSTRUMENTATION_FLUSH_INTERVAL=0,
+        DATABASE_REPLICAS=['replica'],
+    )
+    def test_async_variant_context(self):
+        """Потоки асинхронных страниц читают с реплик и считают запросы."""
+        replica_reads = []
+        read = db_routers.PrimaryReplicaRouter.db_for_read
+
+        def replica_read(router, model, **hints):
+            alias = read(router, model, **hints)
+            if alias == 'replica':
+                replica_reads.append(model)
+                return None
+            return alias
+
+        path = '/profile/author/'
+        instrumentation.store.clear()
+        self.client.get(path)
+        expected = instrumentation.collect()['posts:profile']['queries']
+        instrumentation.store.clear()
+        cache.clear()
+        # Версии старше отставания реплик: страница читается с реплики.
+        written = time.time() - settings.DATABASE_REPLICA_PIN_SECONDS - 2
+        with mock.patch.object(
+            db_routers.PrimaryReplicaRouter, 'db_for_read', replica_read
+        ), mock.patch.object(
+            db_routers, 'available_replicas', return_value=['replica']
+        ), mock.patch.object(cache_versions, 'time') as clock:
+            clock.time.return_value = written
+            status, _ = call(self.app, path)
+        self.assertEqual(status, 200)
+        self.assertIn(Post, replica_reads)
+        queries = instrumentation.collect()['posts:profile']['queries']
+        self.assertEqual(queries['p50'], expected['p50'])
+
+    def test_router(self):
+        """Пути живых обновлений уходят в своё приложение."""
+        live = mock.AsyncMock()
+        router = asgi.Router(live=live, django=self.app)
+        call(router, '/live/feed/')
+        live.assert_called_once()
+        status, _ = call(router, '/')
+        self.assertEqual(status, 200)
@@ -0,0 +1,64 @@
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from ..cache_backends import TwoTierCache
+
+
+class TwoTierCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.first_worker = self.make_cache()
+        self.second_worker = self.make_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def make_cache(self, **options):
+        options.setdefault('STAMP_CHECK_INTERVAL', 0)
+        return TwoTierCache('', {'OPTIONS': {
+            'SHARED': {
+                'BACKEND': (
+                    'django.core.cache.backends.filebased.FileBasedCache'
+                ),
+                'LOCATION': self.location,
+            },
+            **options,
+        }})
+
+    def test_write_visible_in_other_worker(self):
+        """Запись в одном воркере видна в другом."""
+        self.first_worker.set('key', 'first')
+        self.assertEqual(self.second_worker.get('key'), 'first')
+        self.first_worker.set('key', 'second')
+        self.assertEqual(self.second_worker.get('key'), 'second')
+        self.first_worker.delete('key')
+        self.assertIsNone(self.second_worker.get('key'))
+
+    def test_local_copy_used_within_interval(self):
+        """В пределах интервала проверки значение берётся из памяти."""
+        worker = self.make_cache(STAMP_CHECK_INTERVAL=60)
+        worker.set('key', 'local')
+        self.first_worker.set('key', 'shared')
+        self.assertEqual(worker.get('key'), 'local')
+        self.assertEqual(self.second_worker.get('key'), 'shared')
+
+    def test_local_tier_is_bounded(self):
+        """Локальный уровень вытесняет самые старые записи."""
+        worker = self.make_cache(LOCAL_MAX_ENTRIES=2)
+        worker.set_many({'a': 1, 'b': 2, 'c': 3})
+        self.assertEqual(list(worker._local), [
+            worker.make_key('b'), worker.make_key('c')
+        ])
+        self.assertEqual(worker.get_many(['a', 'b', 'c']), {
+            'a': 1, 'b': 2, 'c': 3
+        })
+
+    def test_incr_and_clear(self):
+        """incr и clear работают через общий уровень."""
+        self.first_worker.set('counter', 1)
+        self.assertEqual(self.first_worker.incr('counter'), 2)
+        self.assertEqual(self.second_worker.get('counter'), 2)
+        self.second_worker.clear()
+        self.assertIsNone(self.first_worker.get('counter'))
@@ -0,0 +1,124 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+
+from .. import db_pool
+from ..db_backends.sqlite3.base import DatabaseWrapper
+
+ALIAS = 'pooltest'
+
+
+@override_settings(
+    DATABASE_POOL_SIZE=2,
+    DATABASE_POOL_MAX_LIFETIME=600,
+    DATABASE_HEALTH_CHECK_INTERVAL=0,
+    INSTRUMENTATION_FLUSH_INTERVAL=600,
+)
+class ConnectionPoolTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings_dict = dict(
+            connection.settings_dict,
+            NAME=os.path.join(directory.name, 'db.sqlite3'),
+        )
+        db_pool.stats.clear()
+        self.addCleanup(self.drain)
+
+    def drain(self, name=None):
+        pool = db_pool.get_pool(ALIAS, name or self.settings_dict['NAME'])
+        for raw, _ in pool.drain():
+            raw.close()
+
+    def pool(self):
+        return db_pool.get_pool(ALIAS, self.settings_dict['NAME'])
+
+    def wrapper(self):
+        wrapper = DatabaseWrapper(self.settings_dict, alias=ALIAS)
+        wrapper.ensure_connection()
+        return wrapper
+
+    def test_closed_connection_is_reused(self):
+        """Закрытое соединение уходит в пул и достаётся следующему."""
+        first = self.wrapper()
+        raw = first.connection
+        first.close()
+        self.assertEqual(len(self.pool()), 1)
+        second = self.wrapper()
+        self.assertIs(second.connection, raw)
+        self.assertTrue(second.pool_reused)
+        counts = db_pool.stats.snapshot()
+        self.assertEqual(counts['opened'], 1)
+        self.assertEqual(counts['reused'], 1)
+        self.assertEqual(counts['returned'], 1)
+        second.close()
+
+    def test_pool_per_database(self):
+        """После смены NAME соединение с прежней базой не выдаётся."""
+        first = self.wrapper()
+        first.close()
+        old_name = self.settings_dict['NAME']
+        self.settings_dict['NAME'] = old_name + '-other'
+        self.addCleanup(self.drain, old_name)
+        second = self.wrapper()
+        self.assertFalse(second.pool_reused)
+        database = second.connection.execute(
+            'PRAGMA database_list'
+        ).fetchone()[2]
+        self.assertEqual(database, self.settings_dict['NAME'])
+        second.close()
+        self.assertEqual(len(db_pool.get_pool(ALIAS, old_name)), 1)
+        self.assertEqual(len(self.pool()), 1)
+
+    def test_unhealthy_connection_is_replaced(self):
+        """Соединение, не прошедшее проверку, заменяется новым."""
+        first = self.wrapper()
+        raw = first.connection
+        first.close()
+        raw.close()
+        second = self.wrapper()
+        self.assertIsNot(second.connection, raw)
+        self.assertFalse(second.pool_reused)
+        self.assertEqual(db_pool.stats.snapshot()['unhealthy'], 1)
+        second.close()
+
+    @override_settings(DATABASE_POOL_SIZE=1)
+    def test_pool_size_is_bounded(self):
+        """Сверх DATABASE_POOL_SIZE соединения закрываются."""
+        wrappers = [self.wrapper(), self.wrapper()]
+        for wrapper in wrappers:
+            wrapper.close()
+        self.assertEqual(len(self.pool()), 1)
+        self.assertEqual(db_pool.stats.snapshot()['closed'], 1)
+
+    @override_settings(DATABASE_POOL_MAX_LIFETIME=0)
+    def test_old_connections_are_closed(self):
+        """Соединение старше DATABASE_POOL_MAX_LIFETIME не возвращается."""
+        self.wrapper().close()
+        self.assertEqual(len(self.pool()), 0)
+
+    def test_health_check_drops_dead_connection(self):
+        """Проверка перед запросом закрывает неработающее соединение."""
+        wrapper = self.wrapper()
+        wrapper.connection.close()
+        wrapper.health_check()
+        self.assertIsNone(wrapper.connection)
+        self.assertEqual(len(self.pool()), 0)
+
+    def test_stats_command(self):
+        """Команда показывает счётчики всех процессов."""
+        cache.delete(db_pool.WORKERS_KEY)
+        self.wrapper().close()
+        self.wrapper().close()
+        db_pool.stats.flush()
+        report = db_pool.collect()
+        self.assertEqual(report['reuse_ratio'], 0.5)
+        out = StringIO()
+        call_command('connection_stats', stdout=out)
+        self.assertIn('reused', out.getvalue())
+        self.assertIn('50.0%', out.getvalue())
@@ -0,0 +1,97 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+from .. import db_routers
+from ..db_routers import PIN_COOKIE, PrimaryReplicaRouter, replica_reads
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        db_routers._down.clear()
+        patcher = mock.patch.object(
+            db_routers, 'is_available', return_value=True
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_go_to_replica(self):
+        """В запросе чтение постов уходит на реплику."""
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_outside_request_reads_primary(self):
+        """Вне запроса (задачи, команды) читаем основную базу."""
+        self.assertIsNone(self.router.db_for_read(Post))
+
+    def test_other_apps_read_primary(self):
+        """Модели других приложений на реплики не попадают."""
+        with replica_reads():
+            self.assertIsNone(self.router.db_for_read(User))
+
+    def test_read_your_writes(self):
+        """После записи и при закреплении чтение идёт с основной базы."""
+        with replica_reads() as state:
+            self.assertEqual(
+                self.router.db_for_write(Group), db_routers.DEFAULT_DB_ALIAS
+            )
+            self.assertTrue(state.wrote)
+            self.assertIsNone(self.router.db_for_read(Post))
+        with replica_reads(pinned=True):
+            self.assertIsNone(self.router.db_for_read(Post))
+
+    def test_transaction_reads_primary(self):
+        """Внутри транзакции чтение не уходит с основной базы."""
+        with replica_reads(), mock.patch.object(
+            db_routers.connections[db_routers.DEFAULT_DB_ALIAS],
+            'in_atomic_block', True,
+        ):
+            self.assertIsNone(self.router.db_for_read(Post))
+
+    def test_no_migrations_on_replicas(self):
+        """Миграции на реплики не применяются."""
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
+
+
+@override_settings(DATABASE_REPLICAS=['missing'])
+class ReplicaFallbackTest(SimpleTestCase):
+    def setUp(self):
+        db_routers._down.clear()
+
+    def test_unavailable_replica_falls_back(self):
+        """Недоступная реплика пропускается и запоминается."""
+        with replica_reads():
+            self.assertIsNone(PrimaryReplicaRouter().db_for_read(Post))
+        self.assertIn('missing', db_routers._down)
+        self.assertFalse(db_routers.is_available('missing'))
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class ReplicaPinningMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_write_pins_to_primary(self):
+        """После записи ставится кука закрепления за основной базой."""
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_read_does_not_pin(self):
+        """Чтение куку не ставит."""
+        response = self.client.get(reverse('posts:home_page'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
@@ -0,0 +1,76 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .. import instrumentation
+from ..instrumentation import Histogram
+
+User = get_user_model()
+
+
+class HistogramTest(SimpleTestCase):
+    def test_percentiles(self):
+        """Перцентили считаются по корзинам гистограммы."""
+        histogram = Histogram()
+        for value in range(1, 101):
+            histogram.add(value)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.percentile(50), 50)
+        self.assertEqual(histogram.percentile(99), 99)
+        histogram.add(5000)
+        self.assertAlmostEqual(histogram.percentile(100), 5000, delta=250)
+        self.assertIsNone(Histogram().percentile(50))
+
+
+@override_settings(
+    INSTRUMENTATION_SAMPLE_RATE=1,
+    INSTRUMENTATION_FLUSH_INTERVAL=0,
+    PAGE_CACHE_ENABLED=False,
+)
+class InstrumentationMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        instrumentation.store.clear()
+
+    def test_views_are_recorded(self):
+        """Запросы к страницам попадают в отчёт по имени view."""
+        for _ in range(3):
+            self.client.get(reverse('posts:home_page'))
+        report = instrumentation.collect()
+        metrics = report['posts:home_page']
+        self.assertEqual(metrics['total_ms']['count'], 3)
+        self.assertGreater(metrics['queries']['p50'], 0)
+        self.assertIsNotNone(metrics['template_ms']['p99'])
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_sampling_off(self):
+        """При нулевой доле выборки ничего не записывается."""
+        self.client.get(reverse('posts:home_page'))
+        self.assertEqual(instrumentation.collect(), {})
+
+    def test_report_endpoint_is_staff_only(self):
+        """Отчёт доступен только персоналу."""
+        url = reverse('instrumentation_report')
+        self.client.get(reverse('posts:home_page'))
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        reader = User.objects.create_user(username='reader')
+        reader_client = Client()
+        reader_client.force_login(reader)
+        self.assertEqual(reader_client.get(url).status_code, 302)
+        staff_client = Client()
+        staff_client.force_login(staff)
+        response = staff_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('posts:home_page', response.json())
+
+    def test_report_command(self):
+        """Команда выводит отчёт по представлениям."""
+        self.client.get(reverse('posts:home_page'))
+        out = StringIO()
+        call_command('instrumentation_report', stdout=out)
+        self.assertIn('posts:home_page', out.getvalue())
+        self.assertIn('total_ms', out.getvalue())
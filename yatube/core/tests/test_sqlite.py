@@ -0,0 +1,116 @@
+import os
+import tempfile
+from concurrent.futures import Future
+from contextvars import ContextVar, copy_context
+
+from django.db import OperationalError, connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import (SimpleTestCase, TestCase, TransactionTestCase,
+                         override_settings)
+
+from .. import sqlite
+
+marker = ContextVar('marker', default=None)
+
+
+class PragmasTest(SimpleTestCase):
+    def open(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        wrapper = DatabaseWrapper(dict(
+            connection.settings_dict,
+            NAME=os.path.join(directory.name, 'db.sqlite3'),
+        ), alias='pragmas')
+        self.addCleanup(wrapper.close)
+        wrapper.ensure_connection()
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_PRODUCTION_MODE=True)
+    def test_production_pragmas(self):
+        """В режиме production соединение получает WAL и прагмы."""
+        wrapper = self.open()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'cache_size'), -20000)
+
+    def test_default_mode_untouched(self):
+        """Без режима production прагмы не меняются."""
+        wrapper = self.open()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'delete')
+
+
+@override_settings(SQLITE_BUSY_RETRY_DELAY=0)
+class RetryTest(SimpleTestCase):
+    def flaky(self, failures):
+        calls = []
+
+        @sqlite.retry_when_locked
+        def func():
+            calls.append(1)
+            if len(calls) <= failures:
+                raise OperationalError('database is locked')
+            return len(calls)
+        return func
+
+    @override_settings(SQLITE_PRODUCTION_MODE=True)
+    def test_retries_locked(self):
+        """Блокировка базы повторяется до SQLITE_BUSY_RETRIES раз."""
+        self.assertEqual(self.flaky(2)(), 3)
+        with override_settings(SQLITE_BUSY_RETRIES=1):
+            with self.assertRaises(OperationalError):
+                self.flaky(2)()
+
+    def test_no_retries_by_default(self):
+        """Вне режима production ошибка уходит сразу."""
+        with self.assertRaises(OperationalError):
+            self.flaky(1)()
+
+
+class WriteQueueTest(TestCase):
+    def job(self, func, *args):
+        return (copy_context(), func, args, {}, Future())
+
+    def test_batch_isolates_failures(self):
+        """Ошибка одной записи в пачке не мешает остальным."""
+        def broken():
+            raise ValueError('сломано')
+
+        results = sqlite.WriteQueue()._execute([
+            self.job(lambda: 1), self.job(broken), self.job(lambda: 3),
+        ])
+        self.assertEqual([value for _, _, value in results], [1, None, 3])
+        self.assertIsInstance(results[1][1], ValueError)
+
+    def test_submit_runs_in_callers_context(self):
+        """Запись идёт в контексте вызывающего и возвращает результат."""
+        write_queue = sqlite.WriteQueue()
+        token = marker.set('request')
+        try:
+            self.assertEqual(write_queue.submit(marker.get), 'request')
+        finally:
+            marker.reset(token)
+        with self.assertRaises(ZeroDivisionError):
+            write_queue.submit(lambda: 1 / 0)
+
+
+@override_settings(SQLITE_PRODUCTION_MODE=True, SQLITE_BUSY_RETRY_DELAY=0)
+class WriteQueueRetryTest(TransactionTestCase):
+    def test_locked_job_retries_batch(self):
+        """Блокировка внутри записи повторяет пачку, а не уходит в ответ."""
+        calls = []
+
+        def locked_once():
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            return len(calls)
+
+        results = sqlite.WriteQueue()._execute([
+            (copy_context(), locked_once, (), {}, Future()),
+        ])
+        self.assertEqual(results[0][1:], (None, 2))
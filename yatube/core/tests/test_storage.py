@@ -0,0 +1,57 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .. import views
+from ..storage import ContentAddressedStorage
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_MAX_AGE=100)
+class ContentAddressedStorageTest(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.storage = ContentAddressedStorage()
+
+    def test_same_content_same_name(self):
+        """Одинаковое содержимое сохраняется один раз под одним именем."""
+        first = self.storage.save('posts/a.PNG', ContentFile(b'same'))
+        second = self.storage.save('posts/b.png', ContentFile(b'same'))
+        other = self.storage.save('posts/c.png', ContentFile(b'other'))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertRegex(first, r'^posts/([0-9a-f]{2})/\1[0-9a-f]{62}\.png$')
+        self.assertEqual(len(self.storage.listdir(first[:8])[1]), 1)
+        self.assertEqual(
+            self.storage.save(first, ContentFile(b'same')), first
+        )
+
+    def test_concurrent_save(self):
+        """Файл, появившийся между проверкой и записью, -- тот же файл."""
+        first = self.storage.save('posts/a.png', ContentFile(b'race'))
+        with mock.patch('os.utime', side_effect=FileNotFoundError):
+            second = self.storage.save('posts/b.png', ContentFile(b'race'))
+        self.assertEqual(second, first)
+        self.assertEqual(len(self.storage.listdir(first[:8])[1]), 1)
+
+    def test_immutable_headers(self):
+        """Файл с именем из хеша отдаётся с долгим кешем."""
+        hashed = self.storage.save('posts/a.png', ContentFile(b'data'))
+        with open(self.storage.path('posts/legacy.png'), 'wb') as legacy:
+            legacy.write(b'legacy')
+        request = RequestFactory().get('/')
+        response = views.media(request, hashed)
+        self.assertEqual(
+            response['Cache-Control'], 'public, max-age=100, immutable'
+        )
+        response = views.media(request, 'posts/legacy.png')
+        self.assertFalse(response.has_header('Cache-Control'))
@@ -1,6 +1,14 @@
 from http import HTTPStatus
 
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.utils.cache import patch_cache_control
+from django.views import static
+
+from . import instrumentation
+from .storage import ContentAddressedStorage
 
 
 def page_not_found(request, exception):
@@ -18,3 +26,26 @@ def permission_denied(request, exception):
         'core/403.html',
         status=HTTPStatus.FORBIDDEN
     )
+
+
+@staff_member_required
+def instrumentation_report(request):
+    instrumentation.store.flush()
+    return JsonResponse(instrumentation.collect())
+
+
+def media(request, path):
+    """Файлы из MEDIA_ROOT для разработки.
+
+    Файл с именем из хеша содержимого не меняется, поэтому браузер и
+    прокси могут хранить его MEDIA_MAX_AGE без перепроверки.
+    """
+    response = static.serve(request, path, document_root=settings.MEDIA_ROOT)
+    if ContentAddressedStorage.is_immutable(path):
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.MEDIA_MAX_AGE,
+            immutable=True,
+        )
+    return response
@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import Event
+
+
+class EventAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'channels', 'created')
+    list_filter = ('name',)
+
+
+admin.site.register(Event, EventAdmin)
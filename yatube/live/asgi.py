@@ -0,0 +1,158 @@
+"""ASGI-приложение с потоками Server-Sent Events.
+
+Django 2.2 не умеет ASGI, поэтому потоки обслуживает отдельное
+приложение: тысячи открытых соединений живут в одном цикле событий,
+а к базе оно обращается только при подключении (каналы потока,
+пропущенные события) и в общем для процесса опросе журнала.
+"""
+import asyncio
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from core.asgi import sync_to_thread
+
+from . import events
+
+SSE_HEADERS = [
+    (b'content-type', b'text/event-stream; charset=utf-8'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),
+]
+
+
+def format_event(envelope):
+    return (
+        f'id: {envelope.id}\nevent: {envelope.name}\n'
+        f'data: {envelope.data}\n\n'
+    ).encode()
+
+
+def last_event_id(scope):
+    """Last-Event-ID из заголовка или из ?last_event_id=."""
+    value = dict(scope.get('headers', [])).get(b'last-event-id')
+    if value is None:
+        query = parse_qs(scope.get('query_string', b'').decode())
+        value = query.get('last_event_id', [None])[0]
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def respond(send, status, body=b''):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+class LiveApp:
+    def __init__(self):
+        self._poller = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        prefix = settings.LIVE_URL_PREFIX
+        if scope['type'] != 'http' or not scope['path'].startswith(prefix):
+            return await respond(send, 404, b'Not Found')
+        if scope['method'] != 'GET':
+            return await respond(send, 405, b'Method Not Allowed')
+        channels = await sync_to_thread(
+            events.resolve, scope['path'][len(prefix):]
+        )
+        if channels is None:
+            return await respond(send, 404, b'Not Found')
+        self.start_polling()
+        await self.stream(channels, last_event_id(scope), receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._poller is not None:
+                    self._poller.cancel()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def start_polling(self):
+        if settings.LIVE_BROKER != 'database':
+            return
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.ensure_future(self.poll())
+
+    async def poll(self):
+        """Раздаёт подписчикам процесса новые события из журнала."""
+        last_id = await sync_to_thread(events.latest_id)
+        while True:
+            await asyncio.sleep(settings.LIVE_POLL_INTERVAL)
+            try:
+                for envelope in await sync_to_thread(events.fetch, last_id):
+                    events.hub.publish(envelope)
+                    last_id = envelope.id
+            except DatabaseError:
+                continue
+
+    async def stream(self, channels, last_id, receive, send):
+        subscription = events.hub.subscribe(channels)
+        disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': SSE_HEADERS,
+            })
+            await self._send(send, b'retry: 3000\n\n')
+            sent = last_id or 0
+            if last_id is not None:
+                # Журнал начался заново (новая база): прежние id клиента
+                # больше ничего не значат.
+                if last_id > await sync_to_thread(events.latest_id):
+                    sent = 0
+                for envelope in await sync_to_thread(events.since, last_id):
+                    if envelope.channels & subscription.channels:
+                        await self._send(send, format_event(envelope))
+                        sent = envelope.id
+            while True:
+                getter = asyncio.ensure_future(subscription.get())
+                done, _ = await asyncio.wait(
+                    {getter, disconnected},
+                    timeout=settings.LIVE_HEARTBEAT,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if disconnected in done:
+                    getter.cancel()
+                    return
+                if getter not in done:
+                    getter.cancel()
+                    await self._send(send, b': ping\n\n')
+                    continue
+                envelope = getter.result()
+                if envelope is None:
+                    break
+                if envelope.id > sent:
+                    await self._send(send, format_event(envelope))
+                    sent = envelope.id
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            events.hub.unsubscribe(subscription)
+            disconnected.cancel()
+
+    @staticmethod
+    async def _send(send, body):
+        await send({
+            'type': 'http.response.body',
+            'body': body,
+            'more_body': True,
+        })
@@ -0,0 +1,10 @@
+from django.conf import settings
+
+
+def live(request):
+    """Префикс потоков, если их обслуживает ASGI-сервер, иначе ''."""
+    return {
+        'live_prefix': (
+            settings.LIVE_URL_PREFIX if settings.LIVE_UPDATES_ENABLED else ''
+        ),
+    }
@@ -0,0 +1,115 @@
+"""Публикация событий и их доставка в хаб процесса.
+
+LIVE_BROKER = 'database' -- событие пишется в таблицу Event в той же
+транзакции, что и породившие его данные, а каждый ASGI-процесс раз
+в LIVE_POLL_INTERVAL секунд забирает новые строки и раздаёт своим
+подписчикам. Так воркеры WSGI и несколько ASGI-процессов общаются без
+отдельного брокера, а id строки служит Last-Event-ID. Устаревшие
+строки удаляет воркер задач (live.prune в run_tasks).
+
+LIVE_BROKER = 'memory' -- для одного процесса: событие уходит в хаб
+сразу после коммита, журнал для переподключений держится в памяти.
+"""
+import itertools
+import json
+import re
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .hub import Envelope, Hub
+from .models import Event
+
+hub = Hub()
+
+_streams = []
+# Отсчёт от времени запуска в микросекундах: после перезапуска процесса
+# id продолжают расти, и Last-Event-ID клиента не заслоняет новые события.
+_counter = itertools.count(time.time_ns() // 1000)
+_backlog = deque()
+_backlog_lock = threading.Lock()
+
+
+def stream(pattern):
+    """Регистрирует поток: функция получает группы pattern из пути
+    после LIVE_URL_PREFIX и возвращает каналы или None (404)."""
+    def decorator(func):
+        _streams.append((re.compile(pattern), func))
+        return func
+    return decorator
+
+
+def resolve(path):
+    for regex, func in _streams:
+        match = regex.fullmatch(path)
+        if match:
+            return func(**match.groupdict())
+    return None
+
+
+def publish(channels, name, data):
+    """Ничего не делает, пока LIVE_UPDATES_ENABLED выключен: слушать
+    события некому, а журнал рос бы без очистки."""
+    if not settings.LIVE_UPDATES_ENABLED:
+        return
+    payload = json.dumps(data, cls=DjangoJSONEncoder)
+    if settings.LIVE_BROKER == 'memory':
+        transaction.on_commit(
+            lambda: _publish_local(channels, name, payload)
+        )
+    else:
+        Event.objects.create(
+            channels=' '.join(channels), name=name, data=payload
+        )
+
+
+def _publish_local(channels, name, data):
+    envelope = Envelope(next(_counter), frozenset(channels), name, data)
+    with _backlog_lock:
+        _backlog.append(envelope)
+        while len(_backlog) > settings.LIVE_BACKLOG:
+            _backlog.popleft()
+    hub.publish(envelope)
+
+
+def _envelope(event):
+    return Envelope(
+        event.pk, frozenset(event.channels.split()), event.name, event.data
+    )
+
+
+def fetch(after_id):
+    """Новые события журнала в базе, не больше LIVE_BACKLOG."""
+    return [
+        _envelope(event) for event in
+        Event.objects.filter(pk__gt=after_id)[:settings.LIVE_BACKLOG]
+    ]
+
+
+def since(last_id):
+    """Пропущенные события для клиента, переподключившегося с last_id."""
+    if settings.LIVE_BROKER == 'memory':
+        with _backlog_lock:
+            return [envelope for envelope in _backlog if envelope.id > last_id]
+    return fetch(last_id)
+
+
+def latest_id():
+    if settings.LIVE_BROKER == 'memory':
+        with _backlog_lock:
+            return _backlog[-1].id if _backlog else 0
+    return Event.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first() or 0
+
+
+def prune():
+    """Удаляет события старше LIVE_EVENT_TTL секунд."""
+    expired = timezone.now() - timedelta(seconds=settings.LIVE_EVENT_TTL)
+    return Event.objects.filter(created__lt=expired).delete()[0]
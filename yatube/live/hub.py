@@ -0,0 +1,73 @@
+"""Подписчики потоков событий внутри процесса.
+
+У каждого SSE-соединения своя asyncio-очередь. Публиковать можно из
+любого потока: событие передаётся в цикл соединения через
+call_soon_threadsafe. Очередь медленного клиента не растёт без
+предела -- при переполнении поток закрывается, и браузер
+переподключается с Last-Event-ID, дочитывая пропущенное из журнала.
+"""
+import asyncio
+import threading
+from typing import FrozenSet, NamedTuple
+
+from django.conf import settings
+
+
+class Envelope(NamedTuple):
+    id: int
+    channels: FrozenSet[str]
+    name: str
+    data: str
+
+
+class Subscription:
+    def __init__(self, channels, loop):
+        self.channels = frozenset(channels)
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.overflowed = False
+
+    def put(self, envelope):
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= settings.LIVE_QUEUE_SIZE:
+            self.overflowed = True
+            envelope = None
+        self.queue.put_nowait(envelope)
+
+    async def get(self):
+        """Следующее событие или None, если клиент отстал."""
+        return await self.queue.get()
+
+
+class Hub:
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels):
+        subscription = Subscription(channels, asyncio.get_event_loop())
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, envelope):
+        with self._lock:
+            targets = [
+                subscription for subscription in self._subscriptions
+                if subscription.channels & envelope.channels
+            ]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.put, envelope
+                )
+            except RuntimeError:
+                self.unsubscribe(subscription)
+
+    def __len__(self):
+        return len(self._subscriptions)
@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channels', models.CharField(max_length=500, verbose_name='Каналы через пробел')),
+                ('name', models.CharField(max_length=50, verbose_name='Событие')),
+                ('data', models.TextField(verbose_name='Данные (JSON)')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
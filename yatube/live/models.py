@@ -0,0 +1,26 @@
+from django.db import models
+
+
+class Event(models.Model):
+    channels = models.CharField(
+        max_length=500,
+        verbose_name='Каналы через пробел'
+    )
+    name = models.CharField(
+        max_length=50,
+        verbose_name='Событие'
+    )
+    data = models.TextField(
+        verbose_name='Данные (JSON)'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата создания'
+    )
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
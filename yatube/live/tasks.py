@@ -0,0 +1,10 @@
+from django.conf import settings
+
+from tasks.queue import periodic
+
+from . import events
+
+
+@periodic('live.prune', settings.LIVE_EVENT_TTL)
+def prune():
+    events.prune()
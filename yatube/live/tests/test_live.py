@@ -0,0 +1,161 @@
+import asyncio
+import threading
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from .. import events
+from ..asgi import LiveApp
+from ..hub import Envelope, Hub
+from ..models import Event
+
+
+def envelope(event_id, *channels, name='post'):
+    return Envelope(event_id, frozenset(channels), name, '{}')
+
+
+class HubTest(SimpleTestCase):
+    def test_publish_from_other_thread(self):
+        """Событие из другого потока доходит только подписчикам канала."""
+        hub = Hub()
+
+        async def scenario():
+            feed = hub.subscribe(['feed'])
+            other = hub.subscribe(['group:1'])
+            thread = threading.Thread(
+                target=hub.publish, args=(envelope(1, 'feed'),)
+            )
+            thread.start()
+            thread.join()
+            received = await asyncio.wait_for(feed.get(), 1)
+            await asyncio.sleep(0)
+            return received, other.queue.qsize()
+
+        received, other_size = asyncio.run(scenario())
+        self.assertEqual(received.id, 1)
+        self.assertEqual(other_size, 0)
+
+    @override_settings(LIVE_QUEUE_SIZE=2)
+    def test_slow_client_is_dropped(self):
+        """Переполненная очередь заканчивается None -- поток закрывается."""
+        hub = Hub()
+
+        async def scenario():
+            subscription = hub.subscribe(['feed'])
+            for event_id in range(1, 5):
+                subscription.put(envelope(event_id, 'feed'))
+            return [
+                await subscription.get()
+                for _ in range(subscription.queue.qsize())
+            ]
+
+        received = asyncio.run(scenario())
+        self.assertEqual([item.id for item in received[:2]], [1, 2])
+        self.assertIsNone(received[2])
+
+
+@override_settings(LIVE_UPDATES_ENABLED=True)
+class DatabaseBrokerTest(TestCase):
+    def test_journal(self):
+        """События пишутся в журнал, читаются после id и устаревают."""
+        events.publish(['feed', 'author:1'], 'post', {'id': 1})
+        events.publish(['post:1'], 'comment', {'id': 2})
+        first, second = events.fetch(0)
+        self.assertEqual(first.channels, {'feed', 'author:1'})
+        self.assertEqual(second.data, '{"id": 2}')
+        self.assertEqual(events.since(first.id), [second])
+        self.assertEqual(events.latest_id(), second.id)
+        Event.objects.filter(pk=first.id).update(
+            created=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(events.prune(), 1)
+
+    def test_pruned_by_task_worker(self):
+        """Устаревшие события удаляет воркер задач."""
+        events.publish(['feed'], 'post', {'id': 1})
+        Event.objects.update(created=timezone.now() - timedelta(hours=1))
+        call_command(
+            'run_tasks', once=True, processes=0, stderr=StringIO()
+        )
+        self.assertFalse(Event.objects.exists())
+
+    @override_settings(LIVE_UPDATES_ENABLED=False)
+    def test_disabled(self):
+        """Без живых обновлений журнал не пишется."""
+        events.publish(['feed'], 'post', {'id': 1})
+        self.assertFalse(Event.objects.exists())
+
+
+@override_settings(LIVE_BROKER='memory', LIVE_HEARTBEAT=0.05)
+class LiveAppTest(SimpleTestCase):
+    def request(self, path, headers=(), publish=()):
+        """Открывает поток, публикует события и отключается."""
+        app = LiveApp()
+        sent = []
+        disconnect = None
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        async def scenario():
+            nonlocal disconnect
+            disconnect = asyncio.Event()
+            task = asyncio.ensure_future(app({
+                'type': 'http',
+                'method': 'GET',
+                'path': path,
+                'headers': list(headers),
+                'query_string': b'',
+            }, receive, send))
+            await asyncio.sleep(0.1)
+            for channels, data in publish:
+                events._publish_local(channels, 'post', data)
+            await asyncio.sleep(0.1)
+            disconnect.set()
+            await asyncio.wait_for(task, 1)
+
+        asyncio.run(scenario())
+        body = b''.join(message.get('body', b'') for message in sent)
+        return sent[0]['status'], body.decode()
+
+    def test_stream(self):
+        """Поток отдаёт события своего канала и пинг в паузах."""
+        status, body = self.request('/live/feed/', publish=[
+            (['feed'], '{"id": 1}'),
+            (['group:1'], '{"id": 2}'),
+        ])
+        self.assertEqual(status, 200)
+        self.assertIn('event: post\ndata: {"id": 1}', body)
+        self.assertNotIn('"id": 2', body)
+        self.assertIn(': ping', body)
+
+    def test_resume_after_last_event_id(self):
+        """Переподключение с Last-Event-ID дочитывает пропущенное."""
+        events._publish_local(['feed'], 'post', '"missed"')
+        last_id = events.latest_id() - 1
+        status, body = self.request(
+            '/live/feed/',
+            headers=[(b'last-event-id', str(last_id).encode())],
+        )
+        self.assertIn('data: "missed"', body)
+
+    def test_stale_last_event_id(self):
+        """Id из прошлого запуска не скрывают новые события."""
+        status, body = self.request(
+            '/live/feed/',
+            headers=[(b'last-event-id', str(10 ** 17).encode())],
+            publish=[(['feed'], '"fresh"')],
+        )
+        self.assertIn('data: "fresh"', body)
+
+    def test_unknown_stream(self):
+        """Неизвестный поток -- 404."""
+        status, _ = self.request('/live/unknown/')
+        self.assertEqual(status, 404)
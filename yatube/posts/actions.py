@@ -0,0 +1,48 @@
+"""Записи постов и комментариев вместе с их побочными эффектами.
+
+Общие для HTML-представлений и API: счётчики, очередь задач и
+миниатюры обновляются в той же транзакции, что и сама запись.
+"""
+from django.db import transaction
+
+from tasks.queue import enqueue
+
+from . import counters, live, thumbnails, uploads
+
+
+@transaction.atomic
+def create_post(post):
+    upload = uploads.take(post, None)
+    post.save()
+    counters.post_created(post)
+    enqueue('posts.fan_out', post.pk)
+    if upload:
+        uploads.schedule(post, upload)
+    else:
+        thumbnails.schedule(post)
+    live.post_published(post)
+
+
+@transaction.atomic
+def update_post(post, old_group_id, old_author_id, image_changed=False,
+                old_image=None):
+    upload = uploads.take(post, old_image)
+    if image_changed and not upload:
+        thumbnails.discard(post)
+    post.save()
+    counters.post_changed(post, old_group_id, old_author_id)
+    if upload:
+        uploads.schedule(post, upload)
+
+
+@transaction.atomic
+def delete_post(post):
+    counters.post_deleted(post)
+    post.delete()
+
+
+@transaction.atomic
+def create_comment(comment):
+    comment.save()
+    counters.comment_created(comment)
+    live.comment_added(comment)
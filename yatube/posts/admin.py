@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.db import transaction
 
-from .models import Comment, Follow, Group, Post
+from . import counters, search
+from .models import AuthorStats, Comment, Follow, Group, Post
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -15,6 +17,36 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
     list_editable = ('group',)
+    readonly_fields = ('comments_count',)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search.filter_posts(queryset, search_term), False
+
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        old = None
+        if change:
+            old = Post.objects.filter(pk=obj.pk).values(
+                'group_id', 'author_id'
+            ).first()
+        super().save_model(request, obj, form, change)
+        if old:
+            counters.post_changed(obj, old['group_id'], old['author_id'])
+        else:
+            counters.post_created(obj)
+
+    @transaction.atomic
+    def delete_model(self, request, obj):
+        counters.post_deleted(obj)
+        super().delete_model(request, obj)
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        for post in queryset:
+            counters.post_deleted(post)
+        super().delete_queryset(request, queryset)
 
 
 class FollowAdmin(admin.ModelAdmin):
@@ -23,6 +55,25 @@ class FollowAdmin(admin.ModelAdmin):
         'author',
     )
 
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        if change:
+            old = Follow.objects.get(pk=obj.pk)
+            counters.follow_deleted(old.user_id, old.author_id)
+        super().save_model(request, obj, form, change)
+        counters.follow_created(obj.user_id, obj.author_id)
+
+    @transaction.atomic
+    def delete_model(self, request, obj):
+        counters.follow_deleted(obj.user_id, obj.author_id)
+        super().delete_model(request, obj)
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        for follow in queryset:
+            counters.follow_deleted(follow.user_id, follow.author_id)
+        super().delete_queryset(request, queryset)
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = (
@@ -34,6 +85,7 @@ class GroupAdmin(admin.ModelAdmin):
     search_fields = ('description',)
     empty_value_display = '-пусто-'
     list_filter = ('title',)
+    readonly_fields = ('posts_count',)
 
 
 class CommentAdmin(admin.ModelAdmin):
@@ -45,7 +97,38 @@ class CommentAdmin(admin.ModelAdmin):
         'created',
     )
 
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        if change:
+            old = Comment.objects.get(pk=obj.pk)
+            counters.comment_deleted(old)
+        super().save_model(request, obj, form, change)
+        counters.comment_created(obj)
+
+    @transaction.atomic
+    def delete_model(self, request, obj):
+        counters.comment_deleted(obj)
+        super().delete_model(request, obj)
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        for comment in queryset:
+            counters.comment_deleted(comment)
+        super().delete_queryset(request, queryset)
+
+
+class AuthorStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        'user',
+        'posts_count',
+        'comments_count',
+        'followers_count',
+        'following_count',
+    )
+    readonly_fields = list_display
+
 
+admin.site.register(AuthorStats, AuthorStatsAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
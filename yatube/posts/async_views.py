@@ -0,0 +1,102 @@
+"""Асинхронные варианты страниц для ASGI (см. core.asgi).
+
+Запросы, не зависящие друг от друга, -- автор, подписка и страница
+постов профиля, группа и её посты, пост и его комментарии -- идут
+одновременно в пуле ASGI_DB_THREADS. Страница выбирается сразу,
+не дожидаясь кеша фрагментов: задержка важнее одного лишнего запроса.
+"""
+import asyncio
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.shortcuts import render
+
+from core.asgi import sync_to_thread
+
+from .cache_versions import AUTHOR, GROUP, fragment_key, scope_key
+from .forms import CommentForm
+from .models import Comment, Follow, Group, Post
+from .utils import DEFAULT_KEYS, paginate
+
+User = get_user_model()
+
+
+def _first(queryset):
+    obj = queryset.first()
+    if obj is None:
+        raise Http404
+    return obj
+
+
+def _page(request, queryset, keys=DEFAULT_KEYS):
+    page = paginate(request, queryset, keys=keys)
+    page.object_list
+    return page
+
+
+def _following(user_id, username):
+    if user_id is None:
+        return False
+    return Follow.objects.filter(
+        user_id=user_id, author__username=username
+    ).exists()
+
+
+async def group_posts(request, slug):
+    group, page = await asyncio.gather(
+        sync_to_thread(_first, Group.objects.filter(slug=slug)),
+        sync_to_thread(_page, request, Post.objects.select_related(
+            'group', 'author'
+        ).filter(group__slug=slug)),
+    )
+    context = {
+        'group': group,
+        'page_obj': page,
+        'cache_timeout': settings.FEED_CACHE_TIMEOUT,
+        'cache_version': fragment_key(scope_key(GROUP, group.pk)),
+    }
+    return await sync_to_thread(
+        render, request, 'posts/group_list.html', context
+    )
+
+
+async def profile(request, username):
+    author, following, page = await asyncio.gather(
+        sync_to_thread(_first, User.objects.select_related('stats').filter(
+            username=username
+        )),
+        sync_to_thread(_following, request.user.pk, username),
+        sync_to_thread(_page, request, Post.objects.select_related(
+            'group', 'author'
+        ).filter(author__username=username)),
+    )
+    context = {
+        'username': author,
+        'page_obj': page,
+        'following': following,
+        'cache_timeout': settings.FEED_CACHE_TIMEOUT,
+        'cache_version': fragment_key(scope_key(AUTHOR, author.pk)),
+    }
+    return await sync_to_thread(
+        render, request, 'posts/profile.html', context
+    )
+
+
+async def post_detail(request, post_id):
+    post, comments = await asyncio.gather(
+        sync_to_thread(_first, Post.objects.select_related(
+            'author__stats', 'group'
+        ).filter(pk=post_id)),
+        sync_to_thread(_page, request, Comment.objects.select_related(
+            'author'
+        ).filter(post_id=post_id), ('created', 'pk')),
+    )
+    context = {
+        'post': post,
+        'comments': comments,
+        'form': CommentForm(),
+    }
+    return await sync_to_thread(
+        render, request, 'posts/post_detail.html', context
+    )
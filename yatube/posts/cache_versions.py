@@ -0,0 +1,94 @@
+"""Версии кешированных лент.
+
+Каждая лента (общая, группы, автора, подписок пользователя) имеет
+версию -- случайный токен в кеше. Токен входит в ключ фрагмента,
+поэтому запись в базу делает старые фрагменты недостижимыми сразу,
+а не по истечении таймаута. Токены не числовые: если версия
+вытеснена из кеша, новая не совпадёт ни с одной из прежних.
+Токен начинается со времени создания, поэтому по версиям можно
+отдать и Last-Modified.
+
+Версию ставит коммит в основную базу, а реплика получает запись
+позже. Страница, прочитанная с реплики под свежей версией, легла бы
+в кеш без этой записи и отдавалась бы из него до следующей записи --
+в том числе и её автору. Поэтому запрос, взявший версию моложе
+DATABASE_REPLICA_PIN_SECONDS, читает с основной базы.
+"""
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core import db_routers
+
+FEED = 'feed'
+GROUP = 'group'
+AUTHOR = 'author'
+TIMELINE = 'timeline'
+POST = 'post'
+
+
+def scope_key(scope, ident=None):
+    if ident is None:
+        return f'version:{scope}'
+    return f'version:{scope}:{ident}'
+
+
+def _new_token():
+    return f'{int(time.time()):x}.{uuid4().hex[:8]}'
+
+
+def token_time(token):
+    stamp, dot, _ = token.partition('.')
+    if not dot:
+        return None
+    try:
+        return datetime.fromtimestamp(int(stamp, 16), timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def is_settled(token):
+    """Реплики уже видят запись, поставившую версию."""
+    stamp = token_time(token)
+    if stamp is None:
+        return True
+    # Время в токене округлено вниз до секунды.
+    lag = timedelta(seconds=settings.DATABASE_REPLICA_PIN_SECONDS + 1)
+    return stamp + lag <= datetime.now(timezone.utc)
+
+
+def get_versions(*keys):
+    versions = cache.get_many(keys)
+    missing = {key: _new_token() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    tokens = [versions[key] for key in keys]
+    if not all(map(is_settled, tokens)):
+        db_routers.read_primary()
+    return tokens
+
+
+def fragment_key(*keys):
+    return '-'.join(get_versions(*keys))
+
+
+def _set_new_tokens(keys):
+    cache.set_many({key: _new_token() for key in keys}, None)
+
+
+def bump(*keys):
+    """Меняет версии сразу и ещё раз после коммита транзакции.
+
+    Повторная смена нужна, чтобы запрос, успевший прочитать данные
+    до коммита, не закешировал их под уже новой версией.
+    """
+    keys = [key for key in keys if key is not None]
+    if not keys:
+        return
+    _set_new_tokens(keys)
+    transaction.on_commit(lambda: _set_new_tokens(keys))
@@ -0,0 +1,74 @@
+"""Условные GET-запросы для страниц с лентами.
+
+Валидаторы строятся из версий кеша (см. cache_versions): любая
+запись, меняющая страницу, меняет и версию, поэтому сравнение
+If-None-Match стоит одного обращения к кешу и не требует ни
+запросов к ленте, ни отрисовки шаблона.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+from .cache_versions import get_versions, token_time
+
+
+def _viewer(request, forms):
+    if not request.user.is_authenticated:
+        return 'anonymous'
+    viewer = f'user-{request.user.pk}'
+    if forms:
+        # После входа CSRF-токен меняется: форма из кеша браузера
+        # со старым токеном получила бы 403.
+        csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+        viewer = f'{viewer}-{csrf}'
+    return viewer
+
+
+def conditional_page(version_keys, max_age, forms=False):
+    """Отвечает 304, пока не сменились версии страницы.
+
+    version_keys(request, *args, **kwargs) возвращает ключи версий,
+    от которых зависит страница, или None, если проверять нечего
+    (например, объекта нет -- пусть представление само вернёт 404).
+    Анонимные ответы разрешено хранить прокси max_age секунд,
+    ответы вошедшим пользователям -- только браузеру с проверкой.
+    forms=True -- страница показывает вошедшему форму с CSRF-токеном,
+    и ETag зависит от токена.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            keys = version_keys(request, *args, **kwargs)
+            if keys is None:
+                return view(request, *args, **kwargs)
+            tokens = get_versions(*keys)
+            etag = quote_etag(hashlib.md5(
+                '|'.join([_viewer(request, forms)] + tokens).encode()
+            ).hexdigest())
+            times = [time for time in map(token_time, tokens) if time]
+            last_modified = max(times).timestamp() if times else None
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(response, public=True, max_age=max_age)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        wrapper.version_keys = version_keys
+        return wrapper
+    return decorator
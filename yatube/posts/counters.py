@@ -0,0 +1,160 @@
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import AuthorStats, Comment, Group, Post
+
+
+def _add(queryset, **deltas):
+    # Счётчики могут разойтись с данными (например, после правок
+    # в обход views), поэтому уменьшение не уходит ниже нуля.
+    queryset.update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+
+
+def bump_author(user_id, **deltas):
+    stats = AuthorStats.objects.filter(user_id=user_id)
+    if not stats.exists():
+        AuthorStats.objects.get_or_create(user_id=user_id)
+    _add(stats, **deltas)
+
+
+def bump_group(group_id, delta):
+    if group_id is not None:
+        _add(Group.objects.filter(pk=group_id), posts_count=delta)
+
+
+@transaction.atomic
+def post_created(post):
+    bump_author(post.author_id, posts_count=1)
+    bump_group(post.group_id, 1)
+
+
+@transaction.atomic
+def post_changed(post, old_group_id, old_author_id):
+    if old_group_id != post.group_id:
+        bump_group(old_group_id, -1)
+        bump_group(post.group_id, 1)
+    if old_author_id != post.author_id:
+        bump_author(old_author_id, posts_count=-1)
+        bump_author(post.author_id, posts_count=1)
+
+
+@transaction.atomic
+def post_deleted(post):
+    commenters = (
+        Comment.objects.filter(post_id=post.pk).order_by()
+        .values_list('author_id').annotate(count=Count('pk'))
+    )
+    for author_id, count in commenters:
+        bump_author(author_id, comments_count=-count)
+    bump_author(post.author_id, posts_count=-1)
+    bump_group(post.group_id, -1)
+
+
+@transaction.atomic
+def comment_created(comment):
+    _add(Post.objects.filter(pk=comment.post_id), comments_count=1)
+    bump_author(comment.author_id, comments_count=1)
+
+
+@transaction.atomic
+def comment_deleted(comment):
+    _add(Post.objects.filter(pk=comment.post_id), comments_count=-1)
+    bump_author(comment.author_id, comments_count=-1)
+
+
+@transaction.atomic
+def follow_created(user_id, author_id):
+    bump_author(user_id, following_count=1)
+    bump_author(author_id, followers_count=1)
+
+
+@transaction.atomic
+def follow_deleted(user_id, author_id):
+    bump_author(user_id, following_count=-1)
+    bump_author(author_id, followers_count=-1)
+
+
+@transaction.atomic
+def follows_changed(user_id, author_ids, delta):
+    """Счётчики после массовой подписки (delta=1) или отписки (-1)."""
+    if not author_ids:
+        return
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(user_id=pk) for pk in {user_id, *author_ids}],
+        ignore_conflicts=True,
+    )
+    _add(
+        AuthorStats.objects.filter(user_id=user_id),
+        following_count=delta * len(author_ids),
+    )
+    _add(
+        AuthorStats.objects.filter(user_id__in=author_ids),
+        followers_count=delta,
+    )
+
+
+def _count(model, field, outer='pk'):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef(outer)}).order_by()
+            .values(field).annotate(count=Count('pk')).values('count'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def _sync(queryset, **counters):
+    """Обновляет счётчики одним UPDATE и возвращает число расхождений."""
+    drift = 0
+    for field, actual in counters.items():
+        drift += queryset.annotate(actual=actual).exclude(
+            **{field: F('actual')}
+        ).count()
+    queryset.update(**counters)
+    return drift
+
+
+@transaction.atomic
+def reconcile(apps=global_apps):
+    """Пересчитывает все денормализованные счётчики.
+
+    Принимает реестр приложений, чтобы работать и из миграций.
+    """
+    user_model = apps.get_model(settings.AUTH_USER_MODEL)
+    author_stats = apps.get_model('posts', 'AuthorStats')
+    comment = apps.get_model('posts', 'Comment')
+    follow = apps.get_model('posts', 'Follow')
+    group = apps.get_model('posts', 'Group')
+    post = apps.get_model('posts', 'Post')
+    author_stats.objects.bulk_create(
+        [
+            author_stats(user_id=pk) for pk in user_model.objects.filter(
+                stats__isnull=True
+            ).values_list('pk', flat=True)
+        ],
+        ignore_conflicts=True,
+    )
+    return {
+        'posts': _sync(
+            post.objects.all(),
+            comments_count=_count(comment, 'post'),
+        ),
+        'groups': _sync(
+            group.objects.all(),
+            posts_count=_count(post, 'group'),
+        ),
+        'authors': _sync(
+            author_stats.objects.all(),
+            posts_count=_count(post, 'author', 'user_id'),
+            comments_count=_count(comment, 'author', 'user_id'),
+            followers_count=_count(follow, 'author', 'user_id'),
+            following_count=_count(follow, 'user', 'user_id'),
+        ),
+    }
@@ -0,0 +1,185 @@
+"""RSS и Atom для общей ленты, групп, авторов и подписок.
+
+Запись ленты рендерится один раз на пост и лежит в кеше под ключом
+поста: задача fan_out кладёт её туда сразу после публикации, правка
+и удаление поста её сбрасывают. Ответ собирается из id последних
+постов (один индексный запрос) и готовых записей -- рендерятся только
+новые. ETag строится из версий кеша, поэтому опрос без новых постов
+получает 304, а гостям готовый ответ отдаёт кеш страниц.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.html import escape, linebreaks
+from django.utils.text import Truncator
+
+from .cache_versions import AUTHOR, FEED, GROUP, TIMELINE, scope_key
+from .conditional import conditional_page
+from .models import FeedKey, Group, Post, new_feed_key
+
+User = get_user_model()
+
+ENTRY_KEY = 'syndication:entry:{}'
+ENTRY_TIMEOUT = 60 * 60 * 24 * 7
+TOKEN_SALT = 'posts.feeds.follow'
+FORMATS = {'rss': Rss201rev2Feed, 'atom': Atom1Feed}
+
+
+def render_entry(post):
+    link = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+    return {
+        'title': Truncator(post.text).words(10),
+        'link': link,
+        'description': linebreaks(escape(post.text)),
+        'pubdate': post.pub_date,
+        'author_name': post.author.get_full_name() or post.author.username,
+        'categories': [post.group.title] if post.group_id else [],
+    }
+
+
+def remember(post):
+    """Рендерит запись нового поста заранее, при публикации."""
+    cache.set(ENTRY_KEY.format(post.pk), render_entry(post), ENTRY_TIMEOUT)
+
+
+def forget(post_id):
+    cache.delete(ENTRY_KEY.format(post_id))
+
+
+def entries(posts):
+    """Записи последних SYNDICATION_ITEMS постов выборки, новые первыми."""
+    ids = list(
+        posts.order_by('-pub_date', '-pk')
+        .values_list('pk', flat=True)[:settings.SYNDICATION_ITEMS]
+    )
+    keys = {pk: ENTRY_KEY.format(pk) for pk in ids}
+    cached = cache.get_many(keys.values())
+    missing = [pk for pk in ids if keys[pk] not in cached]
+    if missing:
+        fresh = {
+            keys[post.pk]: render_entry(post)
+            for post in Post.objects.select_related(
+                'author', 'group'
+            ).filter(pk__in=missing)
+        }
+        cache.set_many(fresh, ENTRY_TIMEOUT)
+        cached.update(fresh)
+    return [cached[keys[pk]] for pk in ids if keys[pk] in cached]
+
+
+def follow_token(user):
+    """Секрет для ссылки на ленту подписок: читалки не входят на сайт.
+
+    В токен подписан случайный ключ пользователя из FeedKey: сброс
+    ключа отзывает утёкшую ссылку.
+    """
+    feed_key, _ = FeedKey.objects.get_or_create(user=user)
+    return signing.dumps([user.pk, feed_key.key], salt=TOKEN_SALT)
+
+
+def follow_user_id(token):
+    try:
+        user_id, key = signing.loads(token, salt=TOKEN_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    if not FeedKey.objects.filter(user_id=user_id, key=key).exists():
+        return None
+    return user_id
+
+
+def reset_follow_token(user):
+    FeedKey.objects.update_or_create(
+        user=user, defaults={'key': new_feed_key()}
+    )
+
+
+def _feed(request, fmt, title, link, posts):
+    if fmt not in FORMATS:
+        raise Http404
+    feed = FORMATS[fmt](
+        title=title,
+        link=request.build_absolute_uri(link),
+        description=title,
+        language=settings.LANGUAGE_CODE,
+        feed_url=request.build_absolute_uri(),
+    )
+    for entry in entries(posts):
+        link = request.build_absolute_uri(entry['link'])
+        feed.add_item(**dict(entry, link=link, unique_id=link))
+    response = HttpResponse(content_type=feed.content_type)
+    feed.write(response, 'utf-8')
+    return response
+
+
+def _posts_versions(request, fmt):
+    return [scope_key(FEED)]
+
+
+def _group_versions(request, fmt, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return None
+    return [scope_key(GROUP, group_id)]
+
+
+def _profile_versions(request, fmt, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if author_id is None:
+        return None
+    return [scope_key(AUTHOR, author_id)]
+
+
+def _follow_versions(request, fmt, token):
+    user_id = follow_user_id(token)
+    if user_id is None:
+        return None
+    return [scope_key(TIMELINE, user_id)]
+
+
+@conditional_page(_posts_versions, max_age=300)
+def posts_feed(request, fmt):
+    return _feed(
+        request, fmt, 'Yatube: последние записи',
+        reverse('posts:home_page'), Post.objects.all(),
+    )
+
+
+@conditional_page(_group_versions, max_age=300)
+def group_feed(request, fmt, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return _feed(
+        request, fmt, f'Yatube: {group.title}',
+        reverse('posts:group_posts', kwargs={'slug': slug}),
+        group.posts.all(),
+    )
+
+
+@conditional_page(_profile_versions, max_age=300)
+def profile_feed(request, fmt, username):
+    author = get_object_or_404(User, username=username)
+    return _feed(
+        request, fmt, f'Yatube: {author.get_full_name() or username}',
+        reverse('posts:profile', kwargs={'username': username}),
+        author.posts.all(),
+    )
+
+
+@conditional_page(_follow_versions, max_age=300)
+def follow_feed(request, fmt, token):
+    user_id = follow_user_id(token)
+    if user_id is None:
+        raise Http404
+    return _feed(
+        request, fmt, 'Yatube: подписки',
+        reverse('posts:follow_index'),
+        Post.objects.filter(author__following__user_id=user_id),
+    )
@@ -0,0 +1,120 @@
+"""Граф подписок.
+
+Подписка и отписка на любое число авторов -- один INSERT или DELETE,
+проверка «подписан ли» для страницы авторов -- один запрос. Списки
+подписчиков и подписок листаются по курсору (дата подписки, id), а
+взаимные подписки и рекомендации считаются на множествах id, без
+запросов на каждого автора.
+
+bulk_create не шлёт сигналов, поэтому follow() сам обновляет
+счётчики, версии кеша и ленты; unfollow() удаляет через QuerySet,
+и версии кеша сбрасывает сигнал post_delete.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count
+
+from tasks.queue import enqueue
+
+from . import cache_versions, counters, timeline
+from .cache_versions import AUTHOR, TIMELINE, scope_key
+from .models import Follow
+from .utils import paginate_sources
+
+User = get_user_model()
+
+KEYS = ('created', 'pk')
+
+
+def follow(user_id, author_ids):
+    """Подписывает на авторов и возвращает id новых подписок."""
+    author_ids = set(author_ids) - {user_id}
+    if not author_ids:
+        return set()
+    with transaction.atomic():
+        new = author_ids - following_ids(user_id, author_ids)
+        if not new:
+            return set()
+        Follow.objects.bulk_create(
+            [Follow(user_id=user_id, author_id=pk) for pk in new],
+            ignore_conflicts=True,
+        )
+        counters.follows_changed(user_id, new, 1)
+        cache_versions.bump(
+            scope_key(TIMELINE, user_id),
+            *[scope_key(AUTHOR, pk) for pk in new],
+        )
+        enqueue('posts.backfill_timeline', user_id, *sorted(new))
+    return new
+
+
+def unfollow(user_id, author_ids):
+    """Отписывает от авторов и возвращает id снятых подписок."""
+    with transaction.atomic():
+        removed = following_ids(user_id, author_ids)
+        if not removed:
+            return set()
+        Follow.objects.filter(
+            user_id=user_id, author_id__in=removed
+        ).delete()
+        counters.follows_changed(user_id, removed, -1)
+    timeline.prune(user_id, *removed)
+    return removed
+
+
+def following_ids(user_id, author_ids):
+    """Те из author_ids, на кого подписан пользователь."""
+    if user_id is None:
+        return set()
+    return set(
+        Follow.objects.filter(
+            user_id=user_id, author_id__in=set(author_ids)
+        ).values_list('author_id', flat=True)
+    )
+
+
+def followers_page(request, author):
+    """Подписчики автора, новые первыми."""
+    rows = Follow.objects.filter(author=author).select_related('user')
+    return paginate_sources(
+        request, [(rows, KEYS)], transform=lambda row: row.user
+    )
+
+
+def following_page(request, user):
+    """Авторы, на которых подписан пользователь, новые первыми."""
+    rows = Follow.objects.filter(user=user).select_related('author')
+    return paginate_sources(
+        request, [(rows, KEYS)], transform=lambda row: row.author
+    )
+
+
+def mutual_ids(user_id):
+    """Пользователи, с которыми подписки взаимны."""
+    following = Follow.objects.filter(user_id=user_id).values_list(
+        'author_id', flat=True
+    )
+    followers = Follow.objects.filter(author_id=user_id).values_list(
+        'user_id', flat=True
+    )
+    return set(following) & set(followers)
+
+
+def suggestions(user_id, limit=10):
+    """Авторы, на которых подписаны те, на кого подписан пользователь.
+
+    Чем больше таких подписок, тем выше автор в списке. Одна
+    группировка в базе и один запрос за пользователями.
+    """
+    following = Follow.objects.filter(user_id=user_id).values('author_id')
+    scores = list(
+        Follow.objects.filter(user_id__in=following)
+        .exclude(author_id__in=following)
+        .exclude(author_id=user_id)
+        .values('author_id')
+        .annotate(score=Count('pk'))
+        .order_by('-score', 'author_id')
+        .values_list('author_id', flat=True)[:limit]
+    )
+    users = User.objects.select_related('stats').in_bulk(scores)
+    return [users[pk] for pk in scores if pk in users]
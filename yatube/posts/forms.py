@@ -1,12 +1,36 @@
+from django import forms
 from django.forms import ModelForm
 
+from . import uploads
 from .models import Comment, Post
 
 
+class ImageUploadField(forms.ImageField):
+    """Проверяет картинку по заголовку, не декодируя её целиком.
+
+    Перекодирование и полную проверку делает задача posts.process_image.
+    """
+
+    def to_python(self, data):
+        upload = forms.FileField.to_python(self, data)
+        if upload is None:
+            return None
+        if getattr(upload, 'upload_error', None):
+            raise forms.ValidationError(
+                upload.upload_error, code='invalid_image'
+            )
+        try:
+            uploads.inspect(upload)
+        except uploads.InvalidImage as error:
+            raise forms.ValidationError(str(error), code='invalid_image')
+        return upload
+
+
 class PostForm(ModelForm):
     class Meta:
         model = Post
         fields = ["text", "group", "image"]
+        field_classes = {"image": ImageUploadField}
 
 
 class CommentForm(ModelForm):
@@ -0,0 +1,84 @@
+"""Живые обновления лент и комментариев (см. приложение live).
+
+Пост публикуется в каналы общей ленты, автора и группы, комментарий --
+в канал своего поста. Событие несёт готовые данные, так что клиенту
+не нужно перезапрашивать страницу целиком.
+"""
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from live.events import publish, stream
+
+from . import feeds
+from .models import Follow, Group, Post
+
+User = get_user_model()
+
+
+def post_channels(post):
+    channels = ['feed', f'author:{post.author_id}']
+    if post.group_id:
+        channels.append(f'group:{post.group_id}')
+    return channels
+
+
+def post_published(post):
+    publish(post_channels(post), 'post', {
+        'id': post.pk,
+        'url': reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'text': post.text,
+        'pub_date': post.pub_date,
+    })
+
+
+def comment_added(comment):
+    publish([f'post:{comment.post_id}'], 'comment', {
+        'id': comment.pk,
+        'post': comment.post_id,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created,
+    })
+
+
+@stream(r'feed/')
+def feed_stream():
+    return ['feed']
+
+
+@stream(r'group/(?P<slug>[-\w]+)/')
+def group_stream(slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    return None if group_id is None else [f'group:{group_id}']
+
+
+@stream(r'profile/(?P<username>[^/]+)/')
+def profile_stream(username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    return None if author_id is None else [f'author:{author_id}']
+
+
+@stream(r'follow/(?P<token>[^/]+)/')
+def follow_stream(token):
+    user_id = feeds.follow_user_id(token)
+    if user_id is None:
+        return None
+    return [
+        f'author:{author_id}' for author_id in
+        Follow.objects.filter(user_id=user_id).values_list(
+            'author_id', flat=True
+        )
+    ]
+
+
+@stream(r'posts/(?P<post_id>\d+)/')
+def post_stream(post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return None
+    return [f'post:{post_id}']
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, группы, посты, комментарии и подписки '
+        'в NDJSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл для записи; "-" -- stdout, *.gz сжимается gzip.',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            default=None,
+            help='Сжать gzip независимо от расширения.',
+        )
+        parser.add_argument(
+            '--model',
+            action='append',
+            choices=transfer.MODELS,
+            help='Выгрузить только эти модели.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        models = [
+            model for model in transfer.MODELS
+            if not options['model'] or model in options['model']
+        ]
+        with transfer.open_stream(
+            options['path'], 'w', options['gzip']
+        ) as stream:
+            counts = transfer.export(stream, models, options['chunk_size'])
+        for model, count in counts.items():
+            self.stderr.write(f'{model}: {count}')
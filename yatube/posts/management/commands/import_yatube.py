@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = 'Загружает данные из NDJSON, выгруженного export_yatube.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл для чтения; "-" -- stdin, *.gz читается через gzip.',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            default=None,
+            help='Читать как gzip независимо от расширения.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transfer.open_stream(
+            options['path'], 'r', options['gzip']
+        ) as stream:
+            importer = transfer.import_stream(stream, options['batch_size'])
+        for model, count in importer.written.items():
+            self.stdout.write(f'{model}: записано {count}')
+        for reason, count in importer.skipped.items():
+            if count:
+                self.stdout.write(f'{reason}: пропущено {count}')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import middleware
+
+
+class Command(BaseCommand):
+    help = 'Показывает долю попаданий в кеш страниц для гостей.'
+
+    def handle(self, *args, **options):
+        for view, values in middleware.stats().items():
+            ratio = values['ratio']
+            self.stdout.write(
+                f'{view:<20} попаданий {values["hits"]:>8} '
+                f'промахов {values["misses"]:>8} '
+                f'доля {"-" if ratio is None else f"{ratio:.1%}"}'
+            )
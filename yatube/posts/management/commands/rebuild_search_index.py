@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс постов.'
+
+    def handle(self, *args, **options):
+        index = search.get_index()
+        index.create()
+        index.rebuild()
+        self.stdout.write(f'Индекс перестроен: {type(index).__name__}')
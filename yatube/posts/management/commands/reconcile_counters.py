@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, комментариев и подписчиков.'
+
+    def handle(self, *args, **options):
+        drift = counters.reconcile()
+        for table, count in drift.items():
+            self.stdout.write(f'{table}: исправлено расхождений {count}')
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from posts import media, uploads
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает ссылки постов на файлы и удаляет картинки и '
+        'миниатюры, на которые не ссылается ни один пост.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace',
+            type=int,
+            default=3600,
+            help='Не трогать файлы моложе стольких секунд.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать файлы без ссылок.',
+        )
+
+    def handle(self, *args, **options):
+        drift = media.reconcile()
+        self.stdout.write(f'Исправлено счётчиков ссылок: {drift}')
+        grace = timedelta(seconds=options['grace'])
+        removed = media.sweep(uploads.IMAGES_DIR, grace, options['dry_run'])
+        for name in removed:
+            self.stdout.write(name)
+        self.stdout.write(f'Файлов без ссылок: {len(removed)}')
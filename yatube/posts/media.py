@@ -0,0 +1,169 @@
+"""Счётчики ссылок на файлы постов.
+
+Картинки и миниатюры лежат под именами из хеша содержимого
+(core.storage.ContentAddressedStorage), и один файл может быть общим
+у нескольких постов. StoredFile.refs -- сколько строк Post ссылаются
+на файл полем image или миниатюрой в thumbnails. Счётчики меняются
+в транзакции записи поста, а файл, на который больше никто не
+ссылается, удаляется после коммита.
+
+Хранилище не пишет файл, который уже есть на диске, а ссылку пост
+берёт позже, при сохранении. Если в этот промежуток файл удалили
+вместе с последней ссылкой другого поста, keep() запишет его заново.
+"""
+import json
+import posixpath
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps as global_apps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import StoredFile
+
+SWEEP_BATCH = 500
+
+
+def references(image, thumbnails):
+    """Имена файлов, на которые ссылается строка поста."""
+    names = set()
+    if image:
+        names.add(str(image))
+    if thumbnails:
+        names.update(
+            thumbnail['name'] for thumbnail in json.loads(thumbnails).values()
+        )
+    return names
+
+
+def post_references(post):
+    return references(post.image.name, post.thumbnails)
+
+
+def acquire(names):
+    for name in names:
+        if StoredFile.objects.filter(name=name).update(refs=F('refs') + 1):
+            continue
+        try:
+            with transaction.atomic():
+                StoredFile.objects.create(name=name, refs=1)
+        except IntegrityError:
+            StoredFile.objects.filter(name=name).update(refs=F('refs') + 1)
+
+
+def release(names):
+    names = list(names)
+    if not names:
+        return
+    StoredFile.objects.filter(name__in=names, refs__gt=0).update(
+        refs=F('refs') - 1
+    )
+    collect(StoredFile.objects.filter(
+        name__in=names, refs=0
+    ).values_list('name', flat=True))
+
+
+def replace(old_names, new_names):
+    """Переносит ссылки поста со старого набора файлов на новый."""
+    acquire(new_names - old_names)
+    release(old_names - new_names)
+
+
+def _delete_unreferenced(names):
+    for name in names:
+        # Строка удаляется в одной транзакции с файлом: пост, который
+        # берёт ссылку на тот же файл, дождётся её конца.
+        with transaction.atomic():
+            StoredFile.objects.filter(name=name, refs=0).delete()
+            if not StoredFile.objects.filter(name=name).exists():
+                default_storage.delete(name)
+
+
+def collect(names):
+    """После коммита удаляет файлы, на которые никто не ссылается.
+
+    Счётчик проверяется заново: одинаковая картинка могла за это время
+    достаться другому посту.
+    """
+    names = set(names)
+    if names:
+        transaction.on_commit(lambda: _delete_unreferenced(names))
+
+
+def _restore(name, content):
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(content))
+
+
+def keep(name, content):
+    """После коммита записывает файл снова, если его успели удалить."""
+    transaction.on_commit(lambda: _restore(name, content))
+
+
+@transaction.atomic
+def reconcile(apps=global_apps):
+    """Пересчитывает ссылки по строкам Post; возвращает число
+    исправленных счётчиков.
+
+    Принимает реестр приложений, чтобы работать и из миграций.
+    """
+    post = apps.get_model('posts', 'Post')
+    stored_file = apps.get_model('posts', 'StoredFile')
+    actual = Counter()
+    rows = post.objects.values_list('image', 'thumbnails').order_by()
+    for image, thumbnails in rows.iterator():
+        actual.update(references(image, thumbnails))
+    current = dict(stored_file.objects.values_list('name', 'refs'))
+    drift = sum(
+        current.get(name) != actual.get(name)
+        for name in set(current) | set(actual)
+    )
+    if drift:
+        stored_file.objects.all().delete()
+        stored_file.objects.bulk_create(
+            [
+                stored_file(name=name, refs=refs)
+                for name, refs in actual.items()
+            ],
+            batch_size=SWEEP_BATCH,
+        )
+    return drift
+
+
+def _walk(directory):
+    directories, files = default_storage.listdir(directory)
+    yield [posixpath.join(directory, name) for name in files]
+    for child in directories:
+        yield from _walk(posixpath.join(directory, child))
+
+
+def sweep(directory, grace=timedelta(hours=1), dry_run=False):
+    """Удаляет из каталога файлы без ссылок и возвращает их имена.
+
+    Файлы моложе grace не трогаются: их могла только что сохранить
+    задача, которая ещё не записала имя в пост. Повторное сохранение
+    того же содержимого обновляет время изменения файла.
+    """
+    if not default_storage.exists(directory):
+        return []
+    cutoff = timezone.now() - grace
+    removed = []
+    for names in _walk(directory):
+        for start in range(0, len(names), SWEEP_BATCH):
+            batch = names[start:start + SWEEP_BATCH]
+            referenced = set(StoredFile.objects.filter(
+                name__in=batch, refs__gt=0
+            ).values_list('name', flat=True))
+            for name in batch:
+                if name in referenced:
+                    continue
+                if default_storage.get_modified_time(name) > cutoff:
+                    continue
+                if not dry_run:
+                    default_storage.delete(name)
+                removed.append(name)
+    return removed
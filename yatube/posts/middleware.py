@@ -0,0 +1,132 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+
+from core.instrumentation import store
+
+from .cache_versions import fragment_key
+
+WORKERS_KEY = 'pagecache:workers'
+
+
+class PageCacheStats:
+    """Попадания и промахи процесса; в общий кеш -- раз в
+    INSTRUMENTATION_FLUSH_INTERVAL секунд под ключом процесса."""
+
+    def __init__(self):
+        self.worker_key = store.worker_key.replace(
+            'instrumentation:', 'pagecache:', 1
+        )
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def add(self, view_name, outcome):
+        with self._lock:
+            self._counts[view_name, outcome] += 1
+        interval = settings.INSTRUMENTATION_FLUSH_INTERVAL
+        if time.monotonic() - self._flushed_at >= interval:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def flush(self):
+        self._flushed_at = time.monotonic()
+        cache.set(self.worker_key, self.snapshot(), None)
+        workers = cache.get(WORKERS_KEY) or []
+        if self.worker_key not in workers:
+            cache.set(WORKERS_KEY, workers + [self.worker_key], None)
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+page_stats = PageCacheStats()
+
+
+def stats():
+    """Попадания и промахи кеша страниц по представлениям."""
+    page_stats.flush()
+    totals = Counter()
+    workers = cache.get(WORKERS_KEY) or []
+    for snapshot in cache.get_many(workers).values():
+        totals.update(snapshot)
+    result = {}
+    for view in sorted({view for view, _ in totals}):
+        hits = totals[view, 'hit']
+        misses = totals[view, 'miss']
+        total = hits + misses
+        result[view] = {
+            'hits': hits,
+            'misses': misses,
+            'ratio': round(hits / total, 3) if total else None,
+        }
+    return result
+
+
+class AnonymousPageCacheMiddleware:
+    """Отдаёт гостям готовые страницы из кеша.
+
+    Работает только для представлений с conditional_page: ключ
+    страницы включает их версии, поэтому записи в базу сразу делают
+    старую копию недостижимой. Стоит до SessionMiddleware: запрос
+    без сессионной куки при попадании не трогает ни сессию, ни
+    CSRF, ни шаблоны.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            not settings.PAGE_CACHE_ENABLED
+            or request.method not in ('GET', 'HEAD')
+            or settings.SESSION_COOKIE_NAME in request.COOKIES
+        ):
+            return self.get_response(request)
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return self.get_response(request)
+        version_keys = getattr(match.func, 'version_keys', None)
+        if version_keys is None:
+            return self.get_response(request)
+        # Без сессионной куки это гость; AuthenticationMiddleware
+        # позже всё равно заменит request.user.
+        request.user = AnonymousUser()
+        keys = version_keys(request, *match.args, **match.kwargs)
+        if keys is None:
+            return self.get_response(request)
+        path_hash = hashlib.md5(
+            request.get_full_path().encode()
+        ).hexdigest()
+        key = f'page:{path_hash}:{fragment_key(*keys)}'
+        cached = cache.get(key)
+        if cached is not None:
+            page_stats.add(match.view_name, 'hit')
+            request.resolver_match = match
+            return get_conditional_response(
+                request, etag=cached.get('ETag'), response=cached
+            )
+        page_stats.add(match.view_name, 'miss')
+        response = self.get_response(request)
+        # conditional_page помечает public только ответы гостям.
+        if (
+            request.method == 'GET'
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and 'public' in response.get('Cache-Control', '')
+        ):
+            cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+        return response
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_storedfile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='timeline_pull',
+            field=models.BooleanField(default=False, verbose_name='Посты читаются в ленты на лету'),
+        ),
+    ]
@@ -1,5 +1,9 @@
+import json
+import secrets
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.db import models
 
 User = get_user_model()
@@ -18,6 +22,11 @@ class Group(models.Model):
     description = models.TextField(
         verbose_name="Описание группы"
     )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Количество постов"
+    )
 
     def __str__(self):
         return self.title
@@ -51,13 +60,50 @@ class Post(models.Model):
         blank=True,
         null=True,
     )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Количество комментариев"
+    )
+    thumbnails = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="Миниатюры"
+    )
 
     class Meta:
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(
+                fields=['pub_date', 'id'],
+                name='post_date_idx',
+            ),
+            models.Index(
+                fields=['group', 'pub_date', 'id'],
+                name='post_group_date_idx',
+            ),
+            models.Index(
+                fields=['author', 'pub_date', 'id'],
+                name='post_author_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:settings.MAX_LENGHT_SYMBOLS]
 
+    def thumbnail_for(self, size):
+        if not self.thumbnails:
+            return None
+        thumbnail = json.loads(self.thumbnails).get(size)
+        if thumbnail is None:
+            return None
+        return dict(thumbnail, url=default_storage.url(thumbnail['name']))
+
+    @property
+    def thumbnail(self):
+        return self.thumbnail_for(settings.POST_THUMBNAIL_SIZES[0])
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -80,6 +126,14 @@ class Comment(models.Model):
         verbose_name='Дата создания'
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_created_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.text[:15]
 
@@ -97,6 +151,141 @@ class Follow(models.Model):
         verbose_name='Автор блога',
         on_delete=models.CASCADE,
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата подписки'
+    )
 
     class Meta:
         unique_together = ['user', 'author']
+        indexes = [
+            models.Index(
+                fields=['user', 'created', 'id'],
+                name='follow_user_created_idx',
+            ),
+            models.Index(
+                fields=['author', 'created', 'id'],
+                name='follow_author_created_idx',
+            ),
+        ]
+
+
+class AuthorStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество постов',
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество комментариев',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписчиков',
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписок',
+    )
+    timeline_pull = models.BooleanField(
+        default=False,
+        verbose_name='Посты читаются в ленты на лету',
+    )
+
+    def __str__(self):
+        return str(self.user)
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        related_name='timeline',
+        verbose_name='Читатель',
+        on_delete=models.CASCADE,
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='+',
+        verbose_name='Автор поста',
+        on_delete=models.CASCADE,
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации'
+    )
+
+    class Meta:
+        unique_together = ['user', 'post']
+        indexes = [
+            models.Index(
+                fields=['user', 'pub_date', 'post'],
+                name='timeline_user_date_idx',
+            ),
+        ]
+
+
+class SearchTerm(models.Model):
+    term = models.CharField(
+        max_length=64,
+        verbose_name='Основа слова'
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name='+',
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+    )
+    frequency = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Вхождений в тексте'
+    )
+
+    class Meta:
+        unique_together = ['term', 'post']
+
+
+class StoredFile(models.Model):
+    name = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Имя файла'
+    )
+    refs = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число ссылок'
+    )
+
+    def __str__(self):
+        return self.name
+
+
+def new_feed_key():
+    return secrets.token_urlsafe(16)
+
+
+class FeedKey(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_key',
+        verbose_name='Пользователь',
+    )
+    key = models.CharField(
+        max_length=32,
+        default=new_feed_key,
+        verbose_name='Секрет ленты подписок',
+    )
+
+    def __str__(self):
+        return str(self.user)
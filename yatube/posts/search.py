@@ -0,0 +1,241 @@
+"""Полнотекстовый поиск по постам.
+
+В индекс попадают основы слов (см. stemmer), поэтому запрос «книгами»
+находит пост со словом «книга». На SQLite индекс -- виртуальная
+таблица FTS5 с ранжированием bm25; на остальных базах -- обратный
+индекс в таблице SearchTerm с ранжированием по tf-idf.
+"""
+import math
+import sqlite3
+from collections import Counter
+from functools import lru_cache
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+
+from .models import Post
+from .stemmer import tokenize
+from .utils import CursorPage, _page_number
+
+FTS_TABLE = 'posts_post_fts'
+
+
+@lru_cache(maxsize=None)
+def fts5_available():
+    try:
+        sqlite3.connect(':memory:').execute(
+            'CREATE VIRTUAL TABLE probe USING fts5(terms)'
+        )
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def query_terms(query):
+    return list(dict.fromkeys(tokenize(query)))
+
+
+class Fts5Index:
+    def __init__(self, apps=global_apps, connection=None):
+        self.post_model = apps.get_model('posts', 'Post')
+        self.connection = connection or connections[DEFAULT_DB_ALIAS]
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING '
+                f"fts5(terms, tokenize='unicode61 remove_diacritics 0')"
+            )
+
+    def drop(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+    def update(self, post_id, text):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, terms) VALUES (%s, %s)',
+                [post_id, ' '.join(tokenize(text))],
+            )
+
+    def remove(self, post_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            posts = self.post_model.objects.using(
+                self.connection.alias
+            ).values_list('pk', 'text')
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, terms) VALUES (%s, %s)',
+                (
+                    (pk, ' '.join(tokenize(text)))
+                    for pk, text in posts.iterator()
+                ),
+            )
+
+    @staticmethod
+    def _match(terms):
+        return ' '.join(f'"{term}"' for term in terms)
+
+    def search(self, terms, offset, limit):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY rank, rowid DESC LIMIT %s OFFSET %s',
+                [self._match(terms), limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def filter(self, queryset, terms):
+        return queryset.extra(
+            where=[
+                f'{self.post_model._meta.db_table}.id IN (SELECT rowid '
+                f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)'
+            ],
+            params=[self._match(terms)],
+        )
+
+
+class InvertedIndex:
+    """Обратный индекс на обычных таблицах для баз без FTS5."""
+
+    def __init__(self, apps=global_apps, connection=None):
+        self.post_model = apps.get_model('posts', 'Post')
+        self.term_model = apps.get_model('posts', 'SearchTerm')
+        self.connection = connection or connections[DEFAULT_DB_ALIAS]
+
+    def create(self):
+        pass
+
+    def drop(self):
+        pass
+
+    def _entries(self, post_id, text):
+        return [
+            self.term_model(post_id=post_id, term=term, frequency=frequency)
+            for term, frequency in Counter(tokenize(text)).items()
+            if len(term) <= self.term_model._meta.get_field(
+                'term'
+            ).max_length
+        ]
+
+    def update(self, post_id, text):
+        self.remove(post_id)
+        self.term_model.objects.bulk_create(self._entries(post_id, text))
+
+    def remove(self, post_id):
+        self.term_model.objects.filter(post_id=post_id).delete()
+
+    def rebuild(self):
+        terms = self.term_model.objects.using(self.connection.alias)
+        terms.all().delete()
+        batch = []
+        posts = self.post_model.objects.using(
+            self.connection.alias
+        ).values_list('pk', 'text')
+        for pk, text in posts.iterator():
+            batch += self._entries(pk, text)
+            if len(batch) >= 1000:
+                terms.bulk_create(batch)
+                batch = []
+        terms.bulk_create(batch)
+
+    def _matches(self, terms):
+        return self.term_model.objects.filter(term__in=terms).values(
+            'post_id'
+        ).annotate(matched=Count('term')).filter(matched=len(terms))
+
+    def search(self, terms, offset, limit):
+        total = self.post_model.objects.count()
+        frequencies = dict(
+            self.term_model.objects.filter(term__in=terms).values(
+                'term'
+            ).annotate(posts=Count('post')).values_list('term', 'posts')
+        )
+        weights = [
+            When(term=term, then=Value(math.log(1 + total / posts)))
+            for term, posts in frequencies.items()
+        ]
+        if len(weights) < len(terms):
+            return []
+        rows = self._matches(terms).annotate(
+            score=Sum(
+                F('frequency') * Case(*weights, output_field=FloatField()),
+                output_field=FloatField(),
+            )
+        ).order_by('-score', '-post_id')[offset:offset + limit]
+        return [row['post_id'] for row in rows]
+
+    def filter(self, queryset, terms):
+        return queryset.filter(
+            pk__in=self._matches(terms).values('post_id')
+        )
+
+
+def get_index(apps=global_apps, connection=None):
+    """Индекс для базы connection; по умолчанию -- основной.
+
+    Миграции передают schema_editor.connection: migrate --database
+    должен строить индекс в той базе, которую мигрирует.
+    """
+    connection = connection or connections[DEFAULT_DB_ALIAS]
+    if connection.vendor == 'sqlite' and fts5_available():
+        return Fts5Index(apps, connection)
+    return InvertedIndex(apps, connection)
+
+
+def index_post(post):
+    get_index().update(post.pk, post.text)
+
+
+def remove_post(post_id):
+    get_index().remove(post_id)
+
+
+def filter_posts(queryset, query):
+    terms = query_terms(query)
+    if not terms:
+        return queryset.none()
+    return get_index().filter(queryset, terms)
+
+
+def search_page(request, query):
+    """Страница результатов поиска по релевантности.
+
+    Порядок по рангу не подходит для курсоров по дате, поэтому
+    страницы здесь нумерованные.
+    """
+    per_page = settings.MAX_LENGHT_POSTS
+    number = _page_number(request.GET.get('page'))
+    terms = query_terms(query)
+
+    def fetch():
+        ids = []
+        if terms:
+            ids = get_index().search(
+                terms, (number - 1) * per_page, per_page + 1
+            )
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            ids[:per_page]
+        )
+        return {
+            'object_list': [posts[pk] for pk in ids[:per_page] if pk in posts],
+            'has_next': len(ids) > per_page,
+            'has_previous': number > 1,
+            'next_cursor': None,
+            'previous_cursor': None,
+        }
+
+    page = CursorPage(fetch, token=f'page-{number}')
+    page.number = number
+    return page
@@ -0,0 +1,110 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from tasks.queue import enqueue
+
+from . import cache_versions, feeds, media, search
+from .cache_versions import AUTHOR, FEED, GROUP, POST, TIMELINE, scope_key
+from .models import Comment, Follow, Group, Post
+
+
+def post_feed_keys(post, *group_ids):
+    keys = [
+        scope_key(FEED),
+        scope_key(AUTHOR, post.author_id),
+        scope_key(POST, post.pk),
+    ]
+    keys += [
+        scope_key(GROUP, group_id)
+        for group_id in set(group_ids) if group_id is not None
+    ]
+    return keys
+
+
+def bump_follower_timelines(author_id):
+    followers = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    cache_versions.bump(*[
+        scope_key(TIMELINE, user_id) for user_id in followers.iterator()
+    ])
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_state(sender, instance, **kwargs):
+    instance._old_group_id = None
+    instance._old_files = set()
+    if instance.pk is None:
+        return
+    row = Post.objects.filter(pk=instance.pk).values_list(
+        'group_id', 'image', 'thumbnails'
+    ).first()
+    if row is not None:
+        instance._old_group_id = row[0]
+        instance._old_files = media.references(row[1], row[2])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    cache_versions.bump(*post_feed_keys(
+        instance,
+        instance.group_id,
+        getattr(instance, '_old_group_id', None),
+    ))
+    enqueue('posts.bump_timelines', instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def count_file_references(sender, instance, **kwargs):
+    media.replace(
+        getattr(instance, '_old_files', set()),
+        media.post_references(instance),
+    )
+
+
+@receiver(post_delete, sender=Post)
+def release_files(sender, instance, **kwargs):
+    media.release(media.post_references(instance))
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def forget_feed_entry(sender, instance, **kwargs):
+    feeds.forget(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_feeds(sender, instance, **kwargs):
+    post = Post.objects.filter(pk=instance.post_id).only(
+        'author_id', 'group_id'
+    ).first()
+    if post is not None:
+        cache_versions.bump(*post_feed_keys(post, post.group_id))
+        enqueue('posts.bump_timelines', post.author_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_timeline(sender, instance, **kwargs):
+    cache_versions.bump(
+        scope_key(TIMELINE, instance.user_id),
+        scope_key(AUTHOR, instance.author_id),
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_feeds(sender, instance, **kwargs):
+    cache_versions.bump(scope_key(FEED), scope_key(GROUP, instance.pk))
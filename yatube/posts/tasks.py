@@ -0,0 +1,44 @@
+from tasks.queue import task
+
+from . import cache_versions, feeds, thumbnails, timeline, uploads
+from .cache_versions import TIMELINE, scope_key
+from .models import Post
+from .signals import bump_follower_timelines
+
+
+@task('posts.generate_thumbnails')
+def generate_thumbnails(post_id):
+    thumbnails.generate(post_id)
+
+
+@task('posts.process_image')
+def process_image(post_id, name):
+    uploads.attach(post_id, name)
+
+
+@task('posts.fan_out')
+def fan_out(post_id):
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=post_id
+    ).first()
+    if post is not None:
+        timeline.fan_out(post)
+        feeds.remember(post)
+        bump_follower_timelines(post.author_id)
+
+
+@task('posts.backfill_timeline')
+def backfill_timeline(user_id, *author_ids):
+    timeline.backfill(user_id, *author_ids)
+    cache_versions.bump(scope_key(TIMELINE, user_id))
+
+
+@task('posts.push_author')
+def push_author(author_id):
+    timeline.push_author(author_id)
+    bump_follower_timelines(author_id)
+
+
+@task('posts.bump_timelines')
+def bump_timelines(author_id):
+    bump_follower_timelines(author_id)
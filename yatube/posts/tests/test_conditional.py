@@ -0,0 +1,95 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='title', slug='slug', description='description'
+        )
+        cls.post = Post.objects.create(
+            text='text', author=cls.author, group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:home_page'),
+            reverse('posts:group_posts', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def revalidate(self, client, url):
+        etag = client.get(url)['ETag']
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_not_modified(self):
+        """Повторный запрос с ETag получает 304 без тела."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.revalidate(self.client, url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(response.content, b'')
+
+    def test_not_modified_is_cheap(self):
+        """Ответ 304 на ленту не обращается к базе."""
+        url = reverse('posts:home_page')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_writes_change_etag(self):
+        """Новый пост или комментарий меняют валидатор страниц."""
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls}
+        Post.objects.create(text='new', author=self.author, group=self.group)
+        Comment.objects.create(post=self.post, author=self.author, text='c')
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_etag_depends_on_viewer(self):
+        """Гость и вошедший пользователь получают разные ETag."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotEqual(
+                    self.client.get(url)['ETag'],
+                    self.author_client.get(url)['ETag'],
+                )
+
+    def test_etag_depends_on_csrf_token(self):
+        """Новый CSRF-токен после входа сбрасывает ETag страницы с формой."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        # Первый ответ ставит cookie с токеном.
+        self.author_client.get(url)
+        etag = self.author_client.get(url)['ETag']
+        self.assertEqual(
+            self.author_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            HTTPStatus.NOT_MODIFIED,
+        )
+        self.author_client.cookies['csrftoken'] = 'rotated'
+        response = self.author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_cache_control(self):
+        """Анонимные ответы публичные, ответы пользователю приватные."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertIn('public', self.client.get(url)['Cache-Control'])
+                self.assertIn(
+                    'private', self.author_client.get(url)['Cache-Control']
+                )
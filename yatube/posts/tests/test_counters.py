@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import AuthorStats, Group, Post
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='title',
+            slug='slug',
+            description='description',
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def create_post(self):
+        self.author_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'text', 'group': self.group.pk},
+        )
+        return Post.objects.latest('pk')
+
+    def test_post_and_comment_counters(self):
+        """Создание поста и комментария обновляет счётчики."""
+        post = self.create_post()
+        self.reader_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            data={'text': 'comment'},
+        )
+        post.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).posts_count, 1
+        )
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.reader).comments_count, 1
+        )
+
+    def test_follow_counters(self):
+        """Подписка и отписка обновляют счётчики подписчиков."""
+        url_kwargs = {'username': self.author.username}
+        self.reader_client.get(
+            reverse('posts:profile_follow', kwargs=url_kwargs)
+        )
+        stats = AuthorStats.objects.get(user=self.author)
+        self.assertEqual(stats.followers_count, 1)
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', kwargs=url_kwargs)
+        )
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', kwargs=url_kwargs)
+        )
+        stats.refresh_from_db()
+        self.assertEqual(stats.followers_count, 0)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.reader).following_count, 0
+        )
+
+    def test_reconcile_fixes_drift(self):
+        """Команда reconcile_counters исправляет расхождения."""
+        post = self.create_post()
+        Post.objects.filter(pk=post.pk).update(comments_count=5)
+        AuthorStats.objects.filter(user=self.author).update(posts_count=7)
+        Group.objects.filter(pk=self.group.pk).update(posts_count=0)
+        call_command('reconcile_counters', stdout=StringIO())
+        post.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).posts_count, 1
+        )
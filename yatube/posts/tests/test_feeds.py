@@ -0,0 +1,124 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import actions, feeds, follows
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(SYNDICATION_ITEMS=3)
+class FeedsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {i}'
+            )
+            for i in range(4)
+        ]
+        follows.follow(cls.reader.pk, [cls.author.pk])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_formats(self):
+        """Каждая лента отдаётся в RSS и Atom с последними постами."""
+        feeds_args = (
+            ('posts:posts_feed', []),
+            ('posts:group_feed', ['group']),
+            ('posts:profile_feed', ['author']),
+            ('posts:follow_feed', [feeds.follow_token(self.reader)]),
+        )
+        for name, args in feeds_args:
+            for fmt, marker in (('rss', '<rss'), ('atom', '<feed')):
+                with self.subTest(name=name, fmt=fmt):
+                    response = self.client.get(
+                        reverse(name, args=[fmt, *args])
+                    )
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+                    body = response.content.decode()
+                    self.assertIn(marker, body)
+                    self.assertIn('Пост 3', body)
+                    self.assertNotIn('Пост 0', body)
+
+    def test_unknown_feeds(self):
+        """Неизвестный формат, группа или подделанный токен -- 404."""
+        for url in (
+            reverse('posts:posts_feed', args=['json']),
+            reverse('posts:group_feed', args=['rss', 'missing']),
+            reverse('posts:follow_feed', args=['rss', 'forged:token']),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_reset_follow_token(self):
+        """Сброс ссылки отзывает старый токен и в ленте, и в потоке."""
+        old = feeds.follow_token(self.reader)
+        self.assertEqual(feeds.follow_token(self.reader), old)
+        url = reverse('posts:follow_feed_reset')
+        self.client.force_login(self.reader)
+        response = self.client.get(url)
+        self.assertEqual(
+            response.status_code, HTTPStatus.METHOD_NOT_ALLOWED
+        )
+        self.assertRedirects(
+            self.client.post(url), reverse('posts:follow_index')
+        )
+        new = feeds.follow_token(self.reader)
+        self.assertNotEqual(new, old)
+        old_url = reverse('posts:follow_feed', args=['atom', old])
+        self.assertEqual(
+            self.client.get(old_url).status_code, HTTPStatus.NOT_FOUND
+        )
+        self.assertIsNone(feeds.follow_user_id(old))
+        self.assertEqual(feeds.follow_user_id(new), self.reader.pk)
+        response = self.client.get(
+            reverse('posts:follow_feed', args=['atom', new])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_legacy_token_rejected(self):
+        """Токен без ключа пользователя больше не открывает ленту."""
+        token = signing.dumps(self.reader.pk, salt=feeds.TOKEN_SALT)
+        self.assertIsNone(feeds.follow_user_id(token))
+
+    def test_conditional_get(self):
+        """Опрос без новых постов получает 304, новый пост меняет ETag."""
+        url = reverse('posts:group_feed', args=['atom', 'group'])
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        actions.create_post(
+            Post(author=self.author, group=self.group, text='Свежий')
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('Свежий', response.content.decode())
+
+    def test_only_new_entries_are_rendered(self):
+        """Записи берутся из кеша; новый пост рендерится при публикации."""
+        posts = Post.objects.filter(author=self.author)
+        feeds.entries(posts)
+        with self.assertNumQueries(1):
+            feeds.entries(posts)
+        post = Post(author=self.author, text='Новый')
+        actions.create_post(post)
+        with self.assertNumQueries(1):
+            entries = feeds.entries(posts)
+        self.assertEqual(entries[0]['title'], 'Новый')
+        post.text = 'Исправленный'
+        post.save()
+        self.assertEqual(feeds.entries(posts)[0]['title'], 'Исправленный')
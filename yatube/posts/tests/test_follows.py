@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase, override_settings
+
+from .. import follows
+from ..models import AuthorStats, Follow
+
+User = get_user_model()
+
+
+@override_settings(MAX_LENGHT_POSTS=2)
+class FollowGraphTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(username=f'user{i}') for i in range(6)
+        ]
+        cls.ids = [user.pk for user in cls.users]
+
+    def stats(self, user_id):
+        return AuthorStats.objects.get(user_id=user_id)
+
+    def test_bulk_follow(self):
+        """Массовая подписка пропускает себя и уже существующие."""
+        me, *authors = self.ids
+        Follow.objects.create(user_id=me, author_id=authors[0])
+        with self.assertNumQueries(9):
+            new = follows.follow(me, [me] + authors)
+        self.assertEqual(new, set(authors[1:]))
+        self.assertEqual(Follow.objects.filter(user_id=me).count(), 5)
+        self.assertEqual(self.stats(me).following_count, 4)
+        self.assertEqual(self.stats(authors[1]).followers_count, 1)
+        self.assertEqual(follows.follow(me, authors), set())
+
+    def test_bulk_unfollow(self):
+        """Массовая отписка снимает только существующие подписки."""
+        me, *authors = self.ids
+        follows.follow(me, authors[:3])
+        removed = follows.unfollow(me, authors)
+        self.assertEqual(removed, set(authors[:3]))
+        self.assertFalse(Follow.objects.filter(user_id=me).exists())
+        self.assertEqual(self.stats(me).following_count, 0)
+        self.assertEqual(self.stats(authors[0]).followers_count, 0)
+
+    def test_following_ids_in_one_query(self):
+        """Состояние подписок для страницы авторов -- один запрос."""
+        me, *authors = self.ids
+        follows.follow(me, authors[::2])
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                follows.following_ids(me, authors), set(authors[::2])
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual(follows.following_ids(None, authors), set())
+
+    def test_followers_keyset_pages(self):
+        """Список подписчиков листается по курсору, новые первыми."""
+        author, *readers = self.users
+        for reader in readers:
+            follows.follow(reader.pk, [author.pk])
+        factory = RequestFactory()
+        page = follows.followers_page(factory.get('/'), author)
+        seen = list(page)
+        while page.has_next():
+            page = follows.followers_page(
+                factory.get('/', {'cursor': page.next_cursor}), author
+            )
+            seen += list(page)
+        self.assertEqual(seen, readers[::-1])
+
+    def test_mutual_and_suggestions(self):
+        """Взаимные подписки и рекомендации через подписки подписок."""
+        me, friend, other, popular, niche, _ = self.ids
+        follows.follow(me, [friend, other])
+        follows.follow(friend, [me, popular, niche])
+        follows.follow(other, [popular])
+        self.assertEqual(follows.mutual_ids(me), {friend})
+        with self.assertNumQueries(2):
+            suggested = follows.suggestions(me)
+        self.assertEqual(
+            [user.pk for user in suggested], [popular, niche]
+        )
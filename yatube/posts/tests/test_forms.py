@@ -93,7 +93,9 @@ class PostCreateAndEditFormTests(TestCase):
         self.assertEqual(post.text, form_data['text'])
         self.assertEqual(post.group.pk, form_data['group'])
         self.assertEqual(post.author, self.author)
-        self.assertEqual(post.image.name, f'posts/{form_data["image"].name}')
+        self.assertRegex(
+            post.image.name, r'^posts/[0-9a-f]{2}/[0-9a-f]{64}\.gif$'
+        )
 
     def test_edit_post(self):
         """Валидная форма изменит запись в таблице Posts
@@ -177,3 +179,49 @@ class PostCreateAndEditFormTests(TestCase):
         )
         self.assertEqual(Comment.objects.count(), count_comments)
         self.assertNotEqual(self.post.comments.last(), form_data['text'])
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, TASKS_EAGER=True)
+class PostThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def test_thumbnail_generated_on_save(self):
+        """Миниатюра создаётся при сохранении формы и выводится
+           в шаблоне без sorl."""
+        test_pic = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        self.client.post(reverse('posts:post_create'), data={
+            'text': 'with image',
+            'image': SimpleUploadedFile(
+                name='thumb_pic.gif',
+                content=test_pic,
+                content_type='image/gif'
+            ),
+        })
+        post = Post.objects.latest('pk')
+        size = settings.POST_THUMBNAIL_SIZES[0]
+        thumbnail = post.thumbnail_for(size)
+        self.assertEqual(
+            f"{thumbnail['width']}x{thumbnail['height']}", size
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertContains(response, thumbnail['url'])
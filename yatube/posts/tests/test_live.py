@@ -0,0 +1,51 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from live import events
+from live.models import Event
+
+from .. import actions, feeds, follows
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(LIVE_UPDATES_ENABLED=True)
+class LiveEventsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+
+    def test_post_and_comment_events(self):
+        """Новый пост и комментарий попадают в журнал своих каналов."""
+        post = Post(author=self.author, group=self.group, text='Пост')
+        actions.create_post(post)
+        comment = Comment(post=post, author=self.reader, text='Ок')
+        actions.create_comment(comment)
+        post_event, comment_event = Event.objects.all()
+        self.assertEqual(set(post_event.channels.split()), {
+            'feed', f'author:{self.author.pk}', f'group:{self.group.pk}',
+        })
+        self.assertEqual(json.loads(post_event.data)['group'], 'group')
+        self.assertEqual(comment_event.channels, f'post:{post.pk}')
+        self.assertEqual(json.loads(comment_event.data)['text'], 'Ок')
+
+    def test_streams(self):
+        """Пути потоков превращаются в каналы, неизвестные -- в None."""
+        follows.follow(self.reader.pk, [self.author.pk])
+        token = feeds.follow_token(self.reader)
+        self.assertEqual(events.resolve('feed/'), ['feed'])
+        self.assertEqual(
+            events.resolve('group/group/'), [f'group:{self.group.pk}']
+        )
+        self.assertEqual(
+            events.resolve(f'follow/{token}/'), [f'author:{self.author.pk}']
+        )
+        self.assertIsNone(events.resolve('group/missing/'))
+        self.assertIsNone(events.resolve('posts/999/'))
@@ -0,0 +1,124 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TransactionTestCase, override_settings
+from PIL import Image
+
+from .. import actions, media, thumbnails
+from ..models import Post, StoredFile
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def png(color):
+    content = BytesIO()
+    Image.new('RGB', (4, 4), color).save(content, 'PNG')
+    return ContentFile(content.getvalue(), name='picture.png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaReferencesTest(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create(self, color):
+        post = Post.objects.create(
+            author=self.author, text='Текст', image=png(color)
+        )
+        thumbnails.generate(post.pk)
+        post.refresh_from_db()
+        return post
+
+    def refs(self):
+        return dict(StoredFile.objects.values_list('name', 'refs'))
+
+    def test_shared_until_last_post_deleted(self):
+        """Общие картинка и миниатюры живут, пока на них ссылается пост."""
+        first, second = self.create('red'), self.create('red')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.thumbnails, second.thumbnails)
+        names = media.post_references(first)
+        self.assertEqual(self.refs(), dict.fromkeys(names, 2))
+        actions.delete_post(first)
+        self.assertEqual(self.refs(), dict.fromkeys(names, 1))
+        self.assertTrue(all(default_storage.exists(name) for name in names))
+        actions.delete_post(second)
+        self.assertEqual(self.refs(), {})
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+
+    def test_replaced_image_removed(self):
+        """Сменённая картинка удаляется вместе со своими миниатюрами."""
+        post = self.create('blue')
+        old_names = media.post_references(post)
+        old_image = post.image.name
+        post.image = png('green')
+        actions.update_post(
+            post, None, self.author.pk, image_changed=True,
+            old_image=old_image,
+        )
+        post.refresh_from_db()
+        self.assertFalse(
+            any(default_storage.exists(name) for name in old_names)
+        )
+        self.assertEqual(set(self.refs()), media.post_references(post))
+
+    def test_author_deleted(self):
+        """Посты удалённого автора освобождают свои файлы."""
+        names = media.post_references(self.create('red'))
+        self.author.delete()
+        self.assertEqual(self.refs(), {})
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+
+    def test_reused_file_restored(self):
+        """Файл, удалённый между сохранением и ссылкой поста, пишется
+        заново."""
+        first = self.create('red')
+        second = Post.objects.create(
+            author=self.author, text='Текст', image=png('red')
+        )
+        real_save = default_storage.save
+
+        def save_then_delete_first(name, content):
+            name = real_save(name, content)
+            if Post.objects.filter(pk=first.pk).exists():
+                actions.delete_post(first)
+                self.assertFalse(default_storage.exists(name))
+            return name
+
+        with mock.patch.object(
+            thumbnails.default_storage, 'save', save_then_delete_first
+        ):
+            thumbnails.generate(second.pk)
+        second.refresh_from_db()
+        names = media.post_references(second)
+        self.assertEqual(self.refs(), dict.fromkeys(names, 1))
+        self.assertTrue(all(default_storage.exists(name) for name in names))
+
+    def test_reconcile_and_sweep(self):
+        """Пересчёт чинит счётчики, а файлы без ссылок удаляются."""
+        post = self.create('red')
+        orphan = default_storage.save('posts/x.png', png('black'))
+        StoredFile.objects.all().delete()
+        self.assertEqual(media.reconcile(), 2)
+        self.assertEqual(
+            self.refs(), dict.fromkeys(media.post_references(post), 1)
+        )
+        self.assertEqual(media.sweep('posts'), [])
+        self.assertEqual(
+            media.sweep('posts', timedelta(seconds=-60)), [orphan]
+        )
+        self.assertFalse(os.path.exists(default_storage.path(orphan)))
+        self.assertTrue(default_storage.exists(post.image.name))
@@ -0,0 +1,144 @@
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from core import db_routers
+from core.db_routers import PrimaryReplicaRouter
+
+from .. import cache_versions, middleware
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='title', slug='slug', description='description'
+        )
+        cls.post = Post.objects.create(
+            text='text', author=cls.author, group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:home_page'),
+            reverse('posts:group_posts', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        middleware.page_stats.clear()
+
+    def test_hit_skips_view(self):
+        """Повторная страница гостю отдаётся из кеша без рендеринга."""
+        url = reverse('posts:home_page')
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertIsNone(second.context)
+        self.assertEqual(first.content, second.content)
+        self.assertNotIn('sessionid', second.cookies)
+
+    def test_writes_invalidate_pages(self):
+        """Записи постов и комментариев сразу сбрасывают страницы."""
+        for url in self.urls:
+            self.client.get(url)
+        Post.objects.create(
+            text='fresh post', author=self.author, group=self.group
+        )
+        Comment.objects.create(
+            post=self.post, author=self.author, text='fresh comment'
+        )
+        for url in self.urls[:3]:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'fresh post')
+        self.assertContains(self.client.get(self.urls[3]), 'fresh comment')
+
+    def test_logged_in_users_bypass_cache(self):
+        """Вошедшие пользователи не получают и не наполняют кеш."""
+        client = Client()
+        client.force_login(self.author)
+        url = reverse('posts:home_page')
+        client.get(url)
+        self.assertIsNotNone(client.get(url).context)
+        self.assertIsNotNone(self.client.get(url).context)
+
+    def test_hit_ratio(self):
+        """Статистика считает попадания и промахи по представлениям."""
+        url = reverse('posts:home_page')
+        for _ in range(4):
+            self.client.get(url)
+        self.assertEqual(
+            middleware.stats()['posts:home_page'],
+            {'hits': 3, 'misses': 1, 'ratio': 0.75},
+        )
+        out = StringIO()
+        call_command('page_cache_stats', stdout=out)
+        self.assertIn('75.0%', out.getvalue())
+
+    @override_settings(INSTRUMENTATION_FLUSH_INTERVAL=3600)
+    def test_stats_stay_in_process(self):
+        """Счёт запросов не пишет в общий кеш до сброса по интервалу."""
+        url = reverse('posts:home_page')
+        for _ in range(3):
+            self.client.get(url)
+        self.assertIsNone(cache.get(middleware.page_stats.worker_key))
+        self.assertEqual(middleware.stats()['posts:home_page']['hits'], 2)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaLagTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.replica_reads = []
+        read = PrimaryReplicaRouter.db_for_read
+
+        # Реплика отстаёт: чтения, ушедшие на неё, запоминаются
+        # и выполняются на основной базе.
+        def lagging_read(router, model, **hints):
+            alias = read(router, model, **hints)
+            if alias == 'replica':
+                self.replica_reads.append(model)
+                return None
+            return alias
+
+        for patcher in (
+            mock.patch.object(
+                PrimaryReplicaRouter, 'db_for_read', lagging_read
+            ),
+            mock.patch.object(
+                db_routers, 'available_replicas', return_value=['replica']
+            ),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_fresh_versions_read_primary(self):
+        """Страницу под свежей версией читают с основной базы."""
+        url = reverse('posts:home_page')
+        Post.objects.create(text='fresh post', author=self.author)
+        self.assertContains(self.client.get(url), 'fresh post')
+        self.assertNotIn(Post, self.replica_reads)
+
+    def test_settled_versions_read_replica(self):
+        """Когда реплика догнала запись, страницу читают с реплики."""
+        url = reverse('posts:home_page')
+        written = time.time() - settings.DATABASE_REPLICA_PIN_SECONDS - 2
+        with mock.patch.object(cache_versions, 'time') as clock:
+            clock.time.return_value = written
+            Post.objects.create(text='settled post', author=self.author)
+        self.assertContains(self.client.get(url), 'settled post')
+        self.assertIn(Post, self.replica_reads)
@@ -0,0 +1,88 @@
+import re
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?posts_\w+( AS \w+)?$')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+@override_settings(POSTS_TIMELINE_ENABLED=True)
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='title',
+            slug='slug',
+            description='description',
+        )
+        for number in range(25):
+            cls.post = Post.objects.create(
+                text=f'text {number}', author=cls.author, group=cls.group
+            )
+        Comment.objects.create(post=cls.post, author=cls.reader, text='c')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}
+        ))
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def feed_queries(self, url):
+        """SQL всех запросов к таблицам posts для первой, второй
+        (?page=2) и следующей по курсору страниц."""
+        queries = []
+        for params in ({}, {'page': 2}):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url, params)
+            queries += context.captured_queries
+            page = response.context.get('page_obj')
+            if page is not None and page.has_next():
+                with CaptureQueriesContext(connection) as context:
+                    self.client.get(url, {'cursor': page.next_cursor})
+                queries += context.captured_queries
+        return [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and 'posts_' in query['sql']
+        ]
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент не сканируют таблицы и не сортируют во
+        временном B-дереве."""
+        urls = (
+            reverse('posts:home_page'),
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:follow_index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for url in urls:
+            for sql in self.feed_queries(url):
+                plan = self.explain(sql)
+                with self.subTest(url=url, sql=sql, plan=plan):
+                    self.assertFalse(
+                        [step for step in plan if FULL_SCAN.match(step)]
+                    )
+                    self.assertFalse(
+                        [step for step in plan if TEMP_SORT in step]
+                    )
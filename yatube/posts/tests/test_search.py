@@ -0,0 +1,105 @@
+from importlib import import_module
+from unittest import mock, skipUnless
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, SearchTerm
+from ..search import (FTS_TABLE, InvertedIndex, filter_posts, fts5_available,
+                      get_index)
+from ..stemmer import stem
+
+User = get_user_model()
+
+
+class StemmerTest(TestCase):
+    def test_word_forms_share_stem(self):
+        """Формы одного слова сводятся к общей основе."""
+        for forms in (
+            ('книга', 'книги', 'книгами'),
+            ('красивый', 'красивая', 'красивые'),
+            ('ёлка', 'елки'),
+        ):
+            with self.subTest(forms=forms):
+                self.assertEqual(len({stem(word) for word in forms}), 1)
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.books = Post.objects.create(
+            author=cls.author,
+            text='Читаю книги про книги и красивые города',
+        )
+        cls.city = Post.objects.create(
+            author=cls.author,
+            text='Красивый город у моря',
+        )
+        Post.objects.create(author=cls.author, text='Совсем о другом')
+
+    def setUp(self):
+        self.client = Client()
+
+    def search(self, query):
+        response = self.client.get(
+            reverse('posts:post_search'), {'q': query}
+        )
+        return list(response.context['page_obj'])
+
+    def test_search_finds_word_forms(self):
+        """Поиск находит посты по другим формам слов."""
+        self.assertEqual(self.search('книгами'), [self.books])
+        self.assertCountEqual(
+            self.search('красивая'), [self.books, self.city]
+        )
+        self.assertEqual(self.search('красивый море'), [self.city])
+        self.assertEqual(self.search('самолёт'), [])
+        self.assertEqual(self.search(''), [])
+
+    def test_index_follows_edit_and_delete(self):
+        """Индекс обновляется при правке и удалении поста."""
+        city = Post.objects.get(pk=self.city.pk)
+        city.text = 'Тихая деревня'
+        city.save()
+        self.assertEqual(self.search('город'), [self.books])
+        self.assertEqual(self.search('деревни'), [city])
+        Post.objects.filter(pk=self.books.pk).delete()
+        self.assertEqual(self.search('книга'), [])
+
+    def test_admin_filter(self):
+        """Фильтр для админки отбирает посты через индекс."""
+        self.assertEqual(
+            list(filter_posts(Post.objects.all(), 'городами')),
+            [self.city, self.books],
+        )
+
+    def test_inverted_index_fallback(self):
+        """Обратный индекс ищет и ранжирует так же, как FTS5."""
+        index = InvertedIndex()
+        index.rebuild()
+        self.assertTrue(SearchTerm.objects.exists())
+        for terms in (['книг'], ['красив'], ['красив', 'мор'], ['самолет']):
+            with self.subTest(terms=terms):
+                self.assertEqual(
+                    index.search(terms, 0, 10),
+                    get_index().search(terms, 0, 10),
+                )
+        index.remove(self.books.pk)
+        self.assertEqual(index.search(['красив'], 0, 10), [self.city.pk])
+
+    @skipUnless(fts5_available(), 'SQLite без FTS5')
+    def test_migration_uses_schema_editor_connection(self):
+        """Миграция индекса работает с базой schema_editor."""
+        migration = import_module('posts.migrations.0013_search')
+        other = mock.MagicMock(vendor='sqlite', alias='other')
+        schema_editor = mock.Mock(connection=other)
+        with self.assertNumQueries(0):
+            migration.drop_search_index(apps, schema_editor)
+        cursor = other.cursor.return_value.__enter__.return_value
+        cursor.execute.assert_called_once_with(
+            f'DROP TABLE IF EXISTS {FTS_TABLE}'
+        )
@@ -0,0 +1,118 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import AuthorStats, Comment, Follow, Group, Post
+from ..search import filter_posts
+
+User = get_user_model()
+
+
+class TransferTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.author = User.objects.create_user(
+            username='author', password='secret'
+        )
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='title', slug='slug', description='description'
+        )
+        self.posts = [
+            Post.objects.create(
+                text=f'Пост номер {i}', author=self.author, group=self.group
+            )
+            for i in range(5)
+        ]
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='comment'
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def snapshot(self):
+        return {
+            'users': list(User.objects.order_by('username').values_list(
+                'username', 'password'
+            )),
+            'posts': list(Post.objects.order_by('pk').values_list(
+                'pk', 'text', 'pub_date', 'author__username', 'group__slug'
+            )),
+            'comments': list(Comment.objects.values_list(
+                'pk', 'post_id', 'author__username', 'created'
+            )),
+            'follows': list(Follow.objects.values_list(
+                'user__username', 'author__username'
+            )),
+        }
+
+    def test_round_trip(self):
+        """Экспорт и импорт в пустую базу сохраняют данные и id постов."""
+        path = os.path.join(self.directory, 'dump.ndjson.gz')
+        expected = self.snapshot()
+        call_command('export_yatube', path, stderr=StringIO())
+        with gzip.open(path, 'rt', encoding='utf-8') as dump:
+            models = [json.loads(line)['model'] for line in dump]
+        self.assertEqual(models.count('post'), len(self.posts))
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+        call_command('import_yatube', path, batch_size=2, stdout=StringIO())
+        self.assertEqual(self.snapshot(), expected)
+        stats = AuthorStats.objects.get(user__username='author')
+        self.assertEqual(stats.posts_count, len(self.posts))
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(
+            filter_posts(Post.objects.all(), 'постами').count(),
+            len(self.posts),
+        )
+
+    def test_import_is_idempotent_and_skips_broken_records(self):
+        """Повторный импорт не дублирует строки, битые записи пропускаются."""
+        path = os.path.join(self.directory, 'dump.ndjson')
+        call_command('export_yatube', path, stderr=StringIO())
+        with open(path, 'a', encoding='utf-8') as dump:
+            dump.write('not json\n')
+            dump.write(json.dumps({
+                'model': 'follow',
+                'user_username': 'ghost',
+                'author_username': 'author',
+            }) + '\n')
+        expected = self.snapshot()
+        out = StringIO()
+        call_command('import_yatube', path, stdout=out)
+        self.assertEqual(self.snapshot(), expected)
+        self.assertIn('invalid: пропущено 1', out.getvalue())
+        self.assertIn('post: записано 0', out.getvalue())
+        self.assertIn('follow: пропущено 2', out.getvalue())
+
+    def test_taken_post_id_gets_new_id(self):
+        """Пост с занятым id получает новый, комментарии идут за ним."""
+        path = os.path.join(self.directory, 'dump.ndjson')
+        call_command('export_yatube', path, stderr=StringIO())
+        taken = self.posts[0].pk
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        local = User.objects.create_user(username='local')
+        Post.objects.create(id=taken, text='Чужой пост', author=local)
+
+        out = StringIO()
+        call_command('import_yatube', path, stdout=out)
+        self.assertIn('post: записано 5', out.getvalue())
+        self.assertIn('comment: записано 1', out.getvalue())
+        self.assertEqual(Post.objects.get(pk=taken).text, 'Чужой пост')
+        self.assertFalse(Comment.objects.filter(post_id=taken).exists())
+        comment = Comment.objects.get()
+        self.assertEqual(comment.post.text, 'Пост номер 0')
+        self.assertEqual(comment.post.author.username, 'author')
+        post = Post.objects.create(text='Новый', author=local)
+        self.assertGreater(post.pk, comment.post_id)
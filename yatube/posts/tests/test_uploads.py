@@ -0,0 +1,105 @@
+import os
+import shutil
+import struct
+import tempfile
+import zlib
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_INCOMING_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def jpeg_with_exif():
+    image = Image.new('RGB', (4, 2), 'red')
+    exif = Image.Exif()
+    exif[0x010F] = 'Camera'
+    exif[0x0112] = 6
+    content = BytesIO()
+    image.save(content, 'JPEG', exif=exif)
+    return content.getvalue()
+
+
+def png_bomb(width, height):
+    """Заголовок PNG огромного размера: сами пиксели не нужны."""
+    def chunk(kind, data):
+        crc = zlib.crc32(kind + data) & 0xffffffff
+        return struct.pack('>I', len(data)) + kind + data + struct.pack(
+            '>I', crc
+        )
+    header = struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)
+    return (
+        b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+        + chunk(b'IDAT', zlib.compress(b'')) + chunk(b'IEND', b'')
+    )
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_UPLOAD_INCOMING_DIR=TEMP_INCOMING_DIR
+)
+class UploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(TEMP_INCOMING_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def upload(self, content, name='picture.jpg'):
+        return self.client.post(reverse('posts:post_create'), data={
+            'text': 'С картинкой',
+            'image': SimpleUploadedFile(name, content, 'image/jpeg'),
+        })
+
+    def test_rejected_uploads(self):
+        """Не-картинка, большой файл и «бомба» не проходят форму."""
+        cases = (
+            (b'<?php echo 1; ?>', {}, 'JPEG, PNG, GIF или WebP'),
+            (jpeg_with_exif(), {'IMAGE_UPLOAD_MAX_SIZE': 10}, 'Файл больше'),
+            (png_bomb(50_000, 50_000), {}, 'слишком большая'),
+            (jpeg_with_exif(), {'IMAGE_MAX_PIXELS': 4}, 'слишком большая'),
+        )
+        for content, limits, message in cases:
+            with self.subTest(message=message), self.settings(**limits):
+                response = self.upload(content)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(
+                    message, ' '.join(response.context['form'].errors['image'])
+                )
+        self.assertFalse(Post.objects.exists())
+
+    def test_reencoded_without_exif(self):
+        """Картинка перекодирована без EXIF и повёрнута по ориентации."""
+        self.upload(jpeg_with_exif())
+        post = Post.objects.get()
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (2, 4))
+            self.assertFalse(image.getexif())
+        self.assertEqual(os.listdir(TEMP_INCOMING_DIR), [])
+
+    def test_duplicates_share_file(self):
+        """Одинаковые загрузки лежат на диске одним файлом."""
+        self.upload(jpeg_with_exif(), 'first.jpg')
+        self.upload(jpeg_with_exif(), 'second.jpg')
+        first, second = Post.objects.order_by('pk')
+        self.assertEqual(first.image.name, second.image.name)
+        directory = os.path.dirname(first.image.path)
+        self.assertEqual(len(os.listdir(directory)), 1)
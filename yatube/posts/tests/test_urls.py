@@ -61,6 +61,7 @@ class PostsUrlTest(TestCase):
                     kwargs={'post_id':
                             self.FAKE_POST_ID}): HTTPStatus.FOUND,
             reverse('posts:follow_index'): HTTPStatus.FOUND,
+            reverse('posts:post_search'): HTTPStatus.OK,
         }
         for url, code in respone_urls_code.items():
             with self.subTest(url=url):
@@ -1,15 +1,17 @@
 import shutil
 import tempfile
+from io import StringIO
 
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from ..models import Comment, Follow, Group, Post
+from ..models import AuthorStats, Comment, Follow, Group, Post
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -58,6 +60,122 @@ class PaginatorViewsTest(TestCase):
                     )
 
 
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='title',
+            slug='slug',
+            description='description',
+        )
+        cls.user = User.objects.create_user(username='author')
+        cls.posts_on_first_page = settings.MAX_LENGHT_POSTS
+        cls.posts_on_second_page = 3
+        Post.objects.bulk_create([
+            Post(text=f'Post {i}', author=cls.user, group=cls.group)
+            for i in range(cls.posts_on_first_page
+                           + cls.posts_on_second_page)
+        ])
+        cls.urls = (
+            reverse('posts:home_page'),
+            reverse('posts:group_posts', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user.username}),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cursor_pages(self):
+        """Переход по курсору отдаёт следующую и предыдущую страницы."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.client.get(url).context['page_obj']
+                self.assertEqual(len(first), self.posts_on_first_page)
+                self.assertTrue(first.has_next())
+                self.assertFalse(first.has_previous())
+                second = self.client.get(
+                    url, {'cursor': first.next_cursor}
+                ).context['page_obj']
+                self.assertEqual(len(second), self.posts_on_second_page)
+                self.assertFalse(second.has_next())
+                self.assertTrue(second.has_previous())
+                self.assertFalse(set(first) & set(second))
+                back = self.client.get(
+                    url, {'cursor': second.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(list(back), list(first))
+
+    def test_old_page_links(self):
+        """Ссылки вида ?page= продолжают работать."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                page = self.client.get(url, {'page': 2}).context['page_obj']
+                self.assertEqual(len(page), self.posts_on_second_page)
+                self.assertTrue(page.has_previous())
+
+    def test_broken_cursor(self):
+        """Испорченный курсор возвращает первую страницу."""
+        page = self.client.get(
+            self.urls[0], {'cursor': 'broken'}
+        ).context['page_obj']
+        self.assertEqual(len(page), self.posts_on_first_page)
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class PostDetailQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='title',
+            slug='slug',
+            description='description',
+        )
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            text='text', author=cls.user, group=cls.group
+        )
+        cls.url = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk}
+        )
+
+    def add_comments(self, count):
+        User.objects.bulk_create([
+            User(username=f'reader{i}') for i in range(count)
+        ])
+        commenters = User.objects.filter(username__startswith='reader')
+        Comment.objects.bulk_create([
+            Comment(post=self.post, author=author, text=f'Comment {i}')
+            for i, author in enumerate(commenters)
+        ])
+
+    def test_query_budget(self):
+        """Число запросов не зависит от числа комментариев."""
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        for client, budget in ((self.client, 3), (authorized_client, 5)):
+            with self.subTest(budget=budget):
+                with self.assertNumQueries(budget):
+                    client.get(self.url)
+                self.add_comments(settings.MAX_LENGHT_POSTS * 2)
+                with self.assertNumQueries(budget):
+                    client.get(self.url)
+                Comment.objects.all().delete()
+                User.objects.filter(username__startswith='reader').delete()
+
+    def test_comments_paginated(self):
+        """Комментарии выводятся постранично."""
+        self.add_comments(settings.MAX_LENGHT_POSTS + 1)
+        first = self.client.get(self.url).context['comments']
+        self.assertEqual(len(first), settings.MAX_LENGHT_POSTS)
+        second = self.client.get(
+            self.url, {'cursor': first.next_cursor}
+        ).context['comments']
+        self.assertEqual(len(second), 1)
+        self.assertFalse(set(first) & set(second))
+
+
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostPagesTest(TestCase):
     @classmethod
@@ -246,20 +364,39 @@ class PostPagesTest(TestCase):
         self.assertNotIn(self.post, response.context['page_obj'].object_list)
 
     def test_cache(self):
-        """Тест кеша главной страницы"""
+        """Тест кеша главной страницы: без записей в базу страница
+            берётся из кеша, запись сразу инвалидирует кеш."""
+        cache.clear()
+        response = self.auth_client.get(reverse('posts:home_page'))
+        Post.objects.filter(pk=self.post.pk).update(text='changed quietly')
+        response_2 = self.auth_client.get(reverse('posts:home_page'))
+        self.assertEqual(response.content, response_2.content)
         new_post = Post.objects.create(
             text='new-text',
             author=self.user
         )
-        respone = self.auth_client.get(reverse('posts:home_page'))
-        post_on_page = respone.context['page_obj']
-        self.assertIn(new_post, post_on_page)
+        response_3 = self.auth_client.get(reverse('posts:home_page'))
+        self.assertIn(new_post.text, response_3.content.decode())
         new_post.delete()
-        response_2 = self.auth_client.get(reverse('posts:home_page'))
-        self.assertEqual(respone.content, response_2.content)
+        response_4 = self.auth_client.get(reverse('posts:home_page'))
+        self.assertNotIn(new_post.text, response_4.content.decode())
+
+    def test_follow_cache_not_shared(self):
+        """Кеш ленты подписок не отдаётся ни другим пользователям,
+            ни главной странице."""
         cache.clear()
-        response_3 = self.auth_client.get(reverse('posts:home_page'))
-        self.assertNotEqual(respone.content, response_3.content)
+        Post.objects.create(text='not followed', author=self.suber)
+        follow = self.follower_client.get(reverse('posts:follow_index'))
+        self.assertNotIn('not followed', follow.content.decode())
+        for client, url in (
+            (self.follower_client, reverse('posts:home_page')),
+            (self.auth_client, reverse('posts:home_page')),
+        ):
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertIn('not followed', response.content.decode())
+        own = self.auth_client.get(reverse('posts:follow_index'))
+        self.assertEqual(len(own.context['page_obj']), 0)
 
 
 class FollowingTest(TestCase):
@@ -324,3 +461,120 @@ class FollowingTest(TestCase):
         self.user_session.get(
             reverse('posts:profile_follow', kwargs={'username': self.author}))
         self.assertEqual(Follow.objects.count(), count + 1)
+
+
+@override_settings(
+    POSTS_TIMELINE_ENABLED=True, POSTS_TIMELINE_FANOUT_LIMIT=1
+)
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='reader')
+        cls.other_reader = User.objects.create(username='other')
+        cls.author = User.objects.create(username='author')
+        cls.old_post = Post.objects.create(text='old', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_session = Client()
+        self.reader_session.force_login(self.reader)
+        self.author_session = Client()
+        self.author_session.force_login(self.author)
+
+    def follow(self, session):
+        session.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}
+        ))
+
+    def other_session(self):
+        session = Client()
+        session.force_login(self.other_reader)
+        return session
+
+    def feed(self):
+        return self.reader_session.get(
+            reverse('posts:follow_index')
+        ).context['page_obj']
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка заполняет ленту старыми постами, отписка чистит её."""
+        self.follow(self.reader_session)
+        self.assertIn(self.old_post, self.feed())
+        self.reader_session.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author}
+        ))
+        self.assertFalse(self.reader.timeline.exists())
+        self.assertNotIn(self.old_post, self.feed())
+
+    def test_new_post_fans_out(self):
+        """Новый пост попадает в ленты подписчиков при сохранении."""
+        self.follow(self.reader_session)
+        self.author_session.post(
+            reverse('posts:post_create'), data={'text': 'fresh'}
+        )
+        post = Post.objects.latest('pk')
+        self.assertTrue(self.reader.timeline.filter(post=post).exists())
+        self.assertEqual(self.feed()[0], post)
+
+    def test_popular_author_read_on_the_fly(self):
+        """Посты авторов с большим числом подписчиков читаются на лету."""
+        self.follow(self.reader_session)
+        other_session = Client()
+        other_session.force_login(self.other_reader)
+        self.follow(other_session)
+        cache.clear()
+        self.author_session.post(
+            reverse('posts:post_create'), data={'text': 'fresh'}
+        )
+        post = Post.objects.latest('pk')
+        self.assertFalse(self.reader.timeline.filter(post=post).exists())
+        self.assertEqual(list(self.feed()), [post, self.old_post])
+
+    def test_author_back_to_push_mode(self):
+        """Посты, читавшиеся на лету, раскладываются по лентам, когда
+        подписчиков становится меньше порога."""
+        self.follow(self.reader_session)
+        other_session = Client()
+        other_session.force_login(self.other_reader)
+        self.follow(other_session)
+        cache.clear()
+        self.author_session.post(
+            reverse('posts:post_create'), data={'text': 'fresh'}
+        )
+        post = Post.objects.latest('pk')
+        other_session.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author}
+        ))
+        cache.clear()
+        self.assertEqual(list(self.feed()), [post, self.old_post])
+        self.assertTrue(self.reader.timeline.filter(post=post).exists())
+
+    def test_author_stays_pulled_until_pushed(self):
+        """До раскладки постов автор читается на лету, и его посты не
+        пропадают из ленты."""
+        self.follow(self.reader_session)
+        other_session = self.other_session()
+        self.follow(other_session)
+        cache.clear()
+        self.author_session.post(
+            reverse('posts:post_create'), data={'text': 'fresh'}
+        )
+        post = Post.objects.latest('pk')
+        with self.settings(TASKS_EAGER=False):
+            other_session.get(reverse(
+                'posts:profile_unfollow', kwargs={'username': self.author}
+            ))
+            cache.clear()
+            self.assertEqual(list(self.feed()), [post, self.old_post])
+            self.assertFalse(
+                self.reader.timeline.filter(post=post).exists()
+            )
+            call_command(
+                'run_tasks', once=True, processes=0, stderr=StringIO()
+            )
+        self.assertFalse(
+            AuthorStats.objects.get(user=self.author).timeline_pull
+        )
+        self.assertTrue(self.reader.timeline.filter(post=post).exists())
+        self.assertEqual(list(self.feed()), [post, self.old_post])
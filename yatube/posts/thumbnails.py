@@ -0,0 +1,85 @@
+import json
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from tasks.queue import enqueue
+
+from . import cache_versions, media
+from .models import Post
+from .signals import bump_follower_timelines, post_feed_keys
+
+THUMBNAILS_DIR = 'posts/thumbs'
+
+
+def parse_size(size):
+    width, height = size.split('x')
+    return int(width), int(height)
+
+
+def render(image, size):
+    """Обрезка по центру с увеличением, как делал sorl crop="center"."""
+    thumbnail = ImageOps.fit(
+        image.convert('RGB'), parse_size(size), Image.LANCZOS
+    )
+    content = BytesIO()
+    thumbnail.save(content, 'JPEG', quality=85, optimize=True)
+    return thumbnail, content.getvalue()
+
+
+def generate(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    result = {}
+    contents = {}
+    with post.image.open('rb') as source, Image.open(source) as image:
+        for size in settings.POST_THUMBNAIL_SIZES:
+            thumbnail, content = render(image, size)
+            name = default_storage.save(
+                f'{THUMBNAILS_DIR}/{size}.jpg', ContentFile(content)
+            )
+            contents[name] = content
+            result[size] = {
+                'name': name,
+                'width': thumbnail.width,
+                'height': thumbnail.height,
+            }
+    thumbnails = json.dumps(result)
+    new_files = media.references(None, thumbnails)
+    # update() не шлёт сигналов: ссылки на миниатюры переносятся здесь.
+    # Строка обновляется, только если картинка и миниатюры не сменились
+    # с момента чтения.
+    with transaction.atomic():
+        updated = Post.objects.filter(
+            pk=post.pk, image=post.image.name, thumbnails=post.thumbnails
+        ).update(thumbnails=thumbnails)
+        if updated:
+            media.replace(
+                media.references(None, post.thumbnails), new_files
+            )
+            for name, content in contents.items():
+                media.keep(name, content)
+    if not updated:
+        media.collect(new_files)
+        return
+    cache_versions.bump(*post_feed_keys(post, post.group_id))
+    bump_follower_timelines(post.author_id)
+
+
+def discard(post):
+    """Сбрасывает миниатюры поста, у которого сменилась картинка.
+
+    Ссылки на старые файлы снимет сохранение поста.
+    """
+    post.thumbnails = ''
+
+
+def schedule(post):
+    """Ставит генерацию миниатюр в очередь задач."""
+    if post.image:
+        enqueue('posts.generate_thumbnails', post.pk)
@@ -0,0 +1,171 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+
+from tasks.queue import enqueue
+
+from .models import AuthorStats, Follow, Post, TimelineEntry
+from .utils import paginate_sources
+
+PULL_AUTHORS_KEY = 'timeline:pull_authors'
+PULL_AUTHORS_TIMEOUT = 60 * 5
+
+ENTRY_KEYS = ('pub_date', 'post_id')
+POST_KEYS = ('pub_date', 'pk')
+
+
+def is_enabled():
+    return settings.POSTS_TIMELINE_ENABLED
+
+
+def pull_authors():
+    """Авторы, чьи посты не раскладываются по лентам, а читаются на лету.
+
+    По этому набору решают и запись (fan_out), и чтение ленты, так что
+    пост автора всегда находится хотя бы одним из путей.
+    """
+    authors = cache.get(PULL_AUTHORS_KEY)
+    if authors is None:
+        authors = refresh_pull_authors()
+    return authors
+
+
+def refresh_pull_authors():
+    """Сверяет режим авторов с числом подписчиков.
+
+    Режим хранится в AuthorStats.timeline_pull. Автор, вернувшийся
+    под POSTS_TIMELINE_FANOUT_LIMIT, читается на лету, пока задача
+    push_author не разложит его посты по лентам подписчиков: иначе
+    они пропали бы из лент до её выполнения.
+    """
+    limit = settings.POSTS_TIMELINE_FANOUT_LIMIT
+    with transaction.atomic():
+        AuthorStats.objects.filter(
+            timeline_pull=False, followers_count__gt=limit
+        ).update(timeline_pull=True)
+        leaving = list(AuthorStats.objects.filter(
+            timeline_pull=True, followers_count__lte=limit
+        ).values_list('user_id', flat=True))
+        authors = set(AuthorStats.objects.filter(
+            timeline_pull=True
+        ).values_list('user_id', flat=True))
+    cache.set(PULL_AUTHORS_KEY, authors, PULL_AUTHORS_TIMEOUT)
+    for author_id in leaving:
+        enqueue('posts.push_author', author_id)
+    return authors
+
+
+def _push(posts, followers):
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id,
+                post_id=pk,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for pk, pub_date, author_id in posts
+            for user_id in followers
+        ),
+        batch_size=settings.POSTS_TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out(post):
+    if not is_enabled() or post.author_id in pull_authors():
+        return
+    followers = list(
+        Follow.objects.filter(author_id=post.author_id)
+        .values_list('user_id', flat=True)
+    )
+    _push([(post.pk, post.pub_date, post.author_id)], followers)
+
+
+def _followers(author_id):
+    return set(
+        Follow.objects.filter(author_id=author_id)
+        .values_list('user_id', flat=True)
+    )
+
+
+def push_author(author_id):
+    """Раскладывает по лентам подписчиков все посты автора и только
+    потом выводит его из чтения на лету.
+
+    Посты и подписчики, появившиеся за время раскладки, дописываются
+    после смены режима.
+    """
+    if not is_enabled():
+        return
+    stats = AuthorStats.objects.filter(
+        user_id=author_id,
+        timeline_pull=True,
+        followers_count__lte=settings.POSTS_TIMELINE_FANOUT_LIMIT,
+    )
+    if not stats.exists():
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date', 'author_id'
+    ).order_by()
+    last = posts.aggregate(last=Max('pk'))['last'] or 0
+    followers = _followers(author_id)
+    _push(posts.iterator(), followers)
+    if not stats.update(timeline_pull=False):
+        return
+    cache.delete(PULL_AUTHORS_KEY)
+    _push(posts.filter(pk__gt=last).iterator(), followers)
+    _push(posts.iterator(), _followers(author_id) - followers)
+
+
+def backfill(user_id, *author_ids):
+    if not is_enabled():
+        return
+    author_ids = set(author_ids) - pull_authors()
+    if not author_ids:
+        return
+    posts = Post.objects.filter(author_id__in=author_ids).values_list(
+        'pk', 'pub_date', 'author_id'
+    ).order_by()
+    _push(posts.iterator(), [user_id])
+
+
+def prune(user, *authors):
+    if not is_enabled():
+        return
+    TimelineEntry.objects.filter(user=user, author__in=authors).delete()
+
+
+def rebuild(user):
+    TimelineEntry.objects.filter(user=user).delete()
+    authors = Follow.objects.filter(user=user).values_list(
+        'author_id', flat=True
+    )
+    backfill(user.pk, *authors)
+
+
+def paginate_timeline(request, user):
+    def sources():
+        pulled = list(
+            Follow.objects.filter(user=user, author__in=pull_authors())
+            .values_list('author_id', flat=True)
+        )
+        # Записи, разложенные до перехода автора в чтение на лету,
+        # повторили бы его посты.
+        entries = TimelineEntry.objects.filter(user=user).exclude(
+            author__in=pulled
+        ).select_related('post__author', 'post__group')
+        result = [(entries, ENTRY_KEYS)]
+        if pulled:
+            posts = Post.objects.select_related('author', 'group').filter(
+                author__in=pulled
+            )
+            result.append((posts, POST_KEYS))
+        return result
+
+    return paginate_sources(request, sources, transform=_as_post)
+
+
+def _as_post(item):
+    return item.post if isinstance(item, TimelineEntry) else item
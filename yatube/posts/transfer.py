@@ -0,0 +1,393 @@
+"""Потоковый экспорт и импорт данных в NDJSON.
+
+Каждая строка -- объект с ключом model. Пользователи и группы
+ссылаются друг на друга по username и slug, посты и комментарии
+сохраняют свои id, чтобы ссылки на посты не менялись после переноса.
+Если id уже занят другой записью, она получает новый, а комментарии
+идут за своим постом.
+Экспорт идёт в порядке зависимостей: users, groups, posts, comments,
+follows. Память не растёт с объёмом: экспорт читает базу через
+iterator(), импорт пишет пачками через bulk_create.
+"""
+import gzip
+import io
+import json
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connections, router, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import cache_versions, counters, media, search, timeline
+from .cache_versions import AUTHOR, FEED, GROUP, TIMELINE, scope_key
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+MODELS = ('user', 'group', 'post', 'comment', 'follow')
+
+
+@contextmanager
+def manual_dates(*fields):
+    """Отключает auto_now_add, чтобы сохранить заданные даты."""
+    saved = [(field, field.auto_now_add) for field in fields]
+    for field, _ in saved:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in saved:
+            field.auto_now_add = value
+
+
+@contextmanager
+def open_stream(path, mode, compress=None):
+    """Текстовый поток NDJSON; '-' -- stdin/stdout, .gz -- gzip."""
+    if compress is None:
+        compress = path.endswith('.gz')
+    if path == '-':
+        raw = sys.stdin.buffer if mode == 'r' else sys.stdout.buffer
+        if compress:
+            raw = gzip.GzipFile(fileobj=raw, mode=mode + 'b')
+        stream = io.TextIOWrapper(raw, encoding='utf-8')
+        try:
+            yield stream
+        finally:
+            stream.flush()
+            stream.detach()
+            if compress:
+                raw.close()
+        return
+    opener = gzip.open if compress else open
+    with opener(path, mode + 't', encoding='utf-8') as stream:
+        yield stream
+
+
+def _export_queries():
+    return {
+        'user': User.objects.order_by('pk').values(
+            'username', 'first_name', 'last_name', 'email', 'password',
+            'is_active', 'date_joined',
+        ),
+        'group': Group.objects.order_by('pk').values(
+            'slug', 'title', 'description',
+        ),
+        'post': Post.objects.order_by('pk').values(
+            'id', 'text', 'pub_date', 'image',
+            author_username=F('author__username'),
+            group_slug=F('group__slug'),
+        ),
+        'comment': Comment.objects.order_by('pk').values(
+            'id', 'post_id', 'text', 'created',
+            author_username=F('author__username'),
+        ),
+        'follow': Follow.objects.order_by('pk').values(
+            'created',
+            user_username=F('user__username'),
+            author_username=F('author__username'),
+        ),
+    }
+
+
+def _encode_value(value):
+    # DjangoJSONEncoder отбрасывает микросекунды, а с ними
+    # и точный порядок постов.
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def export(stream, models=MODELS, chunk_size=2000):
+    counts = Counter()
+    queries = _export_queries()
+    for model in models:
+        for row in queries[model].iterator(chunk_size=chunk_size):
+            stream.write(json.dumps(
+                dict(row, model=model),
+                ensure_ascii=False,
+                default=_encode_value,
+            ))
+            stream.write('\n')
+            counts[model] += 1
+    return counts
+
+
+class Importer:
+    """Собирает записи в пачки по моделям и пишет их bulk_create.
+
+    Ссылки по username и slug разрешаются одним запросом на пачку.
+    Записи, чьи ссылки не нашлись или которые уже есть в базе,
+    пропускаются. post_ids -- новые id постов, чей id был занят, и None
+    для пропущенных: по ней комментарии находят свой пост. bulk_create
+    не шлёт сигналов, поэтому счётчики, ссылки на файлы, поисковый
+    индекс и ленты пересчитываются один раз в finish().
+    """
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.batches = {model: [] for model in MODELS}
+        self.written = Counter()
+        self.skipped = Counter()
+        self.post_ids = {}
+
+    def add(self, record):
+        model = record.pop('model', None)
+        if model not in self.batches:
+            self.skipped['unknown'] += 1
+            return
+        # Пачки других моделей пишутся раньше, чтобы на их строки
+        # можно было сослаться.
+        for other in MODELS:
+            if other != model and self.batches[other]:
+                self.flush(other)
+        batch = self.batches[model]
+        batch.append(record)
+        if len(batch) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, model):
+        batch, self.batches[model] = self.batches[model], []
+        if batch:
+            with transaction.atomic():
+                getattr(self, f'_import_{model}')(batch)
+
+    def _bulk_create(self, model, name, objects, total):
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.written[name] += len(objects)
+        self.skipped[name] += total - len(objects)
+
+    @staticmethod
+    def _new(objects, key, existing):
+        """Записи, чьего ключа нет ни в базе, ни раньше в пачке."""
+        seen = set(existing)
+        fresh = []
+        for obj in objects:
+            if key(obj) not in seen:
+                seen.add(key(obj))
+                fresh.append(obj)
+        return fresh
+
+    @staticmethod
+    def _assign_ids(model, objects, same):
+        """Проверяет id записей до вставки.
+
+        Свободный id остаётся за записью. Строка с тем же id, для
+        которой same() верно, -- эта же запись из прошлого импорта, и
+        запись пропускается. Остальные получают id после занятых.
+        Возвращает записи для вставки и карту старых id в новые.
+        """
+        if not objects:
+            return [], {}
+        ids = [obj.pk for obj in objects]
+        existing = model.objects.in_bulk(ids)
+        top = max(
+            model.objects.aggregate(top=Max('pk'))['top'] or 0, *ids
+        )
+        fresh, remapped, seen = [], {}, set()
+        for obj in objects:
+            current = existing.get(obj.pk)
+            if obj.pk in seen or current and same(current, obj):
+                continue
+            seen.add(obj.pk)
+            if current:
+                top += 1
+                remapped[obj.pk] = obj.pk = top
+            fresh.append(obj)
+        return fresh, remapped
+
+    @staticmethod
+    def _lookup(model, field, values):
+        return dict(
+            model.objects.filter(**{f'{field}__in': set(values)})
+            .values_list(field, 'pk')
+        )
+
+    def _users(self, batch, *fields):
+        return self._lookup(
+            User, 'username',
+            [record[field] for record in batch for field in fields],
+        )
+
+    def _import_user(self, batch):
+        objects = [
+            User(
+                username=record['username'],
+                first_name=record.get('first_name', ''),
+                last_name=record.get('last_name', ''),
+                email=record.get('email', ''),
+                password=record.get('password', ''),
+                is_active=record.get('is_active', True),
+                date_joined=parse_datetime(record['date_joined']),
+            )
+            for record in batch
+        ]
+        existing = self._users(batch, 'username')
+        objects = self._new(objects, lambda user: user.username, existing)
+        self._bulk_create(User, 'user', objects, len(batch))
+
+    def _import_group(self, batch):
+        objects = [
+            Group(
+                slug=record['slug'],
+                title=record['title'],
+                description=record.get('description', ''),
+            )
+            for record in batch
+        ]
+        existing = self._lookup(
+            Group, 'slug', [record['slug'] for record in batch]
+        )
+        objects = self._new(objects, lambda group: group.slug, existing)
+        self._bulk_create(Group, 'group', objects, len(batch))
+        cache_versions.bump(scope_key(FEED))
+
+    def _import_post(self, batch):
+        users = self._users(batch, 'author_username')
+        groups = self._lookup(
+            Group, 'slug',
+            [record['group_slug'] for record in batch if record['group_slug']],
+        )
+        objects = [
+            Post(
+                id=record['id'],
+                text=record['text'],
+                pub_date=parse_datetime(record['pub_date']),
+                author_id=users[record['author_username']],
+                group_id=groups.get(record['group_slug']),
+                image=record.get('image') or None,
+            )
+            for record in batch
+            if record['author_username'] in users
+        ]
+        self.post_ids.update(
+            (record['id'], None) for record in batch
+            if record['author_username'] not in users
+        )
+        objects, remapped = self._assign_ids(
+            Post, objects,
+            lambda current, post: (
+                current.author_id == post.author_id
+                and current.pub_date == post.pub_date
+            ),
+        )
+        self.post_ids.update(remapped)
+        with manual_dates(Post._meta.get_field('pub_date')):
+            self._bulk_create(Post, 'post', objects, len(batch))
+        cache_versions.bump(
+            scope_key(FEED),
+            *{scope_key(AUTHOR, post.author_id) for post in objects},
+            *{
+                scope_key(GROUP, post.group_id)
+                for post in objects if post.group_id
+            },
+        )
+
+    def _import_comment(self, batch):
+        users = self._users(batch, 'author_username')
+        for record in batch:
+            record['post_id'] = self.post_ids.get(
+                record['post_id'], record['post_id']
+            )
+        posts = set(Post.objects.filter(
+            pk__in={record['post_id'] for record in batch}
+        ).values_list('pk', flat=True))
+        objects = [
+            Comment(
+                id=record['id'],
+                post_id=record['post_id'],
+                author_id=users[record['author_username']],
+                text=record['text'],
+                created=parse_datetime(record['created']),
+            )
+            for record in batch
+            if record['author_username'] in users
+            and record['post_id'] in posts
+        ]
+        objects, _ = self._assign_ids(
+            Comment, objects,
+            lambda current, comment: (
+                current.post_id == comment.post_id
+                and current.author_id == comment.author_id
+                and current.created == comment.created
+            ),
+        )
+        with manual_dates(Comment._meta.get_field('created')):
+            self._bulk_create(Comment, 'comment', objects, len(batch))
+
+    def _import_follow(self, batch):
+        users = self._users(batch, 'user_username', 'author_username')
+        objects = [
+            Follow(
+                user_id=users[record['user_username']],
+                author_id=users[record['author_username']],
+                created=(
+                    parse_datetime(record.get('created', ''))
+                    or timezone.now()
+                ),
+            )
+            for record in batch
+            if record['user_username'] in users
+            and record['author_username'] in users
+            and record['user_username'] != record['author_username']
+        ]
+        existing = Follow.objects.filter(
+            user_id__in={follow.user_id for follow in objects},
+            author_id__in={follow.author_id for follow in objects},
+        ).values_list('user_id', 'author_id')
+        objects = self._new(
+            objects, lambda follow: (follow.user_id, follow.author_id),
+            existing,
+        )
+        with manual_dates(Follow._meta.get_field('created')):
+            self._bulk_create(Follow, 'follow', objects, len(batch))
+        cache_versions.bump(*{
+            scope_key(TIMELINE, follow.user_id) for follow in objects
+        })
+
+    @staticmethod
+    def reset_sequences():
+        """Посты и комментарии вставлены с явными id: счётчики
+        автоинкремента в базе нужно сдвинуть за них."""
+        connection = connections[router.db_for_write(Post)]
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [Post, Comment]
+        )
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    def finish(self):
+        for model in MODELS:
+            self.flush(model)
+        self.reset_sequences()
+        counters.reconcile()
+        media.reconcile()
+        index = search.get_index()
+        index.create()
+        index.rebuild()
+        if timeline.is_enabled():
+            users = User.objects.filter(follower__isnull=False).distinct()
+            for user in users.iterator():
+                timeline.rebuild(user)
+
+
+def import_stream(stream, batch_size=1000):
+    importer = Importer(batch_size)
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            importer.skipped['invalid'] += 1
+            continue
+        importer.add(record)
+    importer.finish()
+    return importer
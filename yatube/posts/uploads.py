@@ -0,0 +1,204 @@
+"""Загрузка картинок постов.
+
+ImageUploadHandler пишет файл на диск частями по
+IMAGE_UPLOAD_CHUNK_SIZE, по первым байтам отсекает не-картинки и
+перестаёт писать файл больше IMAGE_UPLOAD_MAX_SIZE. Форма читает
+только заголовок: формат и размер в пикселях, чтобы не пропустить
+«бомбу» из маленького файла с огромной картинкой.
+
+Полное декодирование -- в задаче posts.process_image: картинка
+перекодируется без EXIF и сохраняется под именем из хеша содержимого,
+поэтому одинаковые загрузки занимают на диске один файл. До обработки
+файл лежит в IMAGE_UPLOAD_INCOMING_DIR, вне MEDIA_ROOT.
+"""
+import os
+import shutil
+import warnings
+from io import BytesIO
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import transaction
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+from tasks.queue import enqueue
+
+from . import media, thumbnails
+from .models import Post
+
+IMAGES_DIR = 'posts'
+SIGNATURES = (
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF'),
+)
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 85, 'optimize': True},
+    'PNG': {'optimize': True},
+    'GIF': {'save_all': True},
+    'WEBP': {'quality': 85, 'save_all': True},
+}
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+FORMAT_ERROR = 'Загрузите картинку в формате JPEG, PNG, GIF или WebP.'
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def sniff(head):
+    """Формат по первым байтам файла или None."""
+    for signature, image_format in SIGNATURES:
+        if head.startswith(signature):
+            return image_format
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'WEBP'
+    return None
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку во временный файл, не держа её в памяти.
+
+    Ошибку (не картинка, слишком большой файл) не выбрасывает, а
+    оставляет в upload_error -- её покажет форма у своего поля.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chunk_size = settings.IMAGE_UPLOAD_CHUNK_SIZE
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.error = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.error:
+            return None
+        if start == 0 and sniff(raw_data) is None:
+            self.error = FORMAT_ERROR
+            return None
+        if start + len(raw_data) > settings.IMAGE_UPLOAD_MAX_SIZE:
+            limit = filesizeformat(settings.IMAGE_UPLOAD_MAX_SIZE)
+            self.error = f'Файл больше {limit}.'
+            return None
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        upload.upload_error = self.error
+        return upload
+
+
+def inspect(file):
+    """Формат и размеры из заголовка; пиксели не декодируются."""
+    position = file.tell()
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            with Image.open(file) as image:
+                image_format, (width, height) = image.format, image.size
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+        raise InvalidImage('Картинка слишком большая.')
+    except (OSError, SyntaxError):
+        raise InvalidImage('Файл повреждён или это не картинка.')
+    finally:
+        file.seek(position)
+    if image_format not in SAVE_OPTIONS:
+        raise InvalidImage(FORMAT_ERROR)
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise InvalidImage(
+            f'Картинка {width}x{height} слишком большая: не больше '
+            f'{settings.IMAGE_MAX_PIXELS // 1_000_000} Мп.'
+        )
+    return image_format, width, height
+
+
+def _incoming_path(name):
+    return os.path.join(settings.IMAGE_UPLOAD_INCOMING_DIR, name)
+
+
+def stash(upload):
+    """Переносит загрузку во входящие и возвращает её имя там."""
+    os.makedirs(settings.IMAGE_UPLOAD_INCOMING_DIR, exist_ok=True)
+    name = uuid4().hex
+    if hasattr(upload, 'temporary_file_path'):
+        shutil.move(upload.temporary_file_path(), _incoming_path(name))
+    else:
+        with open(_incoming_path(name), 'wb') as incoming:
+            for chunk in upload.chunks():
+                incoming.write(chunk)
+    return name
+
+
+def take(post, previous_image):
+    """Забирает у поста новую загрузку: до обработки у него остаётся
+    прежняя картинка. Возвращает имя во входящих или None."""
+    if not post.image or post.image._committed:
+        return None
+    name = stash(post.image.file)
+    post.image = previous_image
+    return name
+
+
+def schedule(post, name):
+    enqueue('posts.process_image', post.pk, name)
+
+
+def reencode(path):
+    """Картинка без метаданных: байты и расширение файла."""
+    with open(path, 'rb') as source:
+        image_format, _, _ = inspect(source)
+        with Image.open(source) as image:
+            frames = getattr(image, 'n_frames', 1)
+            if frames == 1 and image_format in ('JPEG', 'WEBP'):
+                image = ImageOps.exif_transpose(image)
+            if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            content = BytesIO()
+            options = dict(SAVE_OPTIONS[image_format])
+            if frames == 1:
+                options.pop('save_all', None)
+            image.save(content, image_format, **options)
+    return content.getvalue(), EXTENSIONS[image_format]
+
+
+def store(content, extension):
+    """Сохраняет файл; имя из хеша содержимого выбирает хранилище."""
+    return default_storage.save(
+        f'{IMAGES_DIR}/image.{extension}', ContentFile(content)
+    )
+
+
+def process(name):
+    """Перекодирует файл из входящих и удаляет его оттуда."""
+    path = _incoming_path(name)
+    try:
+        return reencode(path)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def attach(post_id, name):
+    """Ставит посту обработанную картинку и пересоздаёт миниатюры."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        os.remove(_incoming_path(name))
+        return
+    try:
+        content, extension = process(name)
+    except (InvalidImage, OSError):
+        return
+    image = store(content, extension)
+    with transaction.atomic():
+        thumbnails.discard(post)
+        post.image = image
+        post.save(update_fields=['image', 'thumbnails'])
+        media.keep(image, content)
+        thumbnails.schedule(post)
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
@@ -18,6 +18,12 @@ urlpatterns = [
         name='profile_unfollow'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path(
+        'follow/feed/reset/',
+        views.follow_feed_reset,
+        name='follow_feed_reset'
+    ),
+    path('search/', views.post_search, name='post_search'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
@@ -26,6 +32,22 @@ urlpatterns = [
         views.post_create,
         name='post_create'
     ),
+    path('feeds/<str:fmt>/', feeds.posts_feed, name='posts_feed'),
+    path(
+        'feeds/<str:fmt>/group/<slug:slug>/',
+        feeds.group_feed,
+        name='group_feed'
+    ),
+    path(
+        'feeds/<str:fmt>/profile/<str:username>/',
+        feeds.profile_feed,
+        name='profile_feed'
+    ),
+    path(
+        'feeds/<str:fmt>/follow/<str:token>/',
+        feeds.follow_feed,
+        name='follow_feed'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
@@ -1,9 +1,217 @@
+from collections.abc import Sequence
+
 from django.conf import settings
-from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+DEFAULT_KEYS = ('pub_date', 'pk')
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+class CursorPage(Sequence):
+    """Страница ленты без COUNT(*) и OFFSET.
+
+    Повторяет ту часть интерфейса django.core.paginator.Page,
+    которой пользуются шаблоны и тесты. Запрос к базе выполняется
+    при первом обращении к содержимому, поэтому страница, целиком
+    взятая из кеша фрагментов, не стоит ни одного запроса.
+    """
+
+    def __init__(self, fetch, token=''):
+        self._fetch = fetch
+        self._data = None
+        self.token = token
+
+    def __repr__(self):
+        return f'<CursorPage {self.token or "first"}>'
+
+    def _load(self):
+        if self._data is None:
+            self._data = self._fetch()
+        return self._data
+
+    @property
+    def object_list(self):
+        return self._load()['object_list']
+
+    @property
+    def next_cursor(self):
+        return self._load()['next_cursor']
+
+    @property
+    def previous_cursor(self):
+        return self._load()['previous_cursor']
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._load()['has_next']
+
+    def has_previous(self):
+        return self._load()['has_previous']
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def encode_cursor(direction, values):
+    moment, pk = values
+    raw = f'{direction}{moment.isoformat()}|{pk}'
+    return urlsafe_base64_encode(raw.encode())
+
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        raw = urlsafe_base64_decode(token).decode()
+        moment, pk = raw[1:].rsplit('|', 1)
+        values = (parse_datetime(moment), int(pk))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if raw[0] not in (FORWARD, BACKWARD) or values[0] is None:
+        return None
+    return raw[0], values
+
+
+def key_values(obj, keys):
+    return tuple(getattr(obj, key) for key in keys)
+
+
+def keyset_filter(queryset, direction, values, keys=DEFAULT_KEYS):
+    """Отбирает строки строго после (или до) курсора.
+
+    Условие key1 <= value1 дублируется отдельно, чтобы SQLite
+    мог использовать диапазон по индексу, а не разбор OR.
+    """
+    first, second = keys
+    moment, pk = values
+    if direction == FORWARD:
+        return queryset.filter(
+            Q(**{f'{first}__lt': moment})
+            | Q(**{first: moment, f'{second}__lt': pk}),
+            **{f'{first}__lte': moment},
+        ).order_by(f'-{first}', f'-{second}')
+    return queryset.filter(
+        Q(**{f'{first}__gt': moment})
+        | Q(**{first: moment, f'{second}__gt': pk}),
+        **{f'{first}__gte': moment},
+    ).order_by(first, second)
+
+
+def build_page(rows, per_page, has_next, has_previous):
+    rows = rows[:per_page]
+    next_cursor = previous_cursor = None
+    if rows:
+        next_cursor = encode_cursor(FORWARD, rows[-1][0])
+        previous_cursor = encode_cursor(BACKWARD, rows[0][0])
+    return {
+        'object_list': [obj for values, obj in rows],
+        'has_next': has_next,
+        'has_previous': has_previous,
+        'next_cursor': next_cursor,
+        'previous_cursor': previous_cursor,
+    }
+
+
+def _page_number(value):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return 1
+    return max(number, 1)
+
+
+def _merge(sources, limit, reverse=True):
+    """Сливает уже отсортированные выборки в одну ленту.
+
+    Строки с одинаковым вторым ключом (id поста) попадают в ленту
+    один раз, даже если пришли из разных источников.
+    """
+    rows = {}
+    for items, keys in sources:
+        for obj in items:
+            values = key_values(obj, keys)
+            rows.setdefault(values[1], (values, obj))
+    return sorted(
+        rows.values(), key=lambda row: row[0], reverse=reverse
+    )[:limit]
+
+
+def paginate(request, posts, keys=DEFAULT_KEYS):
+    return paginate_sources(request, [(posts, keys)])
+
+
+def paginate_sources(request, sources, transform=None):
+    """Пагинация по нескольким выборкам с общим порядком ключей.
+
+    sources -- пары (queryset, keys), где keys -- имена полей
+    (дата публикации, id поста) в порядке сортировки, или функция,
+    возвращающая такой список при первом обращении к странице;
+    transform -- функция, превращающая строки выборки в объекты страницы.
+    """
+    per_page = settings.MAX_LENGHT_POSTS
+    token = request.GET.get('cursor')
+    cursor = decode_cursor(token)
+    number = _page_number(request.GET.get('page'))
+    if cursor is None:
+        token = f'page-{number}'
+
+    def fetch():
+        resolved = sources() if callable(sources) else sources
+        if cursor is None:
+            data = _offset_page(resolved, number, per_page)
+        else:
+            data = _keyset_page(resolved, cursor, per_page)
+        if transform is not None:
+            data['object_list'] = [
+                transform(obj) for obj in data['object_list']
+            ]
+        return data
+
+    return CursorPage(fetch, token=token)
+
+
+def _offset_page(sources, number, per_page):
+    offset = (number - 1) * per_page
+
+    def fetch(stop):
+        return _merge([
+            (queryset.order_by(f'-{keys[0]}', f'-{keys[1]}')[:stop], keys)
+            for queryset, keys in sources
+        ], stop)
+
+    rows = fetch(offset + per_page + 1)[offset:]
+    if not rows and number > 1:
+        rows, offset = fetch(per_page + 1), 0
+    return build_page(
+        rows,
+        per_page,
+        has_next=len(rows) > per_page,
+        has_previous=offset > 0,
+    )
 
 
-def paginate(request, posts):
-    page_number = request.GET.get('page')
-    paginator = Paginator(posts, settings.MAX_LENGHT_POSTS)
-    page_obj = paginator.get_page(page_number)
-    return page_obj
+def _keyset_page(sources, cursor, per_page):
+    direction, values = cursor
+    rows = _merge([
+        (keyset_filter(queryset, direction, values, keys)[:per_page + 1],
+         keys)
+        for queryset, keys in sources
+    ], per_page + 1, reverse=direction == FORWARD)
+    has_more = len(rows) > per_page
+    if direction == FORWARD:
+        return build_page(
+            rows, per_page, has_next=has_more, has_previous=True,
+        )
+    return build_page(
+        rows[:per_page][::-1], per_page,
+        has_next=True, has_previous=has_more,
+    )
@@ -1,23 +1,74 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
 
+from core import sqlite
+from core.asgi import async_variant
+
+from . import actions, async_views, feeds, follows, search, timeline
+from .cache_versions import (AUTHOR, FEED, GROUP, POST, TIMELINE, fragment_key,
+                             scope_key)
+from .conditional import conditional_page
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
+from .models import Group, Post
 from .utils import paginate
 
 User = get_user_model()
 
 
+def _feed_versions(request):
+    return [scope_key(FEED)]
+
+
+def _group_versions(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return None
+    return [scope_key(GROUP, group_id)]
+
+
+def _profile_versions(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if author_id is None:
+        return None
+    keys = [scope_key(AUTHOR, author_id)]
+    if request.user.is_authenticated:
+        keys.append(scope_key(TIMELINE, request.user.pk))
+    return keys
+
+
+def _post_versions(request, post_id):
+    post = Post.objects.filter(pk=post_id).values(
+        'author_id', 'group_id'
+    ).order_by().first()
+    if post is None:
+        return None
+    keys = [scope_key(POST, post_id), scope_key(AUTHOR, post['author_id'])]
+    if post['group_id'] is not None:
+        keys.append(scope_key(GROUP, post['group_id']))
+    return keys
+
+
+@conditional_page(_feed_versions, max_age=60)
 def index(request):
     template = 'posts/index.html'
     posts = Post.objects.select_related('author', 'group')
     context = {
         'page_obj': paginate(request, posts),
+        'cache_timeout': settings.FEED_CACHE_TIMEOUT,
+        'cache_version': fragment_key(scope_key(FEED)),
     }
     return render(request, template, context)
 
 
+@conditional_page(_group_versions, max_age=60)
+@async_variant(async_views.group_posts)
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
@@ -25,19 +76,28 @@ def group_posts(request, slug):
     context = {
         'group': group,
         'page_obj': paginate(request, posts),
+        'cache_timeout': settings.FEED_CACHE_TIMEOUT,
+        'cache_version': fragment_key(scope_key(GROUP, group.pk)),
     }
     return render(request, template, context)
 
 
+@conditional_page(_profile_versions, max_age=60)
+@async_variant(async_views.profile)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
     posts = author.posts.select_related('group', 'author')
-    following = request.user.is_authenticated and author.following.filter(
-        user=request.user).exists()
+    following = author.pk in follows.following_ids(
+        request.user.pk, [author.pk]
+    )
     context = {
         'username': author,
         'page_obj': paginate(request, posts),
         'following': following,
+        'cache_timeout': settings.FEED_CACHE_TIMEOUT,
+        'cache_version': fragment_key(scope_key(AUTHOR, author.pk)),
     }
     return render(request, 'posts/profile.html', context)
 
@@ -49,22 +109,35 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = get_object_or_404(Post, pk=post_id)
-        comment.save()
+        sqlite.write(actions.create_comment, comment)
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@conditional_page(_post_versions, max_age=300, forms=True)
+@async_variant(async_views.post_detail)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
+    comments = post.comments.select_related('author')
     form = CommentForm()
     context = {
         'post': post,
-        'comments': comments,
+        'comments': paginate(request, comments, keys=('created', 'pk')),
         'form': form
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_search(request):
+    query = request.GET.get('q', '').strip()
+    context = {
+        'query': query,
+        'page_obj': search.search_page(request, query),
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     if request.method == 'POST':
@@ -75,7 +148,7 @@ def post_create(request):
         if form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
-            post.save()
+            actions.create_post(post)
             username = post.author.username
             return redirect("posts:profile", username)
     if request.method != 'POST':
@@ -92,13 +165,22 @@ def post_edit(request, post_id):
     author = post.author
     template = "posts/create_post.html"
     if request.user == author:
+        old_group_id = post.group_id
+        old_image = post.image.name
         form = PostForm(
             request.POST or None,
             instance=post,
             files=request.FILES or None,
         )
-        if request.method == "POST" and form.is_valid:
-            post = form.save()
+        if request.method == "POST" and form.is_valid():
+            post = form.save(commit=False)
+            actions.update_post(
+                post,
+                old_group_id,
+                author.pk,
+                image_changed='image' in form.changed_data,
+                old_image=old_image,
+            )
             return redirect("posts:post_detail", post_id)
         context = {
             "form": form,
@@ -112,28 +194,38 @@ def post_edit(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.select_related('author', 'group').filter(
-        author__following__user=request.user
-    )
+    if timeline.is_enabled():
+        page_obj = timeline.paginate_timeline(request, request.user)
+    else:
+        posts = Post.objects.select_related('author', 'group').filter(
+            author__following__user=request.user
+        )
+        page_obj = paginate(request, posts)
     context = {
-        'page_obj': paginate(request, posts),
+        'page_obj': page_obj,
+        'cache_timeout': settings.FEED_CACHE_TIMEOUT,
+        'cache_version': fragment_key(scope_key(TIMELINE, request.user.pk)),
+        'feed_token': feeds.follow_token(request.user),
     }
     return render(request, 'posts/follow.html', context)
 
 
+@login_required
+@require_POST
+def follow_feed_reset(request):
+    feeds.reset_follow_token(request.user)
+    return redirect('posts:follow_index')
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    follower = request.user
-    follow = Follow.objects.filter(user=follower, author=author)
-    if not follow and follower != author:
-        Follow.objects.create(user=follower, author=author)
+    sqlite.write(follows.follow, request.user.pk, [author.pk])
     return redirect('posts:profile', username)
 
 
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    follower = get_object_or_404(User, username=request.user)
-    Follow.objects.filter(user=follower, author=author).delete()
+    sqlite.write(follows.unfollow, request.user.pk, [author.pk])
     return redirect('posts:profile', username)
@@ -0,0 +1,40 @@
+// Живые обновления: о новых постах сообщает плашка над лентой,
+// новые комментарии добавляются в список без перезагрузки.
+(function () {
+  var script = document.currentScript;
+  var source = new EventSource(script.dataset.stream);
+  var fresh = 0;
+  var notice = null;
+
+  source.addEventListener('post', function () {
+    fresh += 1;
+    if (!notice) {
+      notice = document.createElement('a');
+      notice.className = 'alert alert-info d-block text-center';
+      notice.href = window.location.pathname;
+      document.querySelector('main').prepend(notice);
+    }
+    notice.textContent = 'Новых записей: ' + fresh + '. Показать';
+  });
+
+  source.addEventListener('comment', function (event) {
+    var comment = JSON.parse(event.data);
+    var list = document.getElementById('live-comments');
+    if (!list || document.getElementById('comment-' + comment.id)) {
+      return;
+    }
+    var item = document.createElement('div');
+    item.className = 'media mb-4';
+    item.id = 'comment-' + comment.id;
+    var body = document.createElement('div');
+    body.className = 'media-body';
+    var author = document.createElement('h5');
+    author.className = 'mt-0';
+    author.textContent = comment.author;
+    var text = document.createElement('p');
+    text.textContent = comment.text;
+    body.append(author, text);
+    item.append(body);
+    list.prepend(item);
+  });
+})();
@@ -0,0 +1,125 @@
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tasks import queue
+
+
+def _init_worker():
+    # Соединения родителя нельзя использовать после fork.
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи из очереди в пуле процессов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=2,
+            help='Размер пула процессов; 0 -- выполнять в этом процессе.',
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=20,
+            help='Сколько задач забирать за один запрос.',
+        )
+        parser.add_argument(
+            '--visibility-timeout',
+            type=int,
+            default=300,
+            help='Через сколько секунд задача без отчёта вернётся в очередь.',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1,
+            help='Пауза в секундах, если очередь пуста.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить все готовые задачи и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        self.periodic_runs = {}
+        self.processes = options['processes']
+        self.pool = self.start_pool()
+        try:
+            while True:
+                tasks = queue.claim(
+                    options['batch'], options['visibility_timeout']
+                )
+                if tasks:
+                    self.run_batch(tasks)
+                self.run_periodic()
+                if tasks:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+
+    def start_pool(self):
+        if self.processes <= 0:
+            return None
+        connections.close_all()
+        return ProcessPoolExecutor(
+            max_workers=self.processes, initializer=_init_worker
+        )
+
+    def run_periodic(self):
+        """Обслуживание из queue.periodic -- по прошествии интервала,
+        после каждой пачки, даже если очередь не пустеет."""
+        now = time.monotonic()
+        for name, (interval, func) in queue.periodic_tasks().items():
+            last = self.periodic_runs.get(name)
+            if last is not None and now - last < interval:
+                continue
+            self.periodic_runs[name] = now
+            try:
+                func()
+            except Exception:
+                self.stderr.write(f'{name}: {traceback.format_exc()}')
+
+    def run_batch(self, tasks):
+        if self.pool is None:
+            for task in tasks:
+                self.report(task, queue.run_one(task.name, task.payload))
+            return
+        futures = {
+            self.pool.submit(queue.run_one, task.name, task.payload): task
+            for task in tasks
+        }
+        broken = False
+        for future in as_completed(futures):
+            try:
+                error = future.result()
+            except BrokenProcessPool:
+                # Какая задача убила процесс, не узнать: упавшими
+                # считаются все невыполненные, выполненные завершаются.
+                broken = True
+                error = traceback.format_exc()
+            self.report(futures[future], error)
+        if broken:
+            self.stderr.write('Процесс пула умер, пул создаётся заново.')
+            self.pool.shutdown(wait=False)
+            self.pool = self.start_pool()
+
+    def report(self, task, error):
+        if error:
+            queue.fail(task, error)
+            self.stderr.write(f'{task}: {error.splitlines()[-1]}')
+        else:
+            queue.complete(task)
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:34
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_finished(apps, schema_editor):
+    task = apps.get_model('tasks', 'Task')
+    task.objects.filter(
+        status__in=['done', 'failed'], finished__isnull=True
+    ).update(finished=F('created'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='finished',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата завершения'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'finished'], name='task_status_finished_idx'),
+        ),
+        migrations.RunPython(fill_finished, migrations.RunPython.noop),
+    ]
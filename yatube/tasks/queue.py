@@ -0,0 +1,159 @@
+import json
+import traceback
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+_registry = {}
+_periodic = {}
+
+STALE_ERROR = 'Воркер не отчитался, попытки кончились.'
+
+
+def task(name):
+    """Регистрирует функцию как задачу с именем name."""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    return _registry[name]
+
+
+def periodic(name, interval):
+    """Регистрирует обслуживание, которое run_tasks вызывает не чаще
+    раза в interval секунд."""
+    def decorator(func):
+        _periodic[name] = (interval, func)
+        return func
+    return decorator
+
+
+def periodic_tasks():
+    return dict(_periodic)
+
+
+def execute(name, payload):
+    data = json.loads(payload)
+    return get_task(name)(*data.get('args', ()), **data.get('kwargs', {}))
+
+
+def enqueue(name, *args, delay=0, max_attempts=None, **kwargs):
+    """Ставит задачу в очередь в текущей транзакции.
+
+    Задача сохраняется вместе с данными, которые её породили, и не
+    потеряется при падении процесса. При TASKS_EAGER выполняется сразу.
+    """
+    func = get_task(name)
+    if settings.TASKS_EAGER:
+        func(*args, **kwargs)
+        return None
+    return Task.objects.create(
+        name=name,
+        payload=json.dumps({'args': args, 'kwargs': kwargs}),
+        run_after=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.TASKS_MAX_ATTEMPTS,
+    )
+
+
+def _available(now):
+    return Q(status=Task.QUEUED, run_after__lte=now) | Q(
+        status=Task.RUNNING,
+        locked_until__lt=now,
+        attempts__lt=F('max_attempts'),
+    )
+
+
+def _give_up(now):
+    """Задачи, которые роняют воркер (нехватка памяти, сломанный пул),
+    не возвращаются в очередь бесконечно."""
+    Task.objects.filter(
+        status=Task.RUNNING,
+        locked_until__lt=now,
+        attempts__gte=F('max_attempts'),
+    ).update(
+        status=Task.FAILED,
+        locked_until=None,
+        last_error=STALE_ERROR,
+        finished=now,
+    )
+
+
+def claim(limit, visibility_timeout):
+    """Забирает до limit задач, готовых к выполнению.
+
+    Задача, чей воркер не отчитался за visibility_timeout секунд,
+    снова становится доступной. Захват идёт одним UPDATE с
+    уникальным токеном, поэтому параллельные воркеры не получат
+    одну задачу дважды. Зависшая задача без оставшихся попыток
+    помечается упавшей.
+    """
+    now = timezone.now()
+    _give_up(now)
+    ids = list(
+        Task.objects.filter(_available(now))
+        .values_list('pk', flat=True)[:limit]
+    )
+    if not ids:
+        return []
+    token = uuid4().hex
+    Task.objects.filter(_available(now), pk__in=ids).update(
+        status=Task.RUNNING,
+        lock_token=token,
+        locked_until=now + timedelta(seconds=visibility_timeout),
+        attempts=F('attempts') + 1,
+    )
+    return list(Task.objects.filter(lock_token=token, status=Task.RUNNING))
+
+
+def complete(task):
+    Task.objects.filter(pk=task.pk, lock_token=task.lock_token).update(
+        status=Task.DONE,
+        locked_until=None,
+        last_error='',
+        finished=timezone.now(),
+    )
+
+
+def fail(task, error):
+    """Откладывает задачу с экспоненциальной задержкой или помечает
+    её окончательно упавшей, если попытки кончились."""
+    changes = {'locked_until': None, 'last_error': error}
+    if task.attempts >= task.max_attempts:
+        changes['status'] = Task.FAILED
+        changes['finished'] = timezone.now()
+    else:
+        delay = settings.TASKS_RETRY_DELAY * 2 ** (task.attempts - 1)
+        changes['status'] = Task.QUEUED
+        changes['run_after'] = timezone.now() + timedelta(seconds=delay)
+    Task.objects.filter(pk=task.pk, lock_token=task.lock_token).update(
+        **changes
+    )
+
+
+@periodic('tasks.purge', 60 * 60)
+def purge():
+    """Удаляет выполненные задачи старше TASKS_RETENTION секунд.
+
+    Упавшие остаются для разбора.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.TASKS_RETENTION)
+    return Task.objects.filter(
+        status=Task.DONE, finished__lt=cutoff
+    ).delete()[0]
+
+
+def run_one(name, payload):
+    """Выполняет задачу и возвращает текст ошибки или пустую строку."""
+    try:
+        execute(name, payload)
+    except Exception:
+        return traceback.format_exc()
+    return ''
@@ -0,0 +1,153 @@
+import os
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tasks import queue
+from tasks.models import Task
+
+calls = []
+
+
+@queue.task('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@queue.task('tests.broken')
+def broken():
+    raise ValueError('сломалось')
+
+
+@queue.task('tests.crash')
+def crash():
+    os._exit(1)
+
+
+@override_settings(TASKS_EAGER=False, TASKS_RETRY_DELAY=0)
+class QueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_tasks(self):
+        call_command(
+            'run_tasks', once=True, processes=0, stderr=StringIO()
+        )
+
+    def test_enqueue_stores_task(self):
+        """Задача сохраняется в базе и выполняется воркером."""
+        queue.enqueue('tests.record', 42)
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertEqual(calls, [])
+        self.run_tasks()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.DONE)
+        self.assertEqual(calls, [42])
+
+    def test_delayed_task_waits(self):
+        """Отложенная задача не выполняется раньше срока."""
+        queue.enqueue('tests.record', 1, delay=60)
+        self.run_tasks()
+        self.assertEqual(calls, [])
+        self.assertEqual(Task.objects.get().status, Task.QUEUED)
+
+    def test_failed_task_is_retried(self):
+        """Упавшая задача повторяется, пока не кончатся попытки."""
+        queue.enqueue('tests.broken', max_attempts=2)
+        self.run_tasks()
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(task.attempts, 2)
+        self.assertIn('сломалось', task.last_error)
+
+    def test_expired_lock_is_reclaimed(self):
+        """Задачу зависшего воркера забирает другой."""
+        queue.enqueue('tests.record', 7)
+        first = queue.claim(10, visibility_timeout=60)
+        self.assertEqual(len(first), 1)
+        self.assertEqual(queue.claim(10, visibility_timeout=60), [])
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        second = queue.claim(10, visibility_timeout=60)
+        self.assertEqual([task.pk for task in second], [first[0].pk])
+        queue.complete(first[0])
+        self.assertEqual(Task.objects.get().status, Task.RUNNING)
+        queue.complete(second[0])
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+
+    def test_stale_task_gives_up(self):
+        """Задача, ронявшая воркер на каждой попытке, помечается упавшей."""
+        queue.enqueue('tests.record', 7, max_attempts=2)
+        for _ in range(2):
+            self.assertEqual(len(queue.claim(10, visibility_timeout=60)), 1)
+            Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        self.assertEqual(queue.claim(10, visibility_timeout=60), [])
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(task.attempts, 2)
+        self.assertEqual(task.last_error, queue.STALE_ERROR)
+
+    @override_settings(TASKS_RETENTION=60)
+    def test_finished_tasks_purged(self):
+        """Выполненные задачи удаляются после TASKS_RETENTION."""
+        queue.enqueue('tests.record', 1)
+        queue.enqueue('tests.record', 2)
+        queue.enqueue('tests.broken', max_attempts=1)
+        self.run_tasks()
+        old, fresh = Task.objects.filter(status=Task.DONE)
+        Task.objects.filter(pk=old.pk).update(
+            finished=timezone.now() - timedelta(minutes=2)
+        )
+        self.run_tasks()
+        self.assertEqual(
+            set(Task.objects.values_list('pk', flat=True)),
+            {fresh.pk, Task.objects.get(status=Task.FAILED).pk},
+        )
+
+    def test_worker_crash(self):
+        """Смерть процесса пула не роняет команду: выполненные задачи
+        завершаются, невыполненные считаются упавшими."""
+        done = queue.enqueue('tests.record', 5)
+        crashed = queue.enqueue('tests.crash', max_attempts=2)
+        later = queue.enqueue('tests.record', 6)
+        stderr = StringIO()
+        call_command(
+            'run_tasks', once=True, processes=1, batch=2, stderr=stderr
+        )
+        self.assertIn('BrokenProcessPool', stderr.getvalue())
+        statuses = dict(Task.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses, {
+            done.pk: Task.DONE,
+            crashed.pk: Task.FAILED,
+            later.pk: Task.DONE,
+        })
+        self.assertEqual(Task.objects.get(pk=done.pk).attempts, 1)
+
+    def test_periodic_under_load(self):
+        """Обслуживание запускается и пока очередь не пуста."""
+        for value in range(3):
+            queue.enqueue('tests.record', value)
+        waiting = []
+
+        def maintenance():
+            waiting.append(Task.objects.filter(status=Task.QUEUED).count())
+
+        with mock.patch.dict(
+            queue._periodic, {'tests.maintenance': (3600, maintenance)}
+        ):
+            call_command(
+                'run_tasks', once=True, processes=0, batch=1,
+                stderr=StringIO(),
+            )
+        self.assertEqual(waiting, [2])
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode(self):
+        """В режиме TASKS_EAGER задача выполняется сразу."""
+        queue.enqueue('tests.record', 3)
+        self.assertEqual(calls, [3])
+        self.assertFalse(Task.objects.exists())
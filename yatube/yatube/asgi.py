@@ -0,0 +1,20 @@
+"""
+ASGI config for yatube project.
+
+Serves the whole site (see core.asgi) and the live update streams
+under LIVE_URL_PREFIX (see live.asgi), e.g.
+
+    uvicorn yatube.asgi:application
+"""
+
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+django.setup()
+
+from core.asgi import DjangoApp, Router  # noqa: E402
+from live.asgi import LiveApp  # noqa: E402
+
+application = Router(live=LiveApp(), django=DjangoApp())
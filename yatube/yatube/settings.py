@@ -24,6 +24,47 @@ MAX_LENGHT_POSTS = 10
 
 MAX_LENGHT_SYMBOLS = 15
 
+POSTS_TIMELINE_ENABLED = False
+POSTS_TIMELINE_FANOUT_LIMIT = 1000
+POSTS_TIMELINE_BATCH_SIZE = 500
+
+FEED_CACHE_TIMEOUT = 60 * 60 * 6
+
+SYNDICATION_ITEMS = 30
+
+PAGE_CACHE_ENABLED = True
+PAGE_CACHE_TIMEOUT = 60 * 60
+
+POST_THUMBNAIL_SIZES = ('960x339',)
+
+# Без отдельного воркера (manage.py run_tasks) задачи выполняются сразу.
+TASKS_EAGER = DEBUG
+TASKS_MAX_ATTEMPTS = 5
+TASKS_RETRY_DELAY = 10
+TASKS_RETENTION = 7 * 24 * 60 * 60
+
+# Режим SQLite под нагрузкой: прагмы соединений, повтор при
+# блокировке и очередь коротких записей (core/sqlite.py).
+SQLITE_PRODUCTION_MODE = False
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+SQLITE_BUSY_RETRIES = 5
+SQLITE_BUSY_RETRY_DELAY = 0.05
+SQLITE_WRITE_BATCH_SIZE = 50
+
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+INSTRUMENTATION_SAMPLE_RATE = 0.1
+INSTRUMENTATION_WINDOW = 60 * 15
+INSTRUMENTATION_FLUSH_INTERVAL = 10
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
@@ -43,11 +84,18 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'tasks.apps.TasksConfig',
+    'benchmarks.apps.BenchmarksConfig',
+    'api.apps.ApiConfig',
+    'live.apps.LiveConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
+    'posts.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -61,7 +109,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.InstrumentedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -71,6 +119,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'live.context_processors.live',
             ],
         },
     },
@@ -78,17 +127,64 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# yatube.asgi: обработчики Django -- в пуле ASGI_THREADS потоков,
+# параллельные запросы асинхронных страниц -- в пуле ASGI_DB_THREADS
+# (не меньше 1: цикл событий не выполняет запросы к базе сам).
+ASGI_THREADS = 8
+ASGI_DB_THREADS = 8
+
+# Живые обновления (SSE) отдаёт yatube.asgi; страницы подключают
+# клиент, только если прокси направляет туда LIVE_URL_PREFIX.
+LIVE_UPDATES_ENABLED = False
+LIVE_URL_PREFIX = '/live/'
+# 'database' -- журнал событий в базе, общий для всех процессов;
+# 'memory' -- для одного процесса, без записи в базу.
+LIVE_BROKER = 'database'
+LIVE_POLL_INTERVAL = 0.5
+LIVE_HEARTBEAT = 15
+LIVE_QUEUE_SIZE = 100
+LIVE_BACKLOG = 500
+LIVE_EVENT_TTL = 60 * 10
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Бэкенды core.db_backends возвращают соединения в пул процесса
+# (core/db_pool.py), поэтому CONN_MAX_AGE = 0 не значит нового
+# соединения на каждый запрос и подходит серверам с потоками.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.db_backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 0,
     }
 }
 
+# Реплики только для чтения: пути к копиям базы через запятую
+# в YATUBE_DB_REPLICAS. Открываются в режиме ro, поэтому отсутствующий
+# файл -- это недоступная реплика, а не новая пустая база.
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+    filter(None, os.environ.get('YATUBE_DB_REPLICAS', '').split(',')), 1
+):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'core.db_backends.sqlite3',
+        'NAME': f'file:{path}?mode=ro',
+        'OPTIONS': {'uri': True},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['core.db_routers.PrimaryReplicaRouter']
+DATABASE_REPLICATED_APPS = ('posts',)
+DATABASE_REPLICA_PIN_SECONDS = 10
+DATABASE_REPLICA_RETRY_SECONDS = 30
+
+DATABASE_POOL_SIZE = 8
+DATABASE_POOL_MAX_LIFETIME = 60 * 30
+DATABASE_HEALTH_CHECK_INTERVAL = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -110,9 +206,24 @@ AUTH_PASSWORD_VALIDATORS = [
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache_backends.TwoTierCache',
+        'OPTIONS': {
+            'SHARED': {
+                'BACKEND': (
+                    'django.core.cache.backends.filebased.FileBasedCache'
+                ),
+                'LOCATION': os.path.join(BASE_DIR, 'cache'),
+                'OPTIONS': {
+                    'MAX_ENTRIES': 10000,
+                },
+            },
+            'LOCAL_MAX_ENTRIES': 1000,
+            'STAMP_CHECK_INTERVAL': 1,
+        },
     }
 }
+# Тесты держат файловый кеш во временном каталоге.
+TEST_RUNNER = 'core.test_runner.TestRunner'
 
 
 # Internationalization
@@ -137,3 +248,15 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Файлы называются по хешу содержимого и не меняются: одинаковые
+# картинки хранятся один раз, а их URL кешируются на MEDIA_MAX_AGE.
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+MEDIA_MAX_AGE = 365 * 24 * 60 * 60
+
+# Картинки постов (см. posts.uploads): загрузка пишется на диск частями,
+# до перекодирования файл лежит во входящих, вне MEDIA_ROOT.
+FILE_UPLOAD_HANDLERS = ['posts.uploads.ImageUploadHandler']
+IMAGE_UPLOAD_CHUNK_SIZE = 64 * 1024
+IMAGE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS = 25_000_000
+IMAGE_UPLOAD_INCOMING_DIR = os.path.join(BASE_DIR, 'uploads')